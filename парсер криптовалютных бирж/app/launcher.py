@@ -0,0 +1,159 @@
+"""Production launcher: one ingestion process and several uvicorn API workers sharing prices in memory.
+
+Usage (from the project root):
+
+    python -m app.launcher                       # WEB_CONCURRENCY (or CPU count) workers on :8000
+    python -m app.launcher --workers 4 --host 0.0.0.0 --port 8000
+
+The ingestion process owns everything that talks to the exchanges in the
+background (ticker streams, bulk pollers) plus the database upkeep: the
+prices table writer, its pruning and the candle rollup backfill. It
+publishes every PriceBook update into a SharedPriceTable. API workers start
+with streams, pollers and depth streams off and answer price requests from
+the table, so adding workers does not add upstream traffic; they only call
+an exchange when an entry is missing or older than SHARED_PRICES_MAX_AGE,
+and for endpoints that are not served from the table (history, depth).
+Symbol discovery also runs only in the ingestion process; workers reload
+the persisted index (SYMBOLS_FILE) when it changes.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from typing import Dict, List
+
+from app.models.db import engine, init_db
+from app.parsers import BinanceParser, BitgetParser, BybitParser, CoinbaseParser
+from app.services.candles import CandleStore
+from app.services.db_writer import BatchWriter, insert_prices, run_pruning
+from app.services.poller import start_pollers
+from app.services.shared_prices import SharedPriceTable, table_keys
+from app.services.stream import PriceBook, start_streams, stop_streams
+from app.utils.config import (
+    DB_WRITE_BATCH,
+    DB_WRITE_INTERVAL_MS,
+    DB_WRITE_QUEUE,
+    POLL_ENABLED,
+    POLL_INTERVAL,
+    POLL_JITTER,
+    POLL_STORE_PRICES,
+    PRICE_STREAM_ENABLED,
+    PRICES_PRUNE_INTERVAL,
+    PRICES_RETENTION_HOURS,
+    STREAM_URLS,
+    SUPPORTED_SYMBOLS as CONF_SYMBOLS,
+    SYMBOLS_DISCOVERY_ENABLED,
+    SYMBOLS_REFRESH_INTERVAL,
+)
+from app.utils.http import close_shared_connector
+from app.utils.logging import setup_logging
+from app.utils.symbols import SYMBOL_INDEX, run_refresh
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SYMBOLS = [s.upper() for s in CONF_SYMBOLS]
+
+
+async def ingest(table_name: str) -> None:
+    """Run streams and pollers until SIGTERM/SIGINT, publishing every price into the shared table."""
+    table = SharedPriceTable.attach(table_name, table_keys(SUPPORTED_SYMBOLS))
+    book = PriceBook()
+    book.add_listener(table.publish)
+    parsers = {p.name: p for p in (BinanceParser(), BybitParser(), BitgetParser(), CoinbaseParser())}
+    writer = BatchWriter(
+        lambda rows: insert_prices(engine, rows), DB_WRITE_BATCH, DB_WRITE_INTERVAL_MS / 1000, DB_WRITE_QUEUE,
+    )
+    writer.start()
+
+    async def store(rows: List[Dict]) -> None:
+        writer.offer_many(rows)
+
+    SYMBOL_INDEX.load()
+    streams = start_streams(book, SUPPORTED_SYMBOLS, STREAM_URLS) if PRICE_STREAM_ENABLED else {}
+    tasks: List[asyncio.Task] = [asyncio.create_task(asyncio.to_thread(CandleStore().backfill_rollups))]
+    if PRICES_RETENTION_HOURS > 0:
+        tasks.append(asyncio.create_task(run_pruning(engine, PRICES_RETENTION_HOURS * 3600, PRICES_PRUNE_INTERVAL)))
+    if SYMBOLS_DISCOVERY_ENABLED:
+        tasks.append(asyncio.create_task(run_refresh(
+            SYMBOL_INDEX, {name: (lambda p=p: p.guarded(p.get_instruments)) for name, p in parsers.items()},
+            SYMBOLS_REFRESH_INTERVAL,
+        )))
+    if POLL_ENABLED:
+        _, poll_tasks = start_pollers(
+            {name: (lambda p=p: p.guarded(lambda: p.get_all_prices(SUPPORTED_SYMBOLS))) for name, p in parsers.items()},
+            book, POLL_INTERVAL, POLL_JITTER, store if POLL_STORE_PRICES else None,
+        )
+        tasks.extend(poll_tasks)
+    if not streams and not POLL_ENABLED:
+        logger.warning("ingestion: PRICE_STREAM_ENABLED and POLL_ENABLED are both off, the table stays empty")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # Windows: terminate() kills the process instead
+            pass
+    logger.info("ingestion: publishing %d slots into %s", len(table.keys), table.name)
+    try:
+        await stop.wait()
+    finally:
+        await stop_streams(streams)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await writer.stop()
+        await asyncio.gather(*(p.close() for p in parsers.values()), return_exceptions=True)
+        await close_shared_connector()
+        table.close()
+
+
+def run_ingestion(table_name: str) -> None:
+    """Entry point of the ingestion process."""
+    setup_logging()
+    asyncio.run(ingest(table_name))
+
+
+def main() -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or max(os.cpu_count() or 1, 2))
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args()
+    # One worker would run in this process, where the configuration is already loaded without the table
+    if args.workers < 2:
+        ap.error("--workers must be at least 2; for a single process run uvicorn app.main:app")
+
+    setup_logging()
+    # Create tables once here so the workers do not race on it
+    init_db()
+    table = SharedPriceTable.create(table_keys(SUPPORTED_SYMBOLS), name=f"crypto-prices-{os.getpid()}")
+    ingestion = multiprocessing.get_context("spawn").Process(
+        target=run_ingestion, args=(table.name,), name="crypto-ingest",
+    )
+    ingestion.start()
+    # Spawned uvicorn workers inherit this environment: read prices from the table, no own upstream feeds
+    os.environ.update(
+        SHARED_PRICES_NAME=table.name, PRICE_STREAM_ENABLED="0", POLL_ENABLED="0", DEPTH_STREAM_ENABLED="0",
+        SYMBOLS_DISCOVERY_ENABLED="0",
+    )
+    logger.info("launcher: ingestion pid %s, %d API workers on %s:%d", ingestion.pid, args.workers, args.host,
+                args.port)
+    try:
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level)
+    finally:
+        ingestion.terminate()
+        ingestion.join(10)
+        if ingestion.is_alive():
+            ingestion.kill()
+            ingestion.join()
+        table.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,103 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, Response
+from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any, Tuple
 import asyncio
+import time
+from datetime import datetime, timezone
+
+import numpy as np
 
 from app.parsers import BinanceParser, BybitParser, BitgetParser, CoinbaseParser
-from app.utils.config import SUPPORTED_SYMBOLS as CONF_SYMBOLS
+from app.parsers.base import INTERVAL_MS, candle_to_dict
+from app.utils.config import (
+    SUPPORTED_SYMBOLS as CONF_SYMBOLS,
+    PRICE_CACHE_TTL,
+    PRICE_CACHE_STALE_TTL,
+    PRICE_HTTP_MAX_AGE,
+    PRICE_STREAM_ENABLED,
+    STREAM_URLS,
+    DEPTH_STREAM_ENABLED,
+    DEPTH_LEVELS,
+    DEPTH_MAX_AGE,
+    ARCHIVE_ENABLED,
+    ARCHIVE_DIR,
+    ARCHIVE_COMPACT_INTERVAL,
+    HEDGE_MODE,
+    HEDGE_DELAY_MS,
+    HEDGE_PERCENTILE,
+    POLL_ENABLED,
+    POLL_INTERVAL,
+    POLL_JITTER,
+    POLL_STORE_PRICES,
+    DB_WRITE_BATCH,
+    DB_WRITE_INTERVAL_MS,
+    DB_WRITE_QUEUE,
+    PRICES_RETENTION_HOURS,
+    PRICES_PRUNE_INTERVAL,
+    HISTORY_LTTB_OVERSAMPLE,
+    ARBITRAGE_TOP_K,
+    ARBITRAGE_FEE_BPS,
+    ARBITRAGE_MAX_AGE,
+    ARBITRAGE_WS_INTERVAL_MS,
+    METRICS_LOOP_LAG_INTERVAL,
+    FAST_JSON_ENABLED,
+    SHARED_PRICES_NAME,
+    SHARED_PRICES_MAX_AGE,
+    SHARED_PRICES_SYNC_MS,
+    SYMBOLS_DISCOVERY_ENABLED,
+    SYMBOLS_REFRESH_INTERVAL,
+)
+from app.utils import metrics
+from app.utils.encoding import FastJSONResponse, check_payload, dumps
+from app.utils.hedge import HedgedCallError, LatencyTracker, hedged_call
+from app.utils.http import close_shared_connector, pool_stats
 from app.utils.logging import setup_logging
-from app.models.db import init_db
+from app.utils.symbols import SYMBOL_INDEX, run_follow, run_refresh
+from app.models.db import engine, init_db
+from app.services.cache import TickerCache
+from app.services.stream import PriceBook, start_streams, stop_streams
+from app.services.orderbook import OrderBook, OrderBookStore
+from app.services.depth import DEPTH_STREAM_CLASSES, start_depth_streams
+from app.services.candles import CandleStore, fetch_closes, rollup_levels, sync_candles
+from app.services.downsample import lttb_indices
+from app.services.archive import CandleArchive, run_compaction
+from app.services.indicators import INDICATOR_NAMES, IndicatorCache, compute_indicators, latest_values
+from app.services.streaming_indicators import LiveIndicators
+from app.services.poller import SourcePoller, start_pollers
+from app.services.db_writer import BatchWriter, insert_prices, run_pruning
+from app.services.arbitrage import ArbitrageScanner
+from app.services.http_cache import ConditionalGetMiddleware, StaticAsset
+from app.services.shared_prices import SharedPriceTable, table_keys
+from app.services.correlation import (
+    RollingCorrelation,
+    align_series,
+    log_returns,
+    matrix_to_dict,
+    pearson_matrix,
+    spearman_matrix,
+)
 
 app = FastAPI(title="Crypto Analysis API", version="0.1.0")
+# Price JSON: short browser/proxy cache window plus ETag revalidation
+_HTTP_MAX_AGE = {
+    "/api/crypto/{symbol}": PRICE_HTTP_MAX_AGE,
+    "/api/crypto/prices": PRICE_HTTP_MAX_AGE,
+    "/api/crypto/{symbol}/diffs": PRICE_HTTP_MAX_AGE,
+    "/api/crypto/{symbol}/depth": PRICE_HTTP_MAX_AGE,
+    "/api/arbitrage": PRICE_HTTP_MAX_AGE,
+}
+app.add_middleware(ConditionalGetMiddleware, max_age=_HTTP_MAX_AGE.get)
+app.add_middleware(metrics.TimingMiddleware)
 
 SUPPORTED_SYMBOLS = [s.upper() for s in CONF_SYMBOLS]
 SUPPORTED_SOURCES = ["auto", "binance", "bybit", "bitget", "coinbase"]
 
+
+def _is_supported(symbol: str) -> bool:
+    """Configured core symbols (streamed, polled, batch) plus every base discovered on an exchange."""
+    return symbol in SUPPORTED_SYMBOLS or symbol in SYMBOL_INDEX
+
 class PriceResponse(BaseModel):
     symbol: str
     price: float
@@ -23,12 +107,136 @@ class PriceResponse(BaseModel):
 class HistoryPoint(BaseModel):
     timestamp: str
     price: float
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float] = None
+    volume: Optional[float] = None
 
 class IndicatorResponse(BaseModel):
     symbol: str
     indicators: dict
 
 _parsers: dict[str, object] = {}
+_price_cache = TickerCache(ttl=PRICE_CACHE_TTL, stale_ttl=PRICE_CACHE_STALE_TTL)
+_price_book = PriceBook()
+_candle_store = CandleStore()
+_archive: Optional[CandleArchive] = None
+_indicator_cache = IndicatorCache()
+_live_indicators = LiveIndicators()
+_correlation_cache = IndicatorCache(maxsize=64)
+_rolling_correlations = IndicatorCache(maxsize=64)
+_latency = LatencyTracker()
+_background: list[asyncio.Task] = []
+_streams: dict[str, object] = {}
+_order_books = OrderBookStore(max_levels=DEPTH_LEVELS)
+_depth_streams: dict[str, object] = {}
+_pollers: dict[str, SourcePoller] = {}
+_price_writer: Optional[BatchWriter] = None
+_shared_prices: Optional[SharedPriceTable] = None
+_arbitrage = ArbitrageScanner(
+    SUPPORTED_SYMBOLS, ["binance", "bybit", "bitget", "coinbase"],
+    k=ARBITRAGE_TOP_K, fee_bps=ARBITRAGE_FEE_BPS, max_age=ARBITRAGE_MAX_AGE,
+)
+
+def _on_stream_price(item: Dict) -> None:
+    # Streamed ticks keep the REST cache warm so /api/crypto/{symbol} rarely goes upstream
+    _live_indicators.feed(item["source"], item["symbol"], item["price"])
+    _price_cache.put(
+        (item["source"], item["symbol"]),
+        {"symbol": item["symbol"], "price": item["price"], "source": item["source"], "currency": item["currency"]},
+    )
+
+_price_book.add_listener(_on_stream_price)
+_price_book.add_listener(_arbitrage.on_price)
+
+async def _fetch_price(src_name: str, symbol: str) -> Dict:
+    """Current price for one source, served through the shared ticker cache."""
+    parser = _parsers.get(src_name)
+    if not parser:
+        raise HTTPException(status_code=503, detail="Parser not ready")
+
+    if _shared_prices is not None:
+        # Multi-worker mode: the ingestion process keeps the table fresh, no upstream call needed
+        data = _shared_prices.get(src_name, symbol, SHARED_PRICES_MAX_AGE)
+        if data is not None:
+            return data
+
+    async def load() -> Dict:
+        started = time.perf_counter()
+        data = await parser.guarded(lambda: parser.get_current_price(symbol))
+        _latency.observe(src_name, time.perf_counter() - started)
+        _live_indicators.feed(src_name, symbol, data["price"])
+        _arbitrage.update(src_name, symbol, data["price"])
+        return data
+
+    return await _price_cache.get_or_fetch((src_name, symbol), load)
+
+async def _fetch_all_prices(src_name: str) -> Dict[str, Dict]:
+    """All supported symbols from one source in a single upstream call; seeds per-symbol cache entries."""
+    parser = _parsers.get(src_name)
+    if not parser:
+        raise HTTPException(status_code=503, detail="Parser not ready")
+
+    if _shared_prices is not None:
+        shared = {sym: data for sym in SUPPORTED_SYMBOLS
+                  if (data := _shared_prices.get(src_name, sym, SHARED_PRICES_MAX_AGE)) is not None}
+        if shared:
+            return shared
+
+    async def load() -> Dict[str, Dict]:
+        prices = await parser.guarded(lambda: parser.get_all_prices(SUPPORTED_SYMBOLS))
+        for sym, data in prices.items():
+            _price_cache.put((src_name, sym), data)
+            _live_indicators.feed(src_name, sym, data["price"])
+            _arbitrage.update(src_name, sym, data["price"])
+        return prices
+
+    return await _price_cache.get_or_fetch((src_name, "*"), load)
+
+async def _order_book(src_name: str, symbol: str) -> Tuple[OrderBook, bool]:
+    """(book, live): the streamed book while it is in sync, else a REST snapshot cached like prices."""
+    book = _order_books.get(src_name, symbol)
+    if book is not None and book.synced:
+        stream = _depth_streams.get(src_name)
+        # Quiet books get no diffs, so a connected stream keeps them live regardless of age
+        if (stream is not None and stream.connected) or time.time() - book.ts <= DEPTH_MAX_AGE:
+            return book, True
+    parser = _parsers.get(src_name)
+    if not parser:
+        raise HTTPException(status_code=503, detail="Parser not ready")
+
+    async def load() -> OrderBook:
+        snap = await parser.guarded(lambda: parser.get_order_book(symbol, DEPTH_LEVELS))
+        snapshot = OrderBook(src_name, symbol, DEPTH_STREAM_CLASSES[src_name].currency, DEPTH_LEVELS)
+        snapshot.load_snapshot(snap["bids"], snap["asks"], snap.get("update_id"))
+        return snapshot
+
+    return await _price_cache.get_or_fetch((src_name, symbol, "depth"), load), False
+
+async def _poll_source(src_name: str) -> Dict[str, Dict]:
+    """Bulk fetch for the background poller; the PriceBook listener seeds the per-symbol cache."""
+    parser = _parsers[src_name]
+    prices = await parser.guarded(lambda: parser.get_all_prices(SUPPORTED_SYMBOLS))
+    _price_cache.put((src_name, "*"), prices)
+    return prices
+
+async def _mirror_shared_prices(table: SharedPriceTable) -> None:
+    """Copy ingestion-process updates into the local PriceBook (cache, WebSocket clients, arbitrage, indicators)."""
+    seen = table.new_cursor()
+    while True:
+        for item in table.changed(seen):
+            _price_book.update(item["source"], item["symbol"], item["price"], item["currency"], ts=item["ts"])
+        await asyncio.sleep(SHARED_PRICES_SYNC_MS / 1000.0)
+
+async def _store_prices(rows: List[Dict]) -> None:
+    # Never waits on the database: rows are queued for the batch writer
+    if _price_writer is not None:
+        _price_writer.offer_many(rows)
+
+class BatchPriceResponse(BaseModel):
+    prices: Dict[str, PriceResponse]
+    missing: List[str]
 
 class ExchangePrice(BaseModel):
     source: str
@@ -46,18 +254,146 @@ class DiffSummary(BaseModel):
     spread_pct: float
     pairwise: Dict[str, Dict[str, Any]]
 
+# Payload builders for the hot endpoints: plain dicts in exactly the response_model shape, so
+# FAST_JSON_ENABLED can encode them without pydantic (checked against the models at startup)
+
+def _price_payload(data: Dict) -> Dict:
+    return {"symbol": data["symbol"], "price": float(data["price"]), "source": data["source"],
+            "currency": data.get("currency")}
+
+def _diff_payload(symbol: str, prices: List[Dict]) -> Dict:
+    """DiffSummary from at least two {"source", "price", "currency"} entries."""
+    min_entry = min(prices, key=lambda p: p["price"])
+    max_entry = max(prices, key=lambda p: p["price"])
+    spread_abs = max_entry["price"] - min_entry["price"]
+    spread_pct = (spread_abs / min_entry["price"] * 100.0) if min_entry["price"] else 0.0
+
+    # Pairwise matrix: key "srcA-srcB"
+    pairwise: Dict[str, Dict[str, Any]] = {}
+    for i in range(len(prices)):
+        for j in range(i + 1, len(prices)):
+            a = prices[i]
+            b = prices[j]
+            diff_abs = abs(a["price"] - b["price"])
+            base = min(a["price"], b["price"])
+            pairwise[f"{a['source']}-{b['source']}"] = {
+                "a": {"source": a["source"], "price": a["price"]},
+                "b": {"source": b["source"], "price": b["price"]},
+                "diff_abs": diff_abs,
+                "diff_pct": (diff_abs / base * 100.0) if base else 0.0,
+            }
+    return {
+        "symbol": symbol,
+        "prices": prices,
+        "min_price": min_entry["price"],
+        "min_source": min_entry["source"],
+        "max_price": max_entry["price"],
+        "max_source": max_entry["source"],
+        "spread_abs": spread_abs,
+        "spread_pct": spread_pct,
+        "pairwise": pairwise,
+    }
+
+def _respond(payload: Any) -> Any:
+    """Encode ``payload`` directly when FAST_JSON_ENABLED; otherwise FastAPI validates it via response_model."""
+    return FastJSONResponse(payload) if FAST_JSON_ENABLED else payload
+
+def _history_body(chunks: Iterator[List[Tuple]]) -> Iterator[bytes]:
+    """JSON array of HistoryPoints encoded chunk by chunk, so only one chunk of candles is held at a time."""
+    yield b"["
+    first = True
+    for rows in chunks:
+        if not rows:
+            continue
+        body = dumps([candle_to_dict(c) for c in rows])[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+def _check_fast_payloads() -> None:
+    """Fail startup if a builder drifts from its response model (the fast path no longer validates)."""
+    btc = _price_payload({"symbol": "BTC", "price": 100, "source": "binance", "currency": "USDT"})
+    check_payload(PriceResponse, btc)
+    check_payload(BatchPriceResponse, {"prices": {"BTC": btc}, "missing": ["ETH"]})
+    candles = np.array([[1_700_000_000_000, 1.0, 2.0, 0.5, 1.5, 10.0]], dtype=np.float64)
+    check_payload(List[HistoryPoint], [candle_to_dict(c) for c in candles])
+    check_payload(DiffSummary, _diff_payload("BTC", [
+        {"source": "binance", "price": 100.0, "currency": "USDT"},
+        {"source": "coinbase", "price": 99.5, "currency": "USD"},
+        {"source": "bybit", "price": 100.5, "currency": None},
+    ]))
+
 @app.on_event("startup")
 async def on_startup() -> None:
+    global _archive, _price_writer, _shared_prices
     setup_logging()
+    if FAST_JSON_ENABLED:
+        _check_fast_payloads()
     init_db()
     # Initialize parser instances
     _parsers["binance"] = BinanceParser()
     _parsers["bybit"] = BybitParser()
     _parsers["bitget"] = BitgetParser()
     _parsers["coinbase"] = CoinbaseParser()
+    # Persisted symbol index first: streams resolve their native pairs through it
+    SYMBOL_INDEX.load()
+    if SYMBOLS_DISCOVERY_ENABLED:
+        _background.append(asyncio.create_task(run_refresh(
+            SYMBOL_INDEX,
+            {name: (lambda p=p: p.guarded(p.get_instruments)) for name, p in _parsers.items()},
+            SYMBOLS_REFRESH_INTERVAL,
+        )))
+    else:
+        # Another process (the launcher's ingestion) discovers; pick up its rewrites of the file
+        _background.append(asyncio.create_task(run_follow(SYMBOL_INDEX, 30.0)))
+    if PRICE_STREAM_ENABLED:
+        _streams.update(start_streams(_price_book, SUPPORTED_SYMBOLS, STREAM_URLS))
+    if DEPTH_STREAM_ENABLED:
+        binance = _parsers["binance"]
+        _depth_streams.update(start_depth_streams(
+            _order_books, SUPPORTED_SYMBOLS, STREAM_URLS,
+            snapshots={"binance": lambda sym: binance.guarded(lambda: binance.get_order_book(sym, DEPTH_LEVELS))},
+        ))
+    if ARCHIVE_ENABLED:
+        _archive = CandleArchive(ARCHIVE_DIR)
+        _background.append(asyncio.create_task(run_compaction(_archive, ARCHIVE_COMPACT_INTERVAL)))
+    _background.append(asyncio.create_task(metrics.monitor_loop_lag(METRICS_LOOP_LAG_INTERVAL)))
+    if not SHARED_PRICES_NAME:
+        # Under the launcher the ingestion process owns the prices writer, its pruning and the rollup backfill
+        _price_writer = BatchWriter(
+            lambda rows: insert_prices(engine, rows), DB_WRITE_BATCH, DB_WRITE_INTERVAL_MS / 1000, DB_WRITE_QUEUE,
+        )
+        _price_writer.start()
+        _background.append(asyncio.create_task(asyncio.to_thread(_candle_store.backfill_rollups)))
+        if PRICES_RETENTION_HOURS > 0:
+            _background.append(asyncio.create_task(
+                run_pruning(engine, PRICES_RETENTION_HOURS * 3600, PRICES_PRUNE_INTERVAL)
+            ))
+    else:
+        _shared_prices = SharedPriceTable.attach(SHARED_PRICES_NAME, table_keys(SUPPORTED_SYMBOLS))
+        _background.append(asyncio.create_task(_mirror_shared_prices(_shared_prices)))
+    if POLL_ENABLED:
+        pollers, tasks = start_pollers(
+            {name: (lambda name=name: _poll_source(name)) for name in _parsers},
+            _price_book, POLL_INTERVAL, POLL_JITTER, _store_prices if POLL_STORE_PRICES else None,
+        )
+        _pollers.update(pollers)
+        _background.extend(tasks)
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
+    global _shared_prices
+    await stop_streams(_streams)
+    _streams.clear()
+    await stop_streams(_depth_streams)
+    _depth_streams.clear()
+    for t in _background:
+        t.cancel()
+    await asyncio.gather(*_background, return_exceptions=True)
+    _background.clear()
+    _pollers.clear()
+    if _price_writer is not None:
+        await _price_writer.stop()
     # Gracefully close sessions
     tasks = []
     for p in _parsers.values():
@@ -66,10 +402,13 @@ async def on_shutdown() -> None:
             tasks.append(close())
     if tasks:
         await asyncio.gather(*tasks, return_exceptions=True)
+    await close_shared_connector()
+    if _shared_prices is not None:
+        _shared_prices.close()
+        _shared_prices = None
 
-@app.get("/", response_class=HTMLResponse)
-async def root() -> str:
-    return (
+# Dashboard page: built once, served precompressed with an ETag
+_DASHBOARD_HTML = (
         """
         <!doctype html>
         <html>
@@ -420,6 +759,34 @@ async def root() -> str:
                 ctx.fillText(valText, vtx, y - 4);
               });
             }
+            // Live price over WebSocket; polling below stays as a fallback
+            let priceSocket = null;
+            let wsSymbol = null;
+            function connectPriceSocket() {
+              const proto = location.protocol === 'https:' ? 'wss' : 'ws';
+              wsSymbol = document.getElementById('symbol').value;
+              try {
+                priceSocket = new WebSocket(`${proto}://${location.host}/ws/prices?symbols=${wsSymbol}`);
+              } catch (_e) {
+                return;
+              }
+              priceSocket.onmessage = (ev) => {
+                const d = JSON.parse(ev.data);
+                const src = document.getElementById('sourceSel').value;
+                const shown = document.getElementById('source').textContent;
+                if (d.symbol !== document.getElementById('symbol').value) return;
+                if (d.source !== (src === 'auto' ? shown : src)) return;
+                document.getElementById('value').textContent = formatUSD(d.price);
+              };
+              priceSocket.onclose = () => { priceSocket = null; setTimeout(connectPriceSocket, 5000); };
+            }
+            function resubscribePriceSocket() {
+              const sym = document.getElementById('symbol').value;
+              if (!priceSocket || priceSocket.readyState !== WebSocket.OPEN || sym === wsSymbol) return;
+              priceSocket.send(JSON.stringify({ op: 'unsubscribe', symbols: [wsSymbol] }));
+              priceSocket.send(JSON.stringify({ op: 'subscribe', symbols: [sym] }));
+              wsSymbol = sym;
+            }
             // Auto refresh
             let refreshTimer = null;
             function applyRefreshInterval() {
@@ -432,16 +799,54 @@ async def root() -> str:
             }
             document.getElementById('refreshSel').addEventListener('change', () => applyRefreshInterval());
             // Hook up change listeners
-            document.getElementById('symbol').addEventListener('change', () => { enforceSourceCompatibility(); load(); });
+            document.getElementById('symbol').addEventListener('change', () => { enforceSourceCompatibility(); resubscribePriceSocket(); load(); });
             document.getElementById('sourceSel').addEventListener('change', () => { enforceSourceCompatibility(); load(); });
             enforceSourceCompatibility();
             load();
             applyRefreshInterval();
+            connectPriceSocket();
           </script>
         </body>
         </html>
         """
     )
+_DASHBOARD = StaticAsset(_DASHBOARD_HTML.encode("utf-8"), "text/html; charset=utf-8")
+
+@app.get("/", response_class=HTMLResponse)
+async def root(request: Request) -> Response:
+    return _DASHBOARD.response(request)
+
+def _collect_metrics() -> List[Any]:
+    """Scrape-time series from the cache, breakers, limiters and pollers."""
+    cache = _price_cache.stats()
+    lookups = metrics.Counter("crypto_cache_lookups_total", "Price cache lookups by outcome.", ("result",))
+    for result in ("hits", "stale_hits", "misses", "coalesced"):
+        lookups.inc(result, amount=cache[result])
+    hit_ratio = metrics.Gauge("crypto_cache_hit_ratio", "Share of price cache lookups served without a new upstream call.")
+    hit_ratio.set(cache["hit_ratio"])
+    breaker_open = metrics.Gauge("crypto_breaker_open", "1 while the exchange circuit breaker is not closed.", ("exchange",))
+    short_circuited = metrics.Counter("crypto_breaker_short_circuited_total", "Calls rejected by an open breaker.", ("exchange",))
+    throttled = metrics.Counter("crypto_limiter_wait_seconds_total", "Time spent waiting for rate limiter tokens.", ("exchange",))
+    for name, p in _parsers.items():
+        breaker = getattr(p, "breaker", None)
+        if breaker is not None:
+            st = breaker.stats()
+            breaker_open.set(0 if st["state"] == "closed" else 1, name)
+            short_circuited.inc(name, amount=st["short_circuited"])
+        limiter = getattr(p, "limiter", None)
+        if limiter is not None:
+            throttled.inc(name, amount=limiter.stats()["waited_s"])
+    poll_lag = metrics.Gauge("crypto_poller_lag_seconds", "How late the last background poll started.", ("exchange",))
+    for name, poller in _pollers.items():
+        poll_lag.set(poller.last_lag, name)
+    return [lookups, hit_ratio, breaker_open, short_circuited, throttled, poll_lag]
+
+metrics.REGISTRY.add_collector(_collect_metrics)
+
+@app.get("/metrics")
+def get_metrics() -> Response:
+    """Prometheus text exposition of API, upstream, cache and event loop metrics."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/health")
 def health() -> dict:
@@ -457,6 +862,28 @@ async def status() -> dict:
         "supported_symbols": SUPPORTED_SYMBOLS,
         "sources": SUPPORTED_SOURCES,
         "parsers_ready": ready,
+        "cache": _price_cache.stats(),
+        "streams": {name: st.stats() for name, st in _streams.items()},
+        "price_book": _price_book.stats(),
+        "shared_prices": _shared_prices.stats() if _shared_prices else None,
+        "symbols": SYMBOL_INDEX.stats(),
+        "depth": {
+            "books": _order_books.stats(),
+            "streams": {name: st.stats() for name, st in _depth_streams.items()},
+        },
+        "poller": {name: p.stats() for name, p in _pollers.items()},
+        "db_writer": _price_writer.stats() if _price_writer else None,
+        "hedge": {"mode": HEDGE_MODE, "latency": _latency.stats()},
+        "arbitrage": _arbitrage.stats(),
+        "http_pool": pool_stats(),
+        "routes": {name: p.routes.stats() for name, p in _parsers.items() if getattr(p, "routes", None)},
+        "resilience": {
+            name: {
+                "breaker": p.breaker.stats() if getattr(p, "breaker", None) else None,
+                "limiter": p.limiter.stats() if getattr(p, "limiter", None) else None,
+            }
+            for name, p in _parsers.items()
+        },
     }
 
 @app.get("/favicon.ico")
@@ -471,27 +898,177 @@ def favicon() -> Response:
     )
     return Response(content=svg, media_type="image/svg+xml")
 
+def _hedge_delay(source: str) -> float:
+    """Seconds to wait on ``source`` before firing the next one: its recent latency percentile."""
+    if HEDGE_MODE == "immediate":
+        return 0.0
+    observed = _latency.percentile(source, HEDGE_PERCENTILE)
+    if observed is None:
+        return HEDGE_DELAY_MS / 1000.0
+    # Keep the hedge within sane bounds while latency data is noisy
+    return min(max(observed, 0.02), 2.0)
+
+@app.get("/api/symbols")
+def get_symbols() -> dict:
+    """Symbol universe: the configured core set and every base discovered on the exchanges."""
+    return {"core": SUPPORTED_SYMBOLS, "discovered": SYMBOL_INDEX.symbols(), "index": SYMBOL_INDEX.stats()}
+
+@app.get("/api/symbols/{symbol}")
+def get_symbol(symbol: str) -> dict:
+    """Native pair and price/quantity precision of ``symbol`` on each exchange that lists it."""
+    symbol = symbol.upper()
+    if not _is_supported(symbol):
+        raise HTTPException(status_code=404, detail="Unknown symbol")
+    return {"symbol": symbol, "exchanges": SYMBOL_INDEX.describe(symbol)}
+
+@app.get("/api/crypto/prices", response_model=BatchPriceResponse)
+async def get_prices(symbols: Optional[str] = None, source: str = "auto"):
+    """Batch prices: ?symbols=BTC,ETH (default: all supported). One upstream call per exchange."""
+    src = source.lower()
+    if src not in SUPPORTED_SOURCES:
+        raise HTTPException(status_code=400, detail="Unsupported source")
+    wanted = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else list(SUPPORTED_SYMBOLS)
+    unsupported = [s for s in wanted if s not in SUPPORTED_SYMBOLS]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported symbol: {', '.join(unsupported)}")
+
+    prices: Dict[str, Dict] = {}
+    sources_order = [src] if src != "auto" else ["binance", "bybit", "bitget", "coinbase"]
+    for s in sources_order:
+        pending = [sym for sym in wanted if sym not in prices]
+        if not pending:
+            break
+        try:
+            batch = await _fetch_all_prices(s)
+        except Exception:  # noqa: BLE001
+            continue
+        for sym in pending:
+            if sym in batch:
+                prices[sym] = _price_payload(batch[sym])
+    if not prices:
+        raise HTTPException(status_code=502, detail="All sources failed")
+    return _respond({"prices": prices, "missing": [sym for sym in wanted if sym not in prices]})
+
+@app.get("/api/arbitrage")
+async def get_arbitrage(k: Optional[int] = None, min_net_pct: Optional[float] = None):
+    """Top cross-exchange spreads (buy on one exchange, sell on another), best first.
+
+    ``net_pct`` subtracts ARBITRAGE_FEE_BPS per leg. Quotes older than
+    ARBITRAGE_MAX_AGE seconds are ignored. Coinbase quotes USD, the others USDT.
+    """
+    if k is not None and not 1 <= k <= 100:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 100")
+    if not _pollers:
+        # Without the background poller, refresh the matrix through the shared bulk cache
+        await asyncio.gather(*[_fetch_all_prices(s) for s in list(_parsers)], return_exceptions=True)
+    return {
+        "opportunities": _arbitrage.opportunities(k, min_net_pct),
+        "prices": _arbitrage.matrix(),
+        "fee_bps": ARBITRAGE_FEE_BPS,
+        "version": _arbitrage.version,
+    }
+
+@app.get("/api/crypto/correlations")
+async def get_correlations(symbols: Optional[str] = None, days: int = 30, interval: str = "1h",
+                           source: str = "binance", method: str = "pearson", window: Optional[int] = None,
+                           mode: str = "full"):
+    """Correlation matrix of log returns on aligned candles.
+
+    ``symbols``: comma-separated (default: all supported). ``window``: number
+    of most recent returns to use (default: all). ``mode=rolling`` keeps a
+    Pearson matrix that is updated only with candles that arrived since the
+    previous call.
+    """
+    src = source.lower()
+    method = method.lower()
+    wanted = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else list(SUPPORTED_SYMBOLS)
+    wanted = list(dict.fromkeys(wanted))
+    if any(s not in SUPPORTED_SYMBOLS for s in wanted) or len(wanted) < 2:
+        raise HTTPException(status_code=400, detail="Need at least two supported symbols")
+    if src not in SUPPORTED_SOURCES or src == "auto":
+        raise HTTPException(status_code=400, detail="Unsupported source")
+    if interval not in INTERVAL_MS or days <= 0:
+        raise HTTPException(status_code=400, detail="Unsupported interval or days")
+    if method not in ("pearson", "spearman") or mode not in ("full", "rolling"):
+        raise HTTPException(status_code=400, detail="method must be pearson|spearman, mode full|rolling")
+    if mode == "rolling" and method != "pearson":
+        raise HTTPException(status_code=400, detail="Rolling mode supports pearson only")
+    if window is not None and window < 2:
+        raise HTTPException(status_code=400, detail="window must be >= 2")
+    parser = _parsers.get(src)
+    if not parser:
+        raise HTTPException(status_code=503, detail="Parser not ready")
+
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - days * INTERVAL_MS["1d"]
+    results = await asyncio.gather(
+        *[fetch_closes(parser, _candle_store, src, sym, interval, start_ms, end_ms, _archive) for sym in wanted],
+        return_exceptions=True,
+    )
+    failed = [f"{sym}: {res}" for sym, res in zip(wanted, results) if isinstance(res, Exception)]
+    if failed:
+        raise HTTPException(status_code=502, detail="; ".join(failed))
+    ts, closes = align_series(dict(zip(wanted, results)))
+    if len(ts) < 3:
+        raise HTTPException(status_code=502, detail="Not enough aligned candles")
+    returns = log_returns(closes)
+    ret_ts = ts[1:]
+    n_window = min(window or len(returns), len(returns))
+
+    if mode == "rolling":
+        key = (src, interval, tuple(wanted), n_window)
+        state = _rolling_correlations.get(key)
+        if state is None or state.last_ts is None or state.last_ts < ret_ts[0]:
+            state = RollingCorrelation(len(wanted), n_window)
+            _rolling_correlations.put(key, state)
+            state.extend(returns[-n_window:])
+        else:
+            state.extend(returns[ret_ts > state.last_ts])
+        state.last_ts = int(ret_ts[-1])
+        matrix = state.matrix()
+    else:
+        key = (src, interval, tuple(wanted), int(ts[0]), int(ts[-1]), n_window, method)
+        cached = _correlation_cache.get(key)
+        if cached is not None:
+            return cached
+        fn = pearson_matrix if method == "pearson" else spearman_matrix
+        matrix = fn(returns[-n_window:])
+
+    response = {
+        "symbols": wanted,
+        "method": method,
+        "mode": mode,
+        "window": n_window,
+        "correlations": matrix_to_dict(wanted, matrix),
+    }
+    if mode == "full":
+        _correlation_cache.put(key, response)
+    return response
+
 @app.get("/api/crypto/{symbol}", response_model=PriceResponse)
 async def get_current_price(symbol: str, source: str = "auto"):
     symbol = symbol.upper()
     src = source.lower()
-    if symbol not in SUPPORTED_SYMBOLS:
+    if not _is_supported(symbol):
         raise HTTPException(status_code=400, detail="Unsupported symbol")
     if src not in SUPPORTED_SOURCES:
         raise HTTPException(status_code=400, detail="Unsupported source")
 
-    async def fetch_from(src_name: str):
-        parser = _parsers.get(src_name)
-        if not parser:
-            raise HTTPException(status_code=503, detail="Parser not ready")
-        return await parser.get_current_price(symbol)
+    if src == "auto" and HEDGE_MODE != "off":
+        try:
+            _, data = await hedged_call(
+                ["binance", "bybit", "bitget", "coinbase"], lambda s: _fetch_price(s, symbol), _hedge_delay,
+            )
+        except HedgedCallError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+        return _respond(_price_payload(data))
 
     errors: list[str] = []
     sources_order = [src] if src != "auto" else ["binance", "bybit", "bitget", "coinbase"]
     for s in sources_order:
         try:
-            data = await fetch_from(s)
-            return PriceResponse(**data)
+            data = await _fetch_price(s, symbol)
+            return _respond(_price_payload(data))
         except Exception as e:  # noqa: BLE001
             # If a specific source was requested (not auto) and it doesn't support the symbol,
             # return a clear 400 instead of aggregating into a 502.
@@ -502,94 +1079,267 @@ async def get_current_price(symbol: str, source: str = "auto"):
     raise HTTPException(status_code=502, detail="; ".join(errors) or "All sources failed")
 
 @app.get("/api/crypto/{symbol}/history", response_model=List[HistoryPoint])
-async def get_history(symbol: str, days: int = 7, source: str = "binance"):
+async def get_history(symbol: str, days: int = 7, source: str = "binance", interval: str = "1h",
+                      resolution: Optional[str] = None, max_points: Optional[int] = None, mode: str = "ohlc"):
+    """OHLCV history; ``resolution``/``max_points`` bound the response size regardless of the span.
+
+    ``resolution`` picks a rollup level above ``interval`` (5m, 1h, 1d). With
+    only ``max_points``, ``mode=ohlc`` serves the finest level that fits and
+    ``mode=lttb`` takes a finer level and keeps ``max_points`` bars by LTTB
+    on the close price (for line charts).
+    """
     symbol = symbol.upper()
     src = source.lower()
-    if symbol not in SUPPORTED_SYMBOLS:
+    if not _is_supported(symbol):
         raise HTTPException(status_code=400, detail="Unsupported symbol")
     if src not in SUPPORTED_SOURCES:
         raise HTTPException(status_code=400, detail="Unsupported source")
+    if interval not in INTERVAL_MS:
+        raise HTTPException(status_code=400, detail="Unsupported interval")
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="days must be positive")
+    levels = [interval] + rollup_levels(interval)
+    if resolution is not None and resolution not in levels:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(levels)}")
+    if max_points is not None and max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be >= 3")
+    if mode not in ("ohlc", "lttb"):
+        raise HTTPException(status_code=400, detail="mode must be ohlc|lttb")
     parser = _parsers.get(src)
     if not parser:
         raise HTTPException(status_code=503, detail="Parser not ready")
-    history = await parser.get_historical_data(symbol, days)
-    return [HistoryPoint(**p) for p in history]
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - days * INTERVAL_MS["1d"]
+    if resolution is None and max_points is not None:
+        # LTTB needs more input points than it keeps to have something to choose from
+        budget = max_points * (HISTORY_LTTB_OVERSAMPLE if mode == "lttb" else 1)
+        resolution = next((lvl for lvl in levels if (end_ms - start_ms) // INTERVAL_MS[lvl] <= budget), levels[-1])
+    try:
+        span = await sync_candles(
+            parser, _candle_store, src, symbol, interval, start_ms, end_ms, _archive, resolution=resolution,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{src}: {e}")
+    except Exception as e:  # noqa: BLE001
+        raise HTTPException(status_code=502, detail=f"{src}: {e}")
+    if span is None:
+        return _respond([])
+    level = resolution or interval
+    base = interval if level != interval else None
+    if mode == "lttb" and max_points is not None:
+        # LTTB needs the whole series at once; its size is already bounded by the oversampled budget
+        if base is not None:
+            candles = await asyncio.to_thread(_candle_store.load_rollup, src, symbol, base, level, *span)
+        else:
+            candles = await asyncio.to_thread(_candle_store.load, src, symbol, level, *span)
+        if len(candles) > max_points:
+            arr = np.asarray(candles, dtype=np.float64)
+            candles = [candles[i] for i in lttb_indices(arr[:, 0], arr[:, 4], max_points)]
+        return _respond([candle_to_dict(c) for c in candles])
+    # Rows go from a DB cursor straight into the response body (Starlette iterates this in a worker thread)
+    chunks = _candle_store.iter_chunks(src, symbol, level, *span, base=base)
+    return StreamingResponse(_history_body(chunks), media_type="application/json")
 
 @app.get("/api/crypto/{symbol}/indicators", response_model=IndicatorResponse)
-async def get_indicators(symbol: str, window: int = 14):
+async def get_indicators(symbol: str, window: int = 14, interval: str = "1h", days: int = 30,
+                         source: str = "binance", names: Optional[str] = None, live: bool = False):
+    """Latest SMA/EMA/RSI (``window``), MACD(12, 26, 9) and Bollinger(20, 2) over stored candles.
+
+    ``names`` is a comma-separated subset of sma,ema,rsi,macd,bollinger (default: all).
+    With ``live=true`` returns the streaming per-tick state instead (window 14).
+    """
     symbol = symbol.upper()
-    if symbol not in SUPPORTED_SYMBOLS:
+    src = source.lower()
+    if not _is_supported(symbol):
         raise HTTPException(status_code=400, detail="Unsupported symbol")
-    return IndicatorResponse(symbol=symbol, indicators={})
+    if src not in SUPPORTED_SOURCES or src == "auto":
+        raise HTTPException(status_code=400, detail="Unsupported source")
+    if interval not in INTERVAL_MS:
+        raise HTTPException(status_code=400, detail="Unsupported interval")
+    if window < 2 or days <= 0:
+        raise HTTPException(status_code=400, detail="window must be >= 2 and days positive")
+    wanted = tuple(n.strip().lower() for n in names.split(",") if n.strip()) if names else INDICATOR_NAMES
+    unknown = [n for n in wanted if n not in INDICATOR_NAMES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown indicator: {', '.join(unknown)}")
+    if live:
+        state = _live_indicators.get(src, symbol) or {}
+        return IndicatorResponse(symbol=symbol, indicators={k: v for k, v in state.items() if k in wanted or k == "samples"})
+    parser = _parsers.get(src)
+    if not parser:
+        raise HTTPException(status_code=503, detail="Parser not ready")
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - days * INTERVAL_MS["1d"]
+    try:
+        ts, close = await fetch_closes(parser, _candle_store, src, symbol, interval, start_ms, end_ms, _archive)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{src}: {e}")
+    except Exception as e:  # noqa: BLE001
+        raise HTTPException(status_code=502, detail=f"{src}: {e}")
+    if not len(ts):
+        return IndicatorResponse(symbol=symbol, indicators={})
 
-@app.get("/api/crypto/correlations")
-async def get_correlations(symbols: Optional[List[str]] = None):
-    return {"correlations": {}}
+    key = (src, symbol, interval, int(ts[0]), int(ts[-1]), wanted, window)
+    values = _indicator_cache.get(key)
+    if values is None:
+        values = latest_values(compute_indicators(close, wanted, window=window))
+        values["timestamp"] = datetime.fromtimestamp(int(ts[-1]) / 1000, tz=timezone.utc).isoformat()
+        _indicator_cache.put(key, values)
+    return IndicatorResponse(symbol=symbol, indicators=values)
 
 @app.get("/api/crypto/{symbol}/diffs", response_model=DiffSummary)
 async def get_exchange_differences(symbol: str):
     symbol = symbol.upper()
-    if symbol not in SUPPORTED_SYMBOLS:
+    if not _is_supported(symbol):
         raise HTTPException(status_code=400, detail="Unsupported symbol")
 
-    async def fetch_from(src_name: str):
-        parser = _parsers.get(src_name)
-        if not parser:
-            raise HTTPException(status_code=503, detail="Parser not ready")
-        return await parser.get_current_price(symbol)
-
     sources_order = [s for s in ["binance", "bybit", "bitget", "coinbase"] if s in _parsers]
-    results = await asyncio.gather(*[fetch_from(s) for s in sources_order], return_exceptions=True)
+    results = await asyncio.gather(*[_fetch_price(s, symbol) for s in sources_order], return_exceptions=True)
 
-    prices: List[ExchangePrice] = []
+    prices: List[Dict] = []
     for src, res in zip(sources_order, results):
         if isinstance(res, Exception):
             # skip failed source
             continue
         try:
             # Normalize to float and treat USD ~= USDT for spread purposes
-            price = float(res.get("price"))
-            curr = res.get("currency")
-            prices.append(ExchangePrice(source=src, price=price, currency=curr))
+            prices.append({"source": src, "price": float(res.get("price")), "currency": res.get("currency")})
         except Exception:  # noqa: BLE001
             continue
 
     if len(prices) < 2:
         raise HTTPException(status_code=502, detail="Not enough exchange data to compute differences")
+    return _respond(_diff_payload(symbol, prices))
 
-    min_entry = min(prices, key=lambda p: p.price)
-    max_entry = max(prices, key=lambda p: p.price)
-    spread_abs = max_entry.price - min_entry.price
-    spread_pct = (spread_abs / min_entry.price * 100.0) if min_entry.price else 0.0
+@app.get("/api/crypto/{symbol}/depth")
+async def get_depth(symbol: str, notional: float = 10_000, source: str = "all", levels: int = 0):
+    """Effective (volume-weighted) buy and sell price for ``notional`` of quote currency per exchange.
 
-    # Pairwise matrix: key "srcA-srcB"
-    pairwise: Dict[str, Dict[str, Any]] = {}
-    for i in range(len(prices)):
-        for j in range(i + 1, len(prices)):
-            a = prices[i]
-            b = prices[j]
-            key = f"{a.source}-{b.source}"
-            diff_abs = abs(a.price - b.price)
-            base = min(a.price, b.price)
-            diff_pct = (diff_abs / base * 100.0) if base else 0.0
-            pairwise[key] = {
-                "a": {"source": a.source, "price": a.price},
-                "b": {"source": b.source, "price": b.price},
-                "diff_abs": diff_abs,
-                "diff_pct": diff_pct,
-            }
+    Walks the L2 book: asks for buying, bids for selling. ``slippage_bps``
+    is relative to the top of book; ``complete`` is false when the book is
+    thinner than the notional. ``levels=N`` adds the top N levels per side.
+    """
+    symbol = symbol.upper()
+    if not _is_supported(symbol):
+        raise HTTPException(status_code=400, detail="Unsupported symbol")
+    if not notional > 0:
+        raise HTTPException(status_code=400, detail="notional must be positive")
+    if not 0 <= levels <= 100:
+        raise HTTPException(status_code=400, detail="levels must be between 0 and 100")
+    src = source.lower()
+    all_sources = ["binance", "bybit", "bitget", "coinbase"]
+    if src != "all" and src not in all_sources:
+        raise HTTPException(status_code=400, detail="Unsupported source")
+    sources_order = [s for s in (all_sources if src == "all" else [src]) if s in _parsers]
+    results = await asyncio.gather(*[_order_book(s, symbol) for s in sources_order], return_exceptions=True)
 
-    return DiffSummary(
-        symbol=symbol,
-        prices=prices,
-        min_price=min_entry.price,
-        min_source=min_entry.source,
-        max_price=max_entry.price,
-        max_source=max_entry.source,
-        spread_abs=spread_abs,
-        spread_pct=spread_pct,
-        pairwise=pairwise,
-    )
+    books: List[Dict[str, Any]] = []
+    errors: Dict[str, str] = {}
+    for s, res in zip(sources_order, results):
+        if isinstance(res, Exception):
+            errors[s] = getattr(res, "detail", None) or str(res) or type(res).__name__
+            continue
+        book, live = res
+        books.append({**book.summary(notional, levels), "live": live})
+    if not books:
+        raise HTTPException(status_code=502, detail=errors or "No order book data")
+
+    filled = [b for b in books if b["buy"]["complete"]]
+    sellable = [b for b in books if b["sell"]["complete"]]
+    return {
+        "symbol": symbol,
+        "notional": notional,
+        "books": books,
+        "best_buy": min(filled, key=lambda b: b["buy"]["avg_price"])["source"] if filled else None,
+        "best_sell": max(sellable, key=lambda b: b["sell"]["avg_price"])["source"] if sellable else None,
+        "errors": errors,
+    }
+
+@app.websocket("/ws/prices")
+async def ws_prices(websocket: WebSocket):
+    """Push streamed price updates to the client.
+
+    Initial filter via ?symbols=BTC,ETH; later changes via
+    {"op": "subscribe" | "unsubscribe", "symbols": [...]} messages.
+    """
+    await websocket.accept()
+    initial = websocket.query_params.get("symbols")
+    symbols = None
+    if initial:
+        # Same filter as the subscribe op below
+        symbols = [s for s in (p.strip().upper() for p in initial.split(",")) if s in SUPPORTED_SYMBOLS]
+    sub = _price_book.subscribe(symbols)
+    for item in _price_book.snapshot(sub.symbols):
+        sub.offer(item)
+
+    async def reader() -> None:
+        while True:
+            msg = await websocket.receive_json()
+            op = msg.get("op")
+            wanted = {str(s).upper() for s in msg.get("symbols") or []} & set(SUPPORTED_SYMBOLS)
+            if op == "subscribe":
+                sub.symbols = (sub.symbols or set()) | wanted
+                for item in _price_book.snapshot(wanted):
+                    sub.offer(item)
+            elif op == "unsubscribe" and sub.symbols is not None:
+                sub.symbols -= wanted
+
+    async def writer() -> None:
+        while True:
+            await websocket.send_json(await sub.queue.get())
+
+    # Whichever side ends first (client disconnect or send failure) tears down the other
+    tasks = [asyncio.create_task(reader()), asyncio.create_task(writer())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        _price_book.unsubscribe(sub)
+
+@app.websocket("/ws/arbitrage")
+async def ws_arbitrage(websocket: WebSocket):
+    """Push the top opportunities whenever the ranking changes.
+
+    Optional ?k= and ?min_net_pct=. Bursts of changes are coalesced into at
+    most one message per ARBITRAGE_WS_INTERVAL_MS.
+    """
+    await websocket.accept()
+    k = websocket.query_params.get("k")
+    min_net = websocket.query_params.get("min_net_pct")
+    try:
+        k = int(k) if k else None
+        min_net = float(min_net) if min_net else None
+    except ValueError:
+        await websocket.close(code=1008)
+        return
+    # Same bounds as /api/arbitrage
+    if k is not None and not 1 <= k <= 100:
+        await websocket.close(code=1008)
+        return
+    changed = _arbitrage.listen()
+
+    async def reader() -> None:
+        # Only used to notice the client going away
+        while True:
+            await websocket.receive_text()
+
+    async def writer() -> None:
+        while True:
+            changed.clear()
+            await websocket.send_json({"version": _arbitrage.version, "opportunities": _arbitrage.opportunities(k, min_net)})
+            await asyncio.sleep(ARBITRAGE_WS_INTERVAL_MS / 1000.0)
+            await changed.wait()
+
+    tasks = [asyncio.create_task(reader()), asyncio.create_task(writer())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        _arbitrage.unlisten(changed)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,14 +1,27 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import create_engine, String, DateTime, Numeric
+from sqlalchemy import create_engine, event, inspect, String, DateTime, Numeric, BigInteger, Float
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
 
-from app.utils.config import DATABASE_URL
+from app.utils.config import DATABASE_URL, SQLITE_WAL
 
 engine = create_engine(DATABASE_URL, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+if engine.dialect.name == "sqlite" and SQLITE_WAL:
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record) -> None:
+        # WAL lets API reads proceed while the batch writer commits; NORMAL sync is durable in WAL mode
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA busy_timeout=5000")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute("PRAGMA cache_size=-65536")
+        cur.execute("PRAGMA mmap_size=268435456")
+        cur.close()
+
 class Base(DeclarativeBase):
     pass
 
@@ -24,7 +37,61 @@ class Price(Base):
     source: Mapped[str] = mapped_column(String(64))
 
 
+class Candle(Base):
+    """OHLCV bar; the composite primary key doubles as the (source, symbol, interval, ts) index."""
+
+    __tablename__ = "candles"
+
+    source: Mapped[str] = mapped_column(String(16), primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(16), primary_key=True)
+    interval: Mapped[str] = mapped_column(String(8), primary_key=True)
+    ts: Mapped[int] = mapped_column(BigInteger, primary_key=True)  # open time, ms since epoch
+    open: Mapped[float] = mapped_column(Float)
+    high: Mapped[float] = mapped_column(Float)
+    low: Mapped[float] = mapped_column(Float)
+    close: Mapped[float] = mapped_column(Float)
+    volume: Mapped[float] = mapped_column(Float)
+
+
+class CandleRollup(Base):
+    """Coarser bars aggregated locally from stored candles (same layout as ``candles``).
+
+    ``base`` is the interval of the candles they were built from: 1h bars
+    rolled up from 1m and from 5m candles are different series.
+    """
+
+    __tablename__ = "candle_rollups"
+
+    source: Mapped[str] = mapped_column(String(16), primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(16), primary_key=True)
+    base: Mapped[str] = mapped_column(String(8), primary_key=True)
+    interval: Mapped[str] = mapped_column(String(8), primary_key=True)
+    ts: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    open: Mapped[float] = mapped_column(Float)
+    high: Mapped[float] = mapped_column(Float)
+    low: Mapped[float] = mapped_column(Float)
+    close: Mapped[float] = mapped_column(Float)
+    volume: Mapped[float] = mapped_column(Float)
+
+
+class CandleCoverage(Base):
+    """Open-time ranges [start_ts, end_ts] already fetched from the exchange, including empty ones."""
+
+    __tablename__ = "candle_coverage"
+
+    source: Mapped[str] = mapped_column(String(16), primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(16), primary_key=True)
+    interval: Mapped[str] = mapped_column(String(8), primary_key=True)
+    start_ts: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    end_ts: Mapped[int] = mapped_column(BigInteger)
+
+
 def init_db() -> None:
+    # Rollups are derived data: a table from before they were keyed by base interval is dropped
+    # and rebuilt by CandleStore.backfill_rollups
+    insp = inspect(engine)
+    if insp.has_table("candle_rollups") and "base" not in {c["name"] for c in insp.get_columns("candle_rollups")}:
+        CandleRollup.__table__.drop(bind=engine)
     Base.metadata.create_all(bind=engine)
 
 
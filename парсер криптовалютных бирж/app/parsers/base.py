@@ -1,15 +1,166 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from app.utils.config import SUPPORTED_SYMBOLS
+from app.utils.metrics import UPSTREAM_ERRORS
+from app.utils.resilience import AdaptiveRateLimiter, CircuitBreaker
+from app.utils.symbols import SYMBOL_INDEX, Instrument
+
+T = TypeVar("T")
+
+# Common interval vocabulary -> bar length in milliseconds
+INTERVAL_MS = {
+    "1m": 60_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+}
+
+# (open time ms, open, high, low, close, volume)
+Candle = Tuple[int, float, float, float, float, float]
+
+
+def candle_to_dict(candle: Candle) -> Dict:
+    ts, o, h, l, c, v = candle
+    return {
+        "timestamp": datetime.fromtimestamp(ts / 1000, tz=timezone.utc).isoformat(),
+        "price": c,
+        "open": o,
+        "high": h,
+        "low": l,
+        "close": c,
+        "volume": v,
+    }
 
 class BaseParser(ABC):
     """Абстрактный базовый класс для парсеров"""
 
+    name = ""
+    symbol_map: Dict[str, Optional[str]] = {}
+    # Our interval name -> exchange interval parameter; missing keys are unsupported
+    kline_intervals: Dict[str, str] = {}
+    # Max candles per kline request and max kline requests in flight
+    kline_limit = 1000
+    history_concurrency = 4
+    # Set per instance by parsers that talk to a real exchange
+    breaker: Optional[CircuitBreaker] = None
+    limiter: Optional[AdaptiveRateLimiter] = None
+
+    async def guarded(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run an upstream call through this source's circuit breaker, if any; failures are counted by type."""
+        try:
+            if self.breaker is None:
+                return await fn()
+            return await self.breaker.call(fn)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            UPSTREAM_ERRORS.inc(self.name, type(e).__name__)
+            raise
+
     @abstractmethod
     async def get_current_price(self, symbol: str) -> Dict:
         pass
 
     @abstractmethod
-    async def get_historical_data(self, symbol: str, days: int) -> List[Dict]:
+    async def get_all_prices(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Prices for many symbols in one round-trip, keyed by symbol.
+
+        Symbols the exchange does not list are omitted from the result.
+        """
+        pass
+
+    @abstractmethod
+    async def get_order_book(self, symbol: str, limit: int = 100) -> Dict:
+        """L2 snapshot: {"bids": [[price, size], ...] best first, "asks": [...], "update_id": int | None}."""
+        pass
+
+    @abstractmethod
+    async def get_instruments(self) -> List[Instrument]:
+        """Every tradable pair the exchange lists, with price/quantity precision (symbol discovery)."""
         pass
 
+    @abstractmethod
+    async def _fetch_klines(self, pair: str, interval: str, start_ms: int, end_ms: int) -> List[Candle]:
+        """One page of candles with open time in [start_ms, end_ms], ascending."""
+        pass
+
+    def native_symbol(self, symbol: str) -> Optional[str]:
+        """Exchange pair for our symbol: the discovered index, or ``symbol_map`` until discovery ran."""
+        return SYMBOL_INDEX.native(self.name, symbol.upper(), self.symbol_map)
+
+    def _pair(self, symbol: str) -> str:
+        pair = self.native_symbol(symbol)
+        if not pair:
+            raise ValueError(f"Unsupported symbol for {self.name.capitalize()}")
+        return pair
+
+    async def iter_klines(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> AsyncIterator[Candle]:
+        """Candles for [start_ms, end_ms] in ascending order.
+
+        The range is split into pages of ``kline_limit`` bars; up to
+        ``history_concurrency`` pages are fetched ahead while earlier pages
+        are being consumed, so memory stays bounded by the prefetch window.
+        """
+        pair = self._pair(symbol)
+        step = INTERVAL_MS.get(interval)
+        if step is None or interval not in self.kline_intervals:
+            raise ValueError(f"Unsupported interval for {self.name.capitalize()}: {interval}")
+        start_ms -= start_ms % step
+        page_ms = step * self.kline_limit
+
+        def windows() -> Iterable[Tuple[int, int]]:
+            s = start_ms
+            while s <= end_ms:
+                e = min(s + page_ms - step, end_ms)
+                yield s, e
+                s = e + step
+
+        pages = windows()
+        pending: Deque[Tuple[int, int, asyncio.Task]] = deque()
+
+        def schedule() -> None:
+            while len(pending) < self.history_concurrency:
+                win = next(pages, None)
+                if win is None:
+                    return
+                task = asyncio.ensure_future(self._fetch_klines(pair, interval, win[0], win[1]))
+                pending.append((win[0], win[1], task))
+
+        try:
+            schedule()
+            while pending:
+                win_start, win_end, task = pending.popleft()
+                candles = await task
+                schedule()
+                for candle in candles:
+                    # Exchanges may return bars just outside the window; pages must not overlap
+                    if win_start <= candle[0] <= win_end:
+                        yield candle
+        finally:
+            for _, _, task in pending:
+                task.cancel()
+
+    async def get_historical_data(self, symbol: str, days: int, interval: str = "1h") -> AsyncIterator[Dict]:
+        """History points for the last ``days``, yielded page by page as they arrive."""
+        end_ms = int(time.time() * 1000)
+        start_ms = end_ms - int(days * INTERVAL_MS["1d"])
+        async for c in self.iter_klines(symbol, interval, start_ms, end_ms):
+            yield candle_to_dict(c)
 
+    def _native_pairs(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Native exchange pair -> our symbol for the requested (default: all supported) symbols."""
+        wanted = symbols if symbols is not None else SUPPORTED_SYMBOLS
+        pairs: Dict[str, str] = {}
+        for sym in wanted:
+            sym = sym.strip().upper()
+            native = SYMBOL_INDEX.native(self.name, sym, self.symbol_map)
+            if native:
+                pairs[native] = sym
+        return pairs
@@ -1,8 +1,13 @@
 import aiohttp
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
-from .base import BaseParser
+from .base import BaseParser, Candle
+from app.utils.config import API_URLS, BREAKER_FAILURES, BREAKER_RESET_SECONDS
+from app.utils.decoding import read_json
 from app.utils.http import create_aiohttp_session
+from app.utils.metrics import upstream_trace_config
+from app.utils.resilience import AdaptiveRateLimiter, CircuitBreaker
+from app.utils.symbols import Instrument, decimals
 
 SYMBOL_TO_BINANCE = {
     "BTC": "BTCUSDT",
@@ -17,18 +22,43 @@ SYMBOL_TO_BINANCE = {
     "MATIC": "MATICUSDT",
 }
 
+
+def _request_weight(url: str) -> float:
+    """Request weight of the Binance endpoints we call (GET /api/v3/...)."""
+    if "/api/v3/ticker/price" in url:
+        return 2 if "symbol=" in url else 4
+    if "/api/v3/exchangeInfo" in url:
+        return 20
+    if "/api/v3/depth" in url:
+        limit = int(url.split("limit=")[1].split("&")[0]) if "limit=" in url else 100
+        return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    return 2
+
+
 class BinanceParser(BaseParser):
     """Парсер для Binance API"""
 
+    name = "binance"
+    symbol_map = SYMBOL_TO_BINANCE
+    kline_intervals = {"1m": "1m", "5m": "5m", "15m": "15m", "1h": "1h", "4h": "4h", "1d": "1d"}
+    kline_limit = 1000
+    history_concurrency = 8
+
     def __init__(self, api_key: Optional[str] = None):
-        self.base_url = "https://api.binance.com"
+        self.base_url = API_URLS["binance"] or "https://api.binance.com"
         self.api_key = api_key
         self._headers = {"X-MBX-APIKEY": api_key} if api_key else {}
         self._session: Optional[aiohttp.ClientSession] = None
+        self.limiter = AdaptiveRateLimiter(
+            rate=6000 / 60, capacity=6000, used_header="X-MBX-USED-WEIGHT-1M", cost=_request_weight
+        )
+        self.breaker = CircuitBreaker(self.name, BREAKER_FAILURES, BREAKER_RESET_SECONDS)
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = create_aiohttp_session(headers=self._headers, verify=True)
+            self._session = create_aiohttp_session(
+                headers=self._headers, verify=True, trace_configs=[self.limiter.trace_config(), upstream_trace_config(self.name)]
+            )
         return self._session
 
     async def close(self) -> None:
@@ -36,18 +66,70 @@ class BinanceParser(BaseParser):
             await self._session.close()
 
     async def get_current_price(self, symbol: str) -> Dict:
-        pair = SYMBOL_TO_BINANCE.get(symbol.upper())
+        pair = self.native_symbol(symbol)
         if not pair:
             raise ValueError("Unsupported symbol for Binance")
         session = await self._get_session()
         url = f"{self.base_url}/api/v3/ticker/price?symbol={pair}"
         async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
             resp.raise_for_status()
-            data = await resp.json()
+            data = await read_json(resp)
             return {"symbol": symbol.upper(), "price": float(data["price"]), "source": "binance", "currency": "USDT"}
 
-    async def get_historical_data(self, symbol: str, days: int) -> List[Dict]:
-        # Placeholder: use klines endpoint in future
-        return []
+    async def get_all_prices(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        pairs = self._native_pairs(symbols)
+        if not pairs:
+            return {}
+        session = await self._get_session()
+        # Full list instead of ?symbols=[...]: one delisted pair would fail the whole batch
+        url = f"{self.base_url}/api/v3/ticker/price"
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp, "binance_tickers")
+        result: Dict[str, Dict] = {}
+        for item in data:
+            sym = pairs.get(item.get("symbol"))
+            if sym is not None:
+                result[sym] = {"symbol": sym, "price": float(item["price"]), "source": "binance", "currency": "USDT"}
+        return result
+
+    async def get_instruments(self) -> List[Instrument]:
+        session = await self._get_session()
+        url = f"{self.base_url}/api/v3/exchangeInfo"
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp)
+        instruments: List[Instrument] = []
+        for item in data.get("symbols") or []:
+            if item.get("status") != "TRADING":
+                continue
+            filters = {f.get("filterType"): f for f in item.get("filters") or []}
+            instruments.append(Instrument(
+                self.name, item["baseAsset"], item["quoteAsset"], item["symbol"],
+                decimals((filters.get("PRICE_FILTER") or {}).get("tickSize", "0.00000001")),
+                decimals((filters.get("LOT_SIZE") or {}).get("stepSize", "0.00000001")),
+            ))
+        return instruments
+
+    async def get_order_book(self, symbol: str, limit: int = 100) -> Dict:
+        pair = self._pair(symbol)
+        session = await self._get_session()
+        url = f"{self.base_url}/api/v3/depth?symbol={pair}&limit={min(limit, 5000)}"
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp)
+        return {"bids": data["bids"], "asks": data["asks"], "update_id": int(data["lastUpdateId"])}
+
+    async def _fetch_klines(self, pair: str, interval: str, start_ms: int, end_ms: int) -> List[Candle]:
+        session = await self._get_session()
+        url = (
+            f"{self.base_url}/api/v3/klines?symbol={pair}&interval={self.kline_intervals[interval]}"
+            f"&startTime={start_ms}&endTime={end_ms}&limit={self.kline_limit}"
+        )
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp)
+        # [openTime, open, high, low, close, volume, closeTime, ...], ascending
+        return [(int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])) for k in data]
 
 
@@ -1,8 +1,15 @@
 import aiohttp
-from typing import Dict, List, Optional
+import os
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
 
-from .base import BaseParser
+from .base import BaseParser, Candle
+from .routing import EndpointSelector
+from app.utils.config import API_URLS, BREAKER_FAILURES, BREAKER_RESET_SECONDS, ROUTE_RACE_STAGGER_MS, ROUTES_DIR
+from app.utils.decoding import read_json
 from app.utils.http import create_aiohttp_session
+from app.utils.metrics import upstream_trace_config
+from app.utils.resilience import AdaptiveRateLimiter, CircuitBreaker
+from app.utils.symbols import Instrument
 
 SYMBOL_TO_BITGET = {
     "BTC": "BTCUSDT",
@@ -17,138 +24,194 @@ SYMBOL_TO_BITGET = {
     "MATIC": "MATICUSDT",
 }
 
+def _extract_price(item: Dict) -> Optional[float]:
+    candidates = [
+        item.get("lastPr"), item.get("close"), item.get("last"), item.get("markPr"), item.get("markPrice"),
+        item.get("bidPr"), item.get("askPr"), item.get("bestBid"), item.get("bestAsk"),
+        item.get("buyOne"), item.get("sellOne"), item.get("bid1Price"), item.get("ask1Price"),
+    ]
+    # If we have both bid and ask variants, prefer mid
+    bid = None
+    ask = None
+    for k in ("bidPr", "bestBid", "buyOne", "bid1Price"):
+        if item.get(k) is not None:
+            try:
+                bid = float(item.get(k))
+                break
+            except Exception:
+                pass
+    for k in ("askPr", "bestAsk", "sellOne", "ask1Price"):
+        if item.get(k) is not None:
+            try:
+                ask = float(item.get(k))
+                break
+            except Exception:
+                pass
+    for c in candidates:
+        if c is not None:
+            try:
+                return float(c)
+            except Exception:
+                continue
+    if bid is not None and ask is not None:
+        return (bid + ask) / 2.0
+    return None
+
 class BitgetParser(BaseParser):
     """Parser for Bitget ticker price (spot)"""
 
+    name = "bitget"
+    symbol_map = SYMBOL_TO_BITGET
+    kline_intervals = {"1m": "1min", "5m": "5min", "15m": "15min", "1h": "1h", "4h": "4h", "1d": "1day"}
+    kline_limit = 1000
+    history_concurrency = 5
+
     def __init__(self, api_key: Optional[str] = None):
-        self.base_url = "https://api.bitget.com"
+        self.base_url = API_URLS["bitget"] or "https://api.bitget.com"
         self.api_key = api_key
         self._headers = {"ACCESS-KEY": api_key} if api_key else {}
         self._session: Optional[aiohttp.ClientSession] = None
+        # Public market endpoints: 20 requests per second per IP
+        self.limiter = AdaptiveRateLimiter(rate=20, capacity=20)
+        self.breaker = CircuitBreaker(self.name, BREAKER_FAILURES, BREAKER_RESET_SECONDS)
+        self.routes = EndpointSelector(os.path.join(ROUTES_DIR, "bitget.json"), ROUTE_RACE_STAGGER_MS / 1000)
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = create_aiohttp_session(headers=self._headers, verify=True)
+            self._session = create_aiohttp_session(
+                headers=self._headers, verify=True, trace_configs=[self.limiter.trace_config(), upstream_trace_config(self.name)]
+            )
         return self._session
 
     async def close(self) -> None:
         if self._session and not self._session.closed:
             await self._session.close()
 
+    async def _get_data(self, url: str, schema: Optional[str] = None, strict: bool = False):
+        """Decoded ``data`` field; 400/404 mean "try another variant" unless ``strict``.
+
+        Rate limits and server errors always raise ClientResponseError.
+        """
+        session = await self._get_session()
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            if not strict and resp.status in (400, 404):
+                raise ValueError(f"Bitget HTTP {resp.status}")
+            resp.raise_for_status()
+            data = await read_json(resp, schema)
+        return data.get("data")
+
+    @staticmethod
+    def _price_of(item) -> float:
+        price_val = _extract_price(item or {})
+        if price_val is None:
+            raise ValueError("Unexpected Bitget response")
+        return price_val
+
+    @classmethod
+    def _find_in_list(cls, items, pair: str, inst: str) -> float:
+        for it in items or []:
+            sym_field = (it.get("symbol") or it.get("instId") or "").upper()
+            # v2 lists BTCUSDT, v1 BTCUSDT_SPBL; exact match only (BTCUSDT must not hit BTCUSDT_UMCBL or 1000BTCUSDT)
+            if sym_field in (pair, inst):
+                price_val = _extract_price(it)
+                if price_val is not None:
+                    return price_val
+        raise ValueError("Unexpected Bitget response")
+
+    def _price_variants(self, pair: str) -> Dict[str, Callable[[], Awaitable[float]]]:
+        """Known ticker endpoints, in order of preference (symbol format: {PAIR}_SPBL)."""
+        inst = f"{pair}_SPBL"
+        base = self.base_url
+
+        async def v2_ticker() -> float:
+            return self._price_of(await self._get_data(f"{base}/api/v2/spot/market/ticker?symbol={inst}"))
+
+        async def v2_tickers_symbol() -> float:
+            items = await self._get_data(f"{base}/api/v2/spot/market/tickers?symbol={inst}")
+            return self._price_of(items[0] if items else None)
+
+        async def v2_list() -> float:
+            # Full list by productType avoids a 400 on an unknown symbol
+            url = f"{base}/api/v2/spot/market/tickers?productType=spbl"
+            return self._find_in_list(await self._get_data(url, "bitget_tickers"), pair, inst)
+
+        async def v1_list() -> float:
+            url = f"{base}/api/spot/v1/market/tickers"
+            return self._find_in_list(await self._get_data(url, "bitget_tickers", strict=True), pair, inst)
+
+        def v1_ticker(sym: str) -> Callable[[], Awaitable[float]]:
+            async def fetch() -> float:
+                item = await self._get_data(f"{base}/api/spot/v1/market/ticker?symbol={sym}")
+                if isinstance(item, list):
+                    item = item[0] if item else None
+                return self._price_of(item)
+            return fetch
+
+        return {
+            "v2_ticker": v2_ticker,
+            "v2_tickers_symbol": v2_tickers_symbol,
+            "v2_list": v2_list,
+            "v1_list": v1_list,
+            "v1_ticker_inst": v1_ticker(inst),
+            "v1_ticker_pair": v1_ticker(pair),
+        }
+
     async def get_current_price(self, symbol: str) -> Dict:
-        pair = SYMBOL_TO_BITGET.get(symbol.upper())
+        pair = self.native_symbol(symbol)
         if not pair:
             raise ValueError("Unsupported symbol for Bitget")
+        _, price_val = await self.routes.call(symbol.upper(), self._price_variants(pair), "Unexpected Bitget response")
+        return {"symbol": symbol.upper(), "price": price_val, "source": "bitget", "currency": "USDT"}
+
+    async def get_all_prices(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        pairs = self._native_pairs(symbols)
+        # v1 list reports spot pairs with the product suffix
+        pairs.update({f"{native}_SPBL": sym for native, sym in list(pairs.items())})
         session = await self._get_session()
         timeout = aiohttp.ClientTimeout(total=10)
-        def _extract_price(item: Dict) -> Optional[float]:
-            candidates = [
-                item.get("lastPr"), item.get("close"), item.get("last"), item.get("markPr"), item.get("markPrice"),
-                item.get("bidPr"), item.get("askPr"), item.get("bestBid"), item.get("bestAsk"),
-                item.get("buyOne"), item.get("sellOne"), item.get("bid1Price"), item.get("ask1Price"),
-            ]
-            # If we have both bid and ask variants, prefer mid
-            bid = None
-            ask = None
-            for k in ("bidPr", "bestBid", "buyOne", "bid1Price"):
-                if item.get(k) is not None:
-                    try:
-                        bid = float(item.get(k))
-                        break
-                    except Exception:
-                        pass
-            for k in ("askPr", "bestAsk", "sellOne", "ask1Price"):
-                if item.get(k) is not None:
-                    try:
-                        ask = float(item.get(k))
-                        break
-                    except Exception:
-                        pass
-            for c in candidates:
-                if c is not None:
-                    try:
-                        return float(c)
-                    except Exception:
-                        continue
-            if bid is not None and ask is not None:
-                return (bid + ask) / 2.0
-            return None
-
-        # Try Bitget v2 single-ticker (singular) with explicit product suffix (symbol format: {PAIR}_SPBL)
-        inst = f"{pair}_SPBL"
-        url_v2_ticker_single = f"{self.base_url}/api/v2/spot/market/ticker?symbol={inst}"
-        async with session.get(url_v2_ticker_single, timeout=timeout) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                item = (data.get("data") or {})
-                if isinstance(item, dict) and item:
-                    price_val = _extract_price(item)
-                    if price_val is not None:
-                        return {"symbol": symbol.upper(), "price": price_val, "source": "bitget", "currency": "USDT"}
-        # Try Bitget v2 multi (tickers) with symbol inst id
-        url_v2_single_as_list = f"{self.base_url}/api/v2/spot/market/tickers?symbol={inst}"
-        async with session.get(url_v2_single_as_list, timeout=timeout) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                items = data.get("data") or []
-                if items:
-                    price_val = _extract_price(items[0])
-                    if price_val is not None:
-                        return {"symbol": symbol.upper(), "price": price_val, "source": "bitget", "currency": "USDT"}
-        # Bitget v2 spot ticker endpoint: fetch list by productType to avoid 400 on unknown symbol
-        url_v2_list = f"{self.base_url}/api/v2/spot/market/tickers?productType=spbl"
-        async with session.get(url_v2_list, timeout=timeout) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                items = data.get("data") or []
-                for it in items:
-                    sym_field = (it.get("symbol") or it.get("instId") or "").upper()
-                    if sym_field == pair or sym_field == inst:
-                        price_val = _extract_price(it)
-                        if price_val is not None:
-                            return {"symbol": symbol.upper(), "price": price_val, "source": "bitget", "currency": "USDT"}
-                    # Some responses include dash or different casing
-                    if pair in sym_field or inst in sym_field:
-                        price_val = _extract_price(it)
-                        if price_val is not None:
-                            return {"symbol": symbol.upper(), "price": price_val, "source": "bitget", "currency": "USDT"}
-        # Fallback to v1 list endpoint, then filter
-        url_v1_list = f"{self.base_url}/api/spot/v1/market/tickers"
-        async with session.get(url_v1_list, timeout=timeout) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            dat = data.get("data") or []
-            # v1 returns list of tickers with 'symbol' and 'last'
-            for it in dat:
-                sym_field = (it.get("symbol") or it.get("instId") or "").upper()
-                if sym_field == pair or sym_field == inst or pair in sym_field or inst in sym_field:
-                    price_val = _extract_price(it)
-                    if price_val is None:
-                        # v1 common fields
-                        last = it.get("last") or it.get("close")
-                        if last is not None:
-                            price_val = float(last)
-                    if price_val is not None:
-                        return {"symbol": symbol.upper(), "price": price_val, "source": "bitget", "currency": "USDT"}
-        # Final attempts: v1 single ticker with inst and with pair
-        for sym in (inst, pair):
-            url_v1_single = f"{self.base_url}/api/spot/v1/market/ticker?symbol={sym}"
-            async with session.get(url_v1_single, timeout=timeout) as resp:
+        result: Dict[str, Dict] = {}
+        for url in (f"{self.base_url}/api/v2/spot/market/tickers", f"{self.base_url}/api/spot/v1/market/tickers"):
+            async with session.get(url, timeout=timeout) as resp:
                 if resp.status != 200:
                     continue
-                data = await resp.json()
-                item = data.get("data")
-                if isinstance(item, list):
-                    item = item[0] if item else {}
-                item = item or {}
-                price_val = _extract_price(item)
-                if price_val is None:
-                    last = item.get("last") or item.get("close")
-                    if last is not None:
-                        price_val = float(last)
+                data = await read_json(resp, "bitget_tickers")
+            for it in data.get("data") or []:
+                sym = pairs.get((it.get("symbol") or it.get("instId") or "").upper())
+                if sym is None or sym in result:
+                    continue
+                price_val = _extract_price(it)
                 if price_val is not None:
-                    return {"symbol": symbol.upper(), "price": price_val, "source": "bitget", "currency": "USDT"}
-        raise ValueError("Unexpected Bitget response")
+                    result[sym] = {"symbol": sym, "price": price_val, "source": "bitget", "currency": "USDT"}
+            if result:
+                break
+        return result
+
+    async def get_instruments(self) -> List[Instrument]:
+        data = await self._get_data(f"{self.base_url}/api/v2/spot/public/symbols", strict=True) or []
+        # Bitget reports precision as a number of decimals, not as a tick size
+        return [
+            Instrument(self.name, it["baseCoin"], it["quoteCoin"], it["symbol"],
+                       int(it.get("pricePrecision") or 8), int(it.get("quantityPrecision") or 8))
+            for it in data
+            if it.get("status") == "online"
+        ]
+
+    async def get_order_book(self, symbol: str, limit: int = 100) -> Dict:
+        pair = self._pair(symbol)
+        url = f"{self.base_url}/api/v2/spot/market/orderbook?symbol={pair}&type=step0&limit={min(limit, 150)}"
+        data = await self._get_data(url, strict=True) or {}
+        return {"bids": data.get("bids") or [], "asks": data.get("asks") or [], "update_id": None}
+
+    async def _fetch_klines(self, pair: str, interval: str, start_ms: int, end_ms: int) -> List[Candle]:
+        session = await self._get_session()
+        url = (
+            f"{self.base_url}/api/v2/spot/market/candles?symbol={pair}&granularity={self.kline_intervals[interval]}"
+            f"&startTime={start_ms}&endTime={end_ms}&limit={self.kline_limit}"
+        )
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp)
+        # [ts, open, high, low, close, baseVolume, usdtVolume, quoteVolume], ascending
+        rows = data.get("data") or []
+        return sorted((int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])) for k in rows)
 
-    async def get_historical_data(self, symbol: str, days: int) -> List[Dict]:
-        return []
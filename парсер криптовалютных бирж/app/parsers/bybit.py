@@ -1,8 +1,15 @@
 import aiohttp
-from typing import Dict, List, Optional
+import os
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
 
-from .base import BaseParser
+from .base import BaseParser, Candle
+from .routing import EndpointSelector
+from app.utils.config import API_URLS, BREAKER_FAILURES, BREAKER_RESET_SECONDS, ROUTE_RACE_STAGGER_MS, ROUTES_DIR
+from app.utils.decoding import read_json
 from app.utils.http import create_aiohttp_session
+from app.utils.metrics import upstream_trace_config
+from app.utils.resilience import AdaptiveRateLimiter, CircuitBreaker
+from app.utils.symbols import Instrument, decimals
 
 SYMBOL_TO_BYBIT = {
     "BTC": "BTCUSDT",
@@ -17,68 +24,160 @@ SYMBOL_TO_BYBIT = {
     "MATIC": "MATICUSDT",
 }
 
+def _ticker_price(item: Dict) -> Optional[float]:
+    """lastPrice, then markPrice, then mid of bid/ask."""
+    price_str = item.get("lastPrice") or item.get("markPrice")
+    if price_str is not None:
+        return float(price_str)
+    bid = item.get("bid1Price") or item.get("bestBidPrice")
+    ask = item.get("ask1Price") or item.get("bestAskPrice")
+    if bid is not None and ask is not None:
+        try:
+            return (float(bid) + float(ask)) / 2.0
+        except Exception:  # noqa: BLE001
+            return None
+    return None
+
 class BybitParser(BaseParser):
     """Parser for Bybit Market API v5 (linear category for USDT perpetual / spot fallback)"""
 
+    name = "bybit"
+    symbol_map = SYMBOL_TO_BYBIT
+    kline_intervals = {"1m": "1", "5m": "5", "15m": "15", "1h": "60", "4h": "240", "1d": "D"}
+    kline_limit = 1000
+    history_concurrency = 5
+
     def __init__(self, api_key: Optional[str] = None):
-        self.base_url = "https://api.bybit.com"
+        self.base_url = API_URLS["bybit"] or "https://api.bybit.com"
         self.api_key = api_key
         self._headers = {"X-BAPI-API-KEY": api_key} if api_key else {}
         self._session: Optional[aiohttp.ClientSession] = None
+        # Public market endpoints: 600 requests per 5 s per IP
+        self.limiter = AdaptiveRateLimiter(
+            rate=120, capacity=600, remaining_header="X-Bapi-Limit-Status",
+            reset_header="X-Bapi-Limit-Reset-Timestamp",
+        )
+        self.breaker = CircuitBreaker(self.name, BREAKER_FAILURES, BREAKER_RESET_SECONDS)
+        self.routes = EndpointSelector(os.path.join(ROUTES_DIR, "bybit.json"), ROUTE_RACE_STAGGER_MS / 1000)
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = create_aiohttp_session(headers=self._headers, verify=True)
+            self._session = create_aiohttp_session(
+                headers=self._headers, verify=True, trace_configs=[self.limiter.trace_config(), upstream_trace_config(self.name)]
+            )
         return self._session
 
     async def close(self) -> None:
         if self._session and not self._session.closed:
             await self._session.close()
 
+    def _price_variants(self, pair: str) -> Dict[str, Callable[[], Awaitable[float]]]:
+        """linear (USDT contracts) first, then spot."""
+
+        def ticker(category: str, strict: bool) -> Callable[[], Awaitable[float]]:
+            async def fetch() -> float:
+                session = await self._get_session()
+                url = f"{self.base_url}/v5/market/tickers?category={category}&symbol={pair}"
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                    # Only "no such symbol here" moves on to the next category; 429/5xx are real failures
+                    if not strict and resp.status in (400, 404):
+                        raise ValueError(f"Bybit HTTP {resp.status}")
+                    resp.raise_for_status()
+                    data = await read_json(resp)
+                lst = data.get("result", {}).get("list") or []
+                price_val = _ticker_price(lst[0]) if lst else None
+                if price_val is None:
+                    raise ValueError("Unexpected Bybit response")
+                return price_val
+            return fetch
+
+        return {"linear": ticker("linear", False), "spot": ticker("spot", True)}
+
     async def get_current_price(self, symbol: str) -> Dict:
-        pair = SYMBOL_TO_BYBIT.get(symbol.upper())
+        pair = self.native_symbol(symbol)
         if not pair:
             raise ValueError("Unsupported symbol for Bybit")
+        _, price_val = await self.routes.call(symbol.upper(), self._price_variants(pair), "Unexpected Bybit response")
+        return {"symbol": symbol.upper(), "price": price_val, "source": "bybit", "currency": "USDT"}
+
+    async def get_all_prices(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        pairs = self._native_pairs(symbols)
         session = await self._get_session()
-        # Try linear category first (USDT contracts); if fails, try spot
-        url_linear = f"{self.base_url}/v5/market/tickers?category=linear&symbol={pair}"
         timeout = aiohttp.ClientTimeout(total=10)
-        async with session.get(url_linear, timeout=timeout) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                lst = data.get("result", {}).get("list") or []
-                if lst:
-                    item = lst[0]
-                    # Prefer lastPrice, then markPrice, then mid of bid/ask
-                    price_str = item.get("lastPrice") or item.get("markPrice")
-                    if price_str is None:
-                        bid = item.get("bid1Price") or item.get("bestBidPrice")
-                        ask = item.get("ask1Price") or item.get("bestAskPrice")
-                        if bid is not None and ask is not None:
-                            try:
-                                price_val = (float(bid) + float(ask)) / 2.0
-                                return {"symbol": symbol.upper(), "price": price_val, "source": "bybit", "currency": "USDT"}
-                            except Exception:  # noqa: BLE001
-                                price_str = None
-                    if price_str is not None:
-                        return {"symbol": symbol.upper(), "price": float(price_str), "source": "bybit", "currency": "USDT"}
-        # Spot fallback
-        url_spot = f"{self.base_url}/v5/market/tickers?category=spot&symbol={pair}"
-        async with session.get(url_spot, timeout=timeout) as resp:
+        result: Dict[str, Dict] = {}
+        # Linear list first; only hit the spot list for symbols still missing
+        for category in ("linear", "spot"):
+            if len(result) == len(pairs):
+                break
+            url = f"{self.base_url}/v5/market/tickers?category={category}"
+            async with session.get(url, timeout=timeout) as resp:
+                if resp.status != 200:
+                    continue
+                data = await read_json(resp, "bybit_tickers")
+            for item in data.get("result", {}).get("list") or []:
+                sym = pairs.get(item.get("symbol"))
+                if sym is None or sym in result:
+                    continue
+                price_val = _ticker_price(item)
+                if price_val is not None:
+                    result[sym] = {"symbol": sym, "price": price_val, "source": "bybit", "currency": "USDT"}
+        return result
+
+    async def get_instruments(self) -> List[Instrument]:
+        """linear and spot lists (1000 per page); a pair listed in both keeps its linear precision."""
+        session = await self._get_session()
+        timeout = aiohttp.ClientTimeout(total=30)
+        instruments: Dict[str, Instrument] = {}
+        for category in ("linear", "spot"):
+            cursor = ""
+            while True:
+                url = f"{self.base_url}/v5/market/instruments-info?category={category}&limit=1000"
+                if cursor:
+                    url += f"&cursor={cursor}"
+                async with session.get(url, timeout=timeout) as resp:
+                    resp.raise_for_status()
+                    data = await read_json(resp)
+                if data.get("retCode", 0) != 0:
+                    raise ValueError(f"Bybit instruments error: {data.get('retMsg')}")
+                result = data.get("result") or {}
+                for item in result.get("list") or []:
+                    if item.get("status") != "Trading" or item.get("symbol") in instruments:
+                        continue
+                    lot = item.get("lotSizeFilter") or {}
+                    instruments[item["symbol"]] = Instrument(
+                        self.name, item["baseCoin"], item["quoteCoin"], item["symbol"],
+                        decimals((item.get("priceFilter") or {}).get("tickSize", "0.00000001")),
+                        decimals(lot.get("qtyStep") or lot.get("basePrecision") or "0.00000001"),
+                    )
+                cursor = result.get("nextPageCursor") or ""
+                if not cursor:
+                    break
+        return list(instruments.values())
+
+    async def get_order_book(self, symbol: str, limit: int = 100) -> Dict:
+        pair = self._pair(symbol)
+        session = await self._get_session()
+        # Same category as the depth stream (linear)
+        url = f"{self.base_url}/v5/market/orderbook?category=linear&symbol={pair}&limit={min(limit, 500)}"
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp)
+        if data.get("retCode", 0) != 0:
+            raise ValueError(f"Bybit orderbook error: {data.get('retMsg')}")
+        result = data.get("result") or {}
+        return {"bids": result.get("b") or [], "asks": result.get("a") or [], "update_id": result.get("u")}
+
+    async def _fetch_klines(self, pair: str, interval: str, start_ms: int, end_ms: int) -> List[Candle]:
+        session = await self._get_session()
+        url = (
+            f"{self.base_url}/v5/market/kline?category=linear&symbol={pair}&interval={self.kline_intervals[interval]}"
+            f"&start={start_ms}&end={end_ms}&limit={self.kline_limit}"
+        )
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
             resp.raise_for_status()
-            data = await resp.json()
-            lst = data.get("result", {}).get("list") or []
-            if not lst:
-                raise ValueError("Unexpected Bybit response")
-            item = lst[0]
-            price_str = item.get("lastPrice") or item.get("markPrice")
-            if price_str is None:
-                bid = item.get("bid1Price") or item.get("bestBidPrice")
-                ask = item.get("ask1Price") or item.get("bestAskPrice")
-                if bid is not None and ask is not None:
-                    return {"symbol": symbol.upper(), "price": (float(bid) + float(ask)) / 2.0, "source": "bybit", "currency": "USDT"}
-                raise ValueError("Unexpected Bybit response")
-            return {"symbol": symbol.upper(), "price": float(price_str), "source": "bybit", "currency": "USDT"}
-
-    async def get_historical_data(self, symbol: str, days: int) -> List[Dict]:
-        return []
+            data = await read_json(resp)
+        if data.get("retCode", 0) != 0:
+            raise ValueError(f"Bybit kline error: {data.get('retMsg')}")
+        # [startTime, open, high, low, close, volume, turnover], newest first
+        rows = data.get("result", {}).get("list") or []
+        return [(int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])) for k in reversed(rows)]
@@ -1,8 +1,14 @@
 import aiohttp
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
 
-from .base import BaseParser
+from .base import BaseParser, Candle
+from app.utils.config import API_URLS, BREAKER_FAILURES, BREAKER_RESET_SECONDS
+from app.utils.decoding import read_json
 from app.utils.http import create_aiohttp_session
+from app.utils.metrics import upstream_trace_config
+from app.utils.resilience import AdaptiveRateLimiter, CircuitBreaker
+from app.utils.symbols import Instrument, decimals
 
 SYMBOL_TO_COINBASE = {
     "BTC": "BTC-USD",
@@ -20,15 +26,29 @@ SYMBOL_TO_COINBASE = {
 class CoinbaseParser(BaseParser):
     """Parser for Coinbase Advanced Trade/Public price"""
 
+    name = "coinbase"
+    symbol_map = SYMBOL_TO_COINBASE
+    # Coinbase Exchange has no 4h granularity
+    kline_intervals = {"1m": "60", "5m": "300", "15m": "900", "1h": "3600", "1d": "86400"}
+    kline_limit = 300
+    history_concurrency = 4
+
     def __init__(self, api_key: Optional[str] = None):
-        self.base_url = "https://api.coinbase.com"
+        self.base_url = API_URLS["coinbase"] or "https://api.coinbase.com"
+        # Candles live on the Exchange API, not on the retail v2 API
+        self.exchange_url = API_URLS["coinbase_exchange"] or "https://api.exchange.coinbase.com"
         self.api_key = api_key
         self._headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
         self._session: Optional[aiohttp.ClientSession] = None
+        # Public endpoints: 10 requests per second per IP
+        self.limiter = AdaptiveRateLimiter(rate=10, capacity=10)
+        self.breaker = CircuitBreaker(self.name, BREAKER_FAILURES, BREAKER_RESET_SECONDS)
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = create_aiohttp_session(headers=self._headers, verify=True)
+            self._session = create_aiohttp_session(
+                headers=self._headers, verify=True, trace_configs=[self.limiter.trace_config(), upstream_trace_config(self.name)]
+            )
         return self._session
 
     async def close(self) -> None:
@@ -36,7 +56,7 @@ class CoinbaseParser(BaseParser):
             await self._session.close()
 
     async def get_current_price(self, symbol: str) -> Dict:
-        product = SYMBOL_TO_COINBASE.get(symbol.upper())
+        product = self.native_symbol(symbol)
         if not product:
             raise ValueError("Unsupported symbol for Coinbase")
         session = await self._get_session()
@@ -44,11 +64,70 @@ class CoinbaseParser(BaseParser):
         url = f"{self.base_url}/v2/prices/{product}/spot"
         async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
             resp.raise_for_status()
-            data = await resp.json()
+            data = await read_json(resp)
             amount = data.get("data", {}).get("amount")
             if amount is None:
                 raise ValueError("Unexpected Coinbase response")
             return {"symbol": symbol.upper(), "price": float(amount), "source": "coinbase", "currency": "USD"}
 
-    async def get_historical_data(self, symbol: str, days: int) -> List[Dict]:
-        return []
+    async def get_all_prices(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        pairs = self._native_pairs(symbols)
+        if not pairs:
+            return {}
+        session = await self._get_session()
+        # exchange-rates returns every currency quoted against USD in one response (1 USD = rate units)
+        url = f"{self.base_url}/v2/exchange-rates?currency=USD"
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp)
+        rates = data.get("data", {}).get("rates") or {}
+        result: Dict[str, Dict] = {}
+        for product, sym in pairs.items():
+            rate = rates.get(product.split("-")[0])
+            try:
+                rate_val = float(rate) if rate is not None else 0.0
+            except ValueError:
+                continue
+            if rate_val > 0:
+                result[sym] = {"symbol": sym, "price": 1.0 / rate_val, "source": "coinbase", "currency": "USD"}
+        return result
+
+    async def get_instruments(self) -> List[Instrument]:
+        session = await self._get_session()
+        # The product list (with increments) lives on the Exchange API, like candles
+        url = f"{self.exchange_url}/products"
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp)
+        return [
+            Instrument(self.name, it["base_currency"], it["quote_currency"], it["id"],
+                       decimals(it.get("quote_increment") or "0.01"), decimals(it.get("base_increment") or "0.00000001"))
+            for it in data or []
+            if it.get("status") == "online" and not it.get("trading_disabled")
+        ]
+
+    async def get_order_book(self, symbol: str, limit: int = 100) -> Dict:
+        product = self._pair(symbol)
+        session = await self._get_session()
+        # level=2 is the aggregated book; entries are [price, size, num_orders]
+        url = f"{self.exchange_url}/products/{product}/book?level=2"
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp)
+        return {
+            "bids": [lv[:2] for lv in data.get("bids") or []][:limit],
+            "asks": [lv[:2] for lv in data.get("asks") or []][:limit],
+            "update_id": data.get("sequence"),
+        }
+
+    async def _fetch_klines(self, pair: str, interval: str, start_ms: int, end_ms: int) -> List[Candle]:
+        session = await self._get_session()
+        start = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc).isoformat()
+        end = datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc).isoformat()
+        url = f"{self.exchange_url}/products/{pair}/candles"
+        params = {"granularity": self.kline_intervals[interval], "start": start, "end": end}
+        async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            resp.raise_for_status()
+            data = await read_json(resp)
+        # [time (s), low, high, open, close, volume], newest first
+        return [(int(k[0]) * 1000, float(k[3]), float(k[2]), float(k[1]), float(k[4]), float(k[5])) for k in reversed(data)]
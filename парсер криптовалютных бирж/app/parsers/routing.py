@@ -0,0 +1,81 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.utils.hedge import HedgedCallError, hedged_call
+
+logger = logging.getLogger(__name__)
+
+# Returns the price, raises ValueError when the variant has no usable data for the symbol
+Variant = Callable[[], Awaitable[float]]
+
+
+class EndpointSelector:
+    """Remembers, per symbol, which endpoint variant last returned a price.
+
+    The learned variant is tried alone first. If it fails (or nothing is
+    learned yet) the remaining variants are raced in their declared order,
+    each started ``stagger`` seconds after the previous one or as soon as
+    it fails, and the winner is remembered. Routes are persisted as JSON in
+    ``path`` so they survive restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None, stagger: float = 0.1):
+        self.path = path
+        self.stagger = stagger
+        self._routes: Dict[str, str] = self._load()
+        self.hits = 0
+        self.misses = 0
+        self._save_lock = asyncio.Lock()
+
+    def _load(self) -> Dict[str, str]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable route file %s", self.path)
+            return {}
+        return {str(k): str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+
+    def _save(self, routes: Dict[str, str]) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(routes, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    async def call(self, key: str, variants: Dict[str, Variant], error: str) -> Tuple[str, float]:
+        """(variant name, price) for ``key``; ValueError(error) when no variant knows the symbol."""
+        errors: Dict[str, BaseException] = {}
+        learned = self._routes.get(key)
+        if learned in variants:
+            try:
+                price = await variants[learned]()
+                self.hits += 1
+                return learned, price
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # noqa: BLE001
+                errors[learned] = e
+        self.misses += 1
+        rest = [name for name in variants if name != learned]
+        try:
+            name, price = await hedged_call(rest, lambda n: variants[n](), lambda _n: self.stagger)
+        except HedgedCallError as e:
+            errors.update(e.errors)
+            if all(isinstance(err, ValueError) for err in errors.values()):
+                raise ValueError(error) from e
+            raise HedgedCallError(errors) from e
+        if learned != name:
+            self._routes[key] = name
+            if self.path:
+                async with self._save_lock:
+                    await asyncio.to_thread(self._save, dict(self._routes))
+        return name, price
+
+    def stats(self) -> Dict[str, object]:
+        return {"routes": dict(self._routes), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+class ArbitrageScanner:
+    """Latest symbols x exchanges price matrix with all cross-exchange spreads kept up to date.
+
+    ``spread[s, i, j]`` is the gross return of buying symbol ``s`` on
+    exchange ``i`` and selling it on exchange ``j`` (-inf when not positive
+    or a quote is missing). Each price update recomputes only that symbol's
+    E x E slice and re-ranks the top ``k`` (symbol, buy, sell) triples;
+    listeners are woken when that ranking changes. Quotes older than
+    ``max_age`` seconds never rank, neither on update nor on read.
+    """
+
+    def __init__(self, symbols: Sequence[str], sources: Sequence[str], k: int = 10, fee_bps: float = 10.0,
+                 max_age: float = 30.0):
+        self.symbols = list(symbols)
+        self.sources = list(sources)
+        self._sym_idx = {s: i for i, s in enumerate(self.symbols)}
+        self._src_idx = {s: i for i, s in enumerate(self.sources)}
+        n_sym, n_src = len(self.symbols), len(self.sources)
+        self.prices = np.full((n_sym, n_src), np.nan)
+        self.ts = np.zeros((n_sym, n_src))
+        self.spread = np.full((n_sym, n_src, n_src), -np.inf)
+        self.k = k
+        # Taker fee per side; net = gross - both legs
+        self.fee = fee_bps / 10_000
+        self.max_age = max_age
+        self._top_idx = np.empty(0, dtype=np.int64)
+        self._top_val = np.empty(0)
+        self._top_key = b""
+        self.updates = 0
+        self.version = 0
+        self._events: Set[asyncio.Event] = set()
+
+    def update(self, source: str, symbol: str, price: float, ts: Optional[float] = None) -> bool:
+        """Store one quote; returns True when the top-k ranking changed."""
+        i = self._sym_idx.get(symbol)
+        j = self._src_idx.get(source)
+        if i is None or j is None or not price > 0:
+            return False
+        self.prices[i, j] = price
+        self.ts[i, j] = ts if ts is not None else time.time()
+        row = self.prices[i]
+        block = self.spread[i]
+        np.divide(row[None, :], row[:, None], out=block)
+        block -= 1.0
+        # NaN (missing quote) and non-positive spreads never rank
+        block[~(block > 0)] = -np.inf
+        self.updates += 1
+        return self._rank()
+
+    def on_price(self, item: Dict) -> None:
+        """PriceBook listener."""
+        self.update(item["source"], item["symbol"], item["price"], item.get("ts"))
+
+    def _top(self, k: int, now: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Flat indices and gross spreads of the best ``k`` pairs of quotes fresh at ``now``; read-only."""
+        fresh = (now - self.ts) <= self.max_age
+        flat = np.where(fresh[:, :, None] & fresh[:, None, :], self.spread, -np.inf).ravel()
+        # A full argsort of a few hundred floats is cheaper than argpartition + argsort of the head
+        best = np.argsort(flat)[: -k - 1: -1]
+        values = flat[best]
+        n = int(np.count_nonzero(values > -np.inf))
+        return best[:n], values[:n]
+
+    def _rank(self, now: Optional[float] = None) -> bool:
+        """Store the top ``k`` and wake listeners if it changed."""
+        best, values = self._top(self.k, now if now is not None else time.time())
+        key = best.tobytes() + values.tobytes()
+        changed = key != self._top_key
+        self._top_idx, self._top_val, self._top_key = best, values, key
+        if changed:
+            self.version += 1
+            for event in self._events:
+                event.set()
+        return changed
+
+    def opportunities(self, k: Optional[int] = None, min_net_pct: Optional[float] = None,
+                      rerank: bool = True) -> List[Dict[str, object]]:
+        """Top ``k`` opportunities (default ``self.k``), best first.
+
+        ``rerank`` ranks again at the current time, so quotes that went stale
+        since the last update drop out and ``k`` may exceed ``self.k``; the
+        stored ranking, ``version`` and listeners are left alone. Without it
+        the ranking from the last update is returned, cut to ``k``.
+        """
+        now = time.time()
+        k = k or self.k
+        top_idx, top_val = self._top(k, now) if rerank else (self._top_idx[:k], self._top_val[:k])
+        n_src = len(self.sources)
+        top = []
+        for idx, gross in zip(top_idx.tolist(), top_val.tolist()):
+            s, rem = divmod(idx, n_src * n_src)
+            b, a = divmod(rem, n_src)
+            net_pct = (gross - 2 * self.fee) * 100
+            if min_net_pct is not None and net_pct < min_net_pct:
+                continue
+            top.append({
+                "symbol": self.symbols[s],
+                "buy": self.sources[b],
+                "buy_price": float(self.prices[s, b]),
+                "sell": self.sources[a],
+                "sell_price": float(self.prices[s, a]),
+                "spread_pct": gross * 100,
+                "net_pct": net_pct,
+                "age_s": round(float(now - min(self.ts[s, b], self.ts[s, a])), 3),
+            })
+        return top
+
+    def matrix(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {
+            sym: {src: (None if np.isnan(self.prices[i, j]) else float(self.prices[i, j]))
+                  for j, src in enumerate(self.sources)}
+            for i, sym in enumerate(self.symbols)
+        }
+
+    def listen(self) -> asyncio.Event:
+        """Event set whenever the ranking changes; clear it before reading ``opportunities``."""
+        event = asyncio.Event()
+        self._events.add(event)
+        return event
+
+    def unlisten(self, event: asyncio.Event) -> None:
+        self._events.discard(event)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "updates": self.updates,
+            "version": self.version,
+            "quotes": int(np.count_nonzero(~np.isnan(self.prices))),
+            "listeners": len(self._events),
+        }
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.parsers.base import Candle
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # pragma: no cover
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+_DAY_MS = 86_400_000
+COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+
+
+def _dedupe_by_ts(table: "pa.Table") -> "pa.Table":
+    """Sort by ts keeping the last occurrence of each ts (inputs are ordered oldest write first)."""
+    ts = table.column("ts").to_numpy()
+    order = np.argsort(ts, kind="stable")
+    sorted_ts = ts[order]
+    keep = np.r_[sorted_ts[1:] != sorted_ts[:-1], True]
+    return table.take(pa.array(order[keep]))
+
+
+def _day(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class CandleArchive:
+    """Columnar candle archive: one Parquet file per write, partitioned by source/symbol/interval/day.
+
+    Layout: ``{root}/source=binance/symbol=BTC/interval=1m/date=2024-01-31/part-*.parquet``.
+    Reads prune partitions by path, push the time-range filter down to the
+    row groups and memory-map the files. Requires pyarrow.
+    """
+
+    def __init__(self, root: str):
+        if pa is None:
+            raise RuntimeError("pyarrow is required for the Parquet archive")
+        self.root = root
+
+    def _partition(self, source: str, symbol: str, interval: str, day: Optional[str] = None) -> str:
+        path = os.path.join(self.root, f"source={source}", f"symbol={symbol}", f"interval={interval}")
+        return os.path.join(path, f"date={day}") if day else path
+
+    @staticmethod
+    def _table(cols: Dict[str, np.ndarray]) -> "pa.Table":
+        return pa.table({name: pa.array(cols[name]) for name in COLUMNS})
+
+    def write(self, source: str, symbol: str, interval: str, candles: Sequence[Candle]) -> int:
+        """Append candles as new part files, one per UTC day touched."""
+        if not candles:
+            return 0
+        arr = np.asarray(candles, dtype=np.float64)
+        ts = arr[:, 0].astype(np.int64)
+        order = np.argsort(ts, kind="stable")
+        arr, ts = arr[order], ts[order]
+        days = ts // _DAY_MS
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(ts)]):
+            part = self._partition(source, symbol, interval, _day(int(ts[lo])))
+            os.makedirs(part, exist_ok=True)
+            cols = {"ts": ts[lo:hi]}
+            for i, name in enumerate(COLUMNS[1:], start=1):
+                cols[name] = arr[lo:hi, i]
+            path = os.path.join(part, f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+            pq.write_table(self._table(cols), path)
+        return len(ts)
+
+    def _files(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[str]:
+        base = self._partition(source, symbol, interval)
+        if not os.path.isdir(base):
+            return []
+        first, last = _day(start_ms), _day(end_ms)
+        files: List[str] = []
+        for entry in sorted(os.listdir(base)):
+            day = entry.partition("=")[2]
+            if first <= day <= last:
+                part = os.path.join(base, entry)
+                files.extend(os.path.join(part, f) for f in sorted(os.listdir(part)) if f.endswith(".parquet"))
+        return files
+
+    def read_table(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+                   columns: Optional[Sequence[str]] = None) -> "pa.Table":
+        """Candles with ts in [start_ms, end_ms], sorted and de-duplicated by ts (latest write wins)."""
+        files = self._files(source, symbol, interval, start_ms, end_ms)
+        if not files:
+            return self._table({name: np.empty(0, dtype=np.int64 if name == "ts" else np.float64) for name in COLUMNS})
+        table = pq.read_table(
+            files,
+            columns=list(COLUMNS),
+            filters=[("ts", ">=", start_ms), ("ts", "<=", end_ms)],
+            memory_map=True,
+        )
+        if table.num_rows > 1:
+            table = _dedupe_by_ts(table)
+        if columns:
+            table = table.select(list(columns))
+        return table
+
+    def read_frame(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+                   columns: Optional[Sequence[str]] = None):
+        """Same as read_table, converted to pandas without per-column consolidation copies."""
+        table = self.read_table(source, symbol, interval, start_ms, end_ms, columns)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def read_arrays(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+                    columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        table = self.read_table(source, symbol, interval, start_ms, end_ms, columns).combine_chunks()
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+
+    def compact(self, min_files: int = 2, skip_current_day: bool = True) -> int:
+        """Merge each day partition holding at least ``min_files`` part files into one file.
+
+        Returns the number of partitions rewritten. The current UTC day is
+        skipped by default because it is still being appended to.
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        today = _day(int(time.time() * 1000))
+        compacted = 0
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            if not os.path.basename(dirpath).startswith("date="):
+                continue
+            if skip_current_day and os.path.basename(dirpath) == f"date={today}":
+                continue
+            parts = sorted(f for f in filenames if f.endswith(".parquet"))
+            if len(parts) < min_files:
+                continue
+            paths = [os.path.join(dirpath, f) for f in parts]
+            table = _dedupe_by_ts(pa.concat_tables(pq.read_table(p, memory_map=True) for p in paths))
+            target = os.path.join(dirpath, f"part-{time.time_ns()}-compacted.parquet")
+            tmp = target + ".tmp"
+            pq.write_table(table, tmp)
+            os.replace(tmp, target)
+            for p in paths:
+                os.remove(p)
+            compacted += 1
+        return compacted
+
+
+async def run_compaction(archive: CandleArchive, every_s: float) -> None:
+    """Periodically compact the archive in a worker thread until cancelled."""
+    while True:
+        await asyncio.sleep(every_s)
+        try:
+            merged = await asyncio.to_thread(archive.compact)
+            if merged:
+                logger.info("Compacted %d archive partitions", merged)
+        except Exception:  # noqa: BLE001
+            logger.exception("Archive compaction failed")
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value: Any, stored_at: float):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class TickerCache:
+    """In-process TTL cache for ticker snapshots keyed by (source, symbol).
+
+    Concurrent misses for the same key share one in-flight upstream call
+    (single-flight). Entries older than ``ttl`` but younger than
+    ``ttl + stale_ttl`` are served as-is while a background refresh runs.
+    Loader errors are never cached. A waiter that is cancelled (a client
+    gone, a losing hedged attempt) leaves the shared call running for the
+    others; the call is cancelled with the last waiter, unless it is a
+    background refresh.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._refreshes: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.abandoned = 0
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = _Entry(value, self._clock())
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value if it is still fresh, without touching counters."""
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() - entry.stored_at < self.ttl:
+            return entry.value
+        return None
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._clock() - entry.stored_at
+            if age < self.ttl:
+                self.hits += 1
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._refreshes.add(self._start_load(key, loader))
+                return entry.value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start_load(key, loader)
+        # Shield so that a cancelled waiter does not cancel the call the other waiters share
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1 and task not in self._refreshes and not task.done():
+                self.abandoned += 1
+                task.cancel()
+            raise
+        finally:
+            left = self._waiters[key] - 1
+            if left:
+                self._waiters[key] = left
+            else:
+                del self._waiters[key]
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+
+        def _done(t: asyncio.Task) -> None:
+            self._inflight.pop(key, None)
+            self._refreshes.discard(t)
+            if t.cancelled():
+                return
+            exc = t.exception()
+            if exc is not None:
+                self.errors += 1
+                logger.debug("Cache load failed for %s: %s", key, exc)
+                return
+            self.put(key, t.result())
+
+        task.add_done_callback(_done)
+        return task
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "abandoned": self.abandoned,
+            "hit_ratio": ((self.hits + self.stale_hits + self.coalesced) / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,372 @@
+import asyncio
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Table, and_, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from app.models.db import Candle, CandleCoverage, CandleRollup, engine as default_engine
+from app.parsers.base import INTERVAL_MS, BaseParser, Candle as CandleRow
+from app.services.archive import CandleArchive
+
+Range = Tuple[int, int]
+
+# Rows per executemany batch; keeps SQLite under its bound-parameter limit
+_UPSERT_BATCH = 5000
+# Rows per delete-then-insert batch on databases without ON CONFLICT (bounds the IN list)
+_PORTABLE_BATCH = 1000
+
+# Coarser levels kept in candle_rollups for every stored interval finer than them
+ROLLUP_LEVELS = ("5m", "1h", "1d")
+
+
+def rollup_levels(interval: str) -> List[str]:
+    """Rollup levels maintained above ``interval``, finest first."""
+    step = INTERVAL_MS[interval]
+    return [lvl for lvl in ROLLUP_LEVELS if INTERVAL_MS[lvl] > step and INTERVAL_MS[lvl] % step == 0]
+
+
+def rollup_candles(candles: Sequence[CandleRow], step_ms: int) -> List[CandleRow]:
+    """Aggregate ts-sorted candles into ``step_ms`` buckets: first open, max high, min low, last close, summed volume."""
+    if not candles:
+        return []
+    arr = np.asarray(candles, dtype=np.float64)
+    ts = arr[:, 0].astype(np.int64)
+    bucket = ts - ts % step_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    cols = (
+        bucket[starts].tolist(),
+        arr[starts, 1].tolist(),
+        np.maximum.reduceat(arr[:, 2], starts).tolist(),
+        np.minimum.reduceat(arr[:, 3], starts).tolist(),
+        arr[ends, 4].tolist(),
+        np.add.reduceat(arr[:, 5], starts).tolist(),
+    )
+    return list(zip(*cols))
+
+
+class CandleStore:
+    """Local OHLCV storage with a record of which time ranges were already fetched.
+
+    All methods except ``fill_lock`` are synchronous; call them through
+    ``asyncio.to_thread`` from async code.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None):
+        self.engine = engine or default_engine
+        self._fill_locks: Dict[Tuple[str, str, str], asyncio.Lock] = {}
+
+    def fill_lock(self, source: str, symbol: str, interval: str) -> asyncio.Lock:
+        """Serializes gap filling per series, so concurrent requests do not fetch the same ranges twice."""
+        key = (source, symbol, interval)
+        lock = self._fill_locks.get(key)
+        if lock is None:
+            lock = self._fill_locks[key] = asyncio.Lock()
+        return lock
+
+    def _native_insert(self, table):
+        """Dialect INSERT supporting ON CONFLICT DO UPDATE, or None for other databases."""
+        name = self.engine.dialect.name
+        if name == "sqlite":
+            return sqlite.insert(table)
+        if name == "postgresql":
+            return postgresql.insert(table)
+        return None
+
+    def _upsert(self, table: Table, source: str, symbol: str, interval: str, candles: Iterable[CandleRow],
+                base: Optional[str] = None) -> int:
+        key = {"source": source, "symbol": symbol, "interval": interval}
+        if base is not None:
+            key["base"] = base
+        rows = ({**key, "ts": ts, "open": o, "high": h, "low": l, "close": c, "volume": v}
+                for ts, o, h, l, c, v in candles)
+        stmt = self._native_insert(table)
+        if stmt is None:
+            return self._replace(table, key, rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[*key, "ts"],
+            set_={c: getattr(stmt.excluded, c) for c in ("open", "high", "low", "close", "volume")},
+        )
+        total = 0
+        batch: List[dict] = []
+        with self.engine.begin() as conn:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= _UPSERT_BATCH:
+                    conn.execute(stmt, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                conn.execute(stmt, batch)
+                total += len(batch)
+        return total
+
+    def _replace(self, table: Table, key: Dict[str, str], rows: Iterable[dict]) -> int:
+        """Portable upsert for databases without ON CONFLICT: delete the rows being replaced, then insert."""
+        # Last row wins for a repeated ts, as with ON CONFLICT DO UPDATE
+        by_ts = {row["ts"]: row for row in rows}
+        batch = list(by_ts.values())
+        match = and_(*(table.c[k] == v for k, v in key.items()))
+        with self.engine.begin() as conn:
+            for i in range(0, len(batch), _PORTABLE_BATCH):
+                part = batch[i:i + _PORTABLE_BATCH]
+                conn.execute(delete(table).where(match, table.c.ts.in_([row["ts"] for row in part])))
+                conn.execute(insert(table), part)
+        return len(batch)
+
+    @staticmethod
+    def _query(source: str, symbol: str, interval: str, start_ms: int, end_ms: int, base: Optional[str] = None):
+        """Stored ``interval`` candles, or with ``base`` the ``interval`` rollup built from ``base`` candles."""
+        t = (CandleRollup.__table__ if base is not None else Candle.__table__).c
+        query = (
+            select(t.ts, t.open, t.high, t.low, t.close, t.volume)
+            .where(t.source == source, t.symbol == symbol, t.interval == interval, t.ts.between(start_ms, end_ms))
+            .order_by(t.ts)
+        )
+        return query.where(t.base == base) if base is not None else query
+
+    def _load(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+              base: Optional[str] = None) -> List[CandleRow]:
+        with self.engine.connect() as conn:
+            return [tuple(row) for row in conn.execute(self._query(source, symbol, interval, start_ms, end_ms, base))]
+
+    def iter_chunks(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int,
+                    base: Optional[str] = None, chunk: int = _UPSERT_BATCH) -> Iterator[List[CandleRow]]:
+        """Like ``load``/``load_rollup``, but ``chunk`` rows at a time from a server-side cursor."""
+        query = self._query(source, symbol, interval, start_ms, end_ms, base)
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk).execute(query)
+            for rows in result.partitions():
+                yield [tuple(row) for row in rows]
+
+    def upsert(self, source: str, symbol: str, interval: str, candles: Iterable[CandleRow]) -> int:
+        """Insert or overwrite candles and refresh the rollup buckets they fall into.
+
+        Re-running with the same data is a no-op.
+        """
+        candles = list(candles)
+        total = self._upsert(Candle.__table__, source, symbol, interval, candles)
+        if candles:
+            self.update_rollups(source, symbol, interval, min(c[0] for c in candles), max(c[0] for c in candles))
+        return total
+
+    def load(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[CandleRow]:
+        return self._load(source, symbol, interval, start_ms, end_ms)
+
+    def load_closes(self, source: str, symbol: str, interval: str, start_ms: int,
+                    end_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(ts, close) arrays of the stored candles in [start_ms, end_ms]."""
+        t = Candle.__table__.c
+        query = (
+            select(t.ts, t.close)
+            .where(t.source == source, t.symbol == symbol, t.interval == interval, t.ts.between(start_ms, end_ms))
+            .order_by(t.ts)
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        ts = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        close = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        return ts, close
+
+    def count(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int) -> int:
+        t = Candle.__table__.c
+        query = select(func.count()).where(
+            t.source == source, t.symbol == symbol, t.interval == interval, t.ts.between(start_ms, end_ms)
+        )
+        with self.engine.connect() as conn:
+            return int(conn.execute(query).scalar_one())
+
+    def update_rollups(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int) -> None:
+        """Recompute only the rollup buckets overlapping [start_ms, end_ms], level by level.
+
+        The first level is built from stored ``interval`` candles, each
+        further level from the level below it; all are keyed by ``interval``
+        as their base.
+        """
+        level: Optional[str] = None
+        for target in rollup_levels(interval):
+            step = INTERVAL_MS[target]
+            start_ms -= start_ms % step
+            end_ms = end_ms - end_ms % step + step - 1
+            rows = self._load(source, symbol, level or interval, start_ms, end_ms, base=interval if level else None)
+            self._upsert(CandleRollup.__table__, source, symbol, target, rollup_candles(rows, step), base=interval)
+            level = target
+
+    def load_rollup(self, source: str, symbol: str, base: str, interval: str, start_ms: int,
+                    end_ms: int) -> List[CandleRow]:
+        """``interval`` bars rolled up from stored ``base`` candles."""
+        return self._load(source, symbol, interval, start_ms, end_ms, base)
+
+    def backfill_rollups(self) -> int:
+        """Build rollups for candles stored before rollups existed; no-op once any rollup row exists."""
+        t = Candle.__table__.c
+        with self.engine.connect() as conn:
+            if conn.execute(select(CandleRollup.__table__.c.ts).limit(1)).first() is not None:
+                return 0
+            keys = conn.execute(
+                select(t.source, t.symbol, t.interval, func.min(t.ts), func.max(t.ts))
+                .group_by(t.source, t.symbol, t.interval)
+            ).all()
+        for source, symbol, interval, lo, hi in keys:
+            if interval in INTERVAL_MS:
+                self.update_rollups(source, symbol, interval, lo, hi)
+        return len(keys)
+
+    def coverage(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[Range]:
+        t = CandleCoverage.__table__.c
+        query = (
+            select(t.start_ts, t.end_ts)
+            .where(t.source == source, t.symbol == symbol, t.interval == interval,
+                   t.start_ts <= end_ms, t.end_ts >= start_ms)
+            .order_by(t.start_ts)
+        )
+        with self.engine.connect() as conn:
+            return [(row[0], row[1]) for row in conn.execute(query)]
+
+    def missing_ranges(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[Range]:
+        """Sub-ranges of [start_ms, end_ms] (bar open times) not yet fetched."""
+        step = INTERVAL_MS[interval]
+        missing: List[Range] = []
+        cursor = start_ms
+        for s, e in self.coverage(source, symbol, interval, start_ms, end_ms):
+            if s > cursor:
+                missing.append((cursor, min(s - step, end_ms)))
+            cursor = max(cursor, e + step)
+            if cursor > end_ms:
+                break
+        if cursor <= end_ms:
+            missing.append((cursor, end_ms))
+        return missing
+
+    def mark_covered(self, source: str, symbol: str, interval: str, start_ms: int, end_ms: int) -> None:
+        """Record [start_ms, end_ms] as fetched, merging with overlapping or adjacent ranges."""
+        step = INTERVAL_MS[interval]
+        t = CandleCoverage.__table__.c
+        key = and_(t.source == source, t.symbol == symbol, t.interval == interval)
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(t.start_ts, t.end_ts).where(key, t.start_ts <= end_ms + step, t.end_ts >= start_ms - step)
+            ).all()
+            for s, e in rows:
+                start_ms = min(start_ms, s)
+                end_ms = max(end_ms, e)
+            if rows:
+                conn.execute(delete(CandleCoverage.__table__).where(key, t.start_ts.in_([r[0] for r in rows])))
+            conn.execute(insert(CandleCoverage.__table__).values(
+                source=source, symbol=symbol, interval=interval, start_ts=start_ms, end_ts=end_ms,
+            ))
+
+
+def last_closed_open_time(interval: str, now_ms: Optional[int] = None) -> int:
+    """Open time of the most recent fully closed bar."""
+    step = INTERVAL_MS[interval]
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    return (now_ms // step) * step - step
+
+
+async def sync_candles(parser: BaseParser, store: CandleStore, source: str, symbol: str, interval: str,
+                       start_ms: int, end_ms: int, archive: Optional[CandleArchive] = None,
+                       resolution: Optional[str] = None) -> Optional[Range]:
+    """Fetch the uncovered parts of [start_ms, end_ms] into the store; returns the range to read back.
+
+    The still-open bar is never stored, so the range ends at the last closed
+    bar (None when nothing is closed yet). With a coarser ``resolution`` the
+    range is widened to whole buckets of that rollup level and ends at its
+    last closed bucket, so no returned rollup bar is built from part of its
+    base candles. Pages are written as they arrive, at most
+    ``_UPSERT_BATCH`` candles at a time, and also appended to ``archive``
+    when one is given.
+
+    Only what the exchange actually returned is marked as covered: from the
+    start of a missing range up to the end of its first unbroken run of
+    bars. A truncated page or a hole is fetched again next time instead of
+    being recorded as empty. Concurrent calls for one series take turns
+    (``CandleStore.fill_lock``), so the second one finds the ranges covered.
+    """
+    step = INTERVAL_MS[interval]
+    if resolution and resolution != interval:
+        bucket = INTERVAL_MS[resolution]
+        start_ms -= start_ms % bucket
+        span_end = min(end_ms - end_ms % bucket, last_closed_open_time(resolution))
+        end_ms = span_end + bucket - step  # last base bar of the last bucket
+    else:
+        start_ms -= start_ms % step
+        end_ms = span_end = min(end_ms, last_closed_open_time(interval))
+    if span_end < start_ms:
+        return None
+    async with store.fill_lock(source, symbol, interval):
+        missing = await asyncio.to_thread(store.missing_ranges, source, symbol, interval, start_ms, end_ms)
+        for s, e in missing:
+
+            async def ingest(s: int = s, e: int = e) -> Optional[int]:
+                batch: List[CandleRow] = []
+                covered_to: Optional[int] = None
+                contiguous = True
+                async for candle in parser.iter_klines(symbol, interval, s, e):
+                    if contiguous and covered_to is not None and candle[0] - covered_to > step:
+                        contiguous = False
+                    if contiguous:
+                        covered_to = candle[0]
+                    batch.append(candle)
+                    if len(batch) >= _UPSERT_BATCH:
+                        await _store_batch(store, archive, source, symbol, interval, batch)
+                        batch = []
+                if batch:
+                    await _store_batch(store, archive, source, symbol, interval, batch)
+                return covered_to
+
+            covered_to = await parser.guarded(ingest)
+            if covered_to is not None:
+                await asyncio.to_thread(store.mark_covered, source, symbol, interval, s, covered_to)
+    return start_ms, span_end
+
+
+async def _store_batch(store: CandleStore, archive: Optional[CandleArchive], source: str, symbol: str,
+                       interval: str, candles: List[CandleRow]) -> None:
+    await asyncio.to_thread(store.upsert, source, symbol, interval, candles)
+    if archive is not None:
+        await asyncio.to_thread(archive.write, source, symbol, interval, candles)
+
+
+async def fetch_candles(parser: BaseParser, store: CandleStore, source: str, symbol: str, interval: str,
+                        start_ms: int, end_ms: int, archive: Optional[CandleArchive] = None,
+                        resolution: Optional[str] = None) -> List[CandleRow]:
+    """Closed candles for [start_ms, end_ms] as one list (see ``sync_candles``); for callers that need arrays.
+
+    With a coarser ``resolution`` (one of ``rollup_levels(interval)``) the
+    rollup bars built from ``interval`` candles are returned instead.
+    """
+    span = await sync_candles(parser, store, source, symbol, interval, start_ms, end_ms, archive, resolution)
+    if span is None:
+        return []
+    if resolution and resolution != interval:
+        return await asyncio.to_thread(store.load_rollup, source, symbol, interval, resolution, *span)
+    return await asyncio.to_thread(store.load, source, symbol, interval, *span)
+
+
+def _archived_closes(store: CandleStore, archive: CandleArchive, source: str, symbol: str, interval: str,
+                     start_ms: int, end_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+    cols = archive.read_arrays(source, symbol, interval, start_ms, end_ms, columns=("ts", "close"))
+    # The archive only holds what was fetched after it was enabled; fall back when it is short
+    if len(cols["ts"]) == store.count(source, symbol, interval, start_ms, end_ms):
+        return cols["ts"], cols["close"]
+    return store.load_closes(source, symbol, interval, start_ms, end_ms)
+
+
+async def fetch_closes(parser: BaseParser, store: CandleStore, source: str, symbol: str, interval: str,
+                       start_ms: int, end_ms: int,
+                       archive: Optional[CandleArchive] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(ts, close) arrays of the closed candles in [start_ms, end_ms] (see ``sync_candles``).
+
+    Read column-wise from the Parquet ``archive`` when it holds the whole
+    range, from the store otherwise; no per-row tuples either way.
+    """
+    span = await sync_candles(parser, store, source, symbol, interval, start_ms, end_ms, archive)
+    if span is None:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    if archive is not None:
+        return await asyncio.to_thread(_archived_closes, store, archive, source, symbol, interval, *span)
+    return await asyncio.to_thread(store.load_closes, source, symbol, interval, *span)
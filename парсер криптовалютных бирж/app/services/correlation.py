@@ -0,0 +1,120 @@
+from functools import reduce
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.parsers.base import Candle
+
+
+def align_series(series: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Close prices on timestamps common to every symbol: (ts[T], closes[T, N]) in dict order.
+
+    ``series`` maps each symbol to its (ts, close) arrays.
+    """
+    ts_arrays = [np.asarray(ts, dtype=np.int64) for ts, _ in series.values()]
+    common = reduce(np.intersect1d, ts_arrays) if ts_arrays else np.empty(0, dtype=np.int64)
+    closes = np.empty((len(common), len(ts_arrays)), dtype=np.float64)
+    for j, ((_, close), ts) in enumerate(zip(series.values(), ts_arrays)):
+        order = np.argsort(ts, kind="stable")
+        closes[:, j] = np.asarray(close, dtype=np.float64)[order][np.searchsorted(ts[order], common)]
+    return common, closes
+
+
+def align_closes(candles: Dict[str, Sequence[Candle]]) -> Tuple[np.ndarray, np.ndarray]:
+    """``align_series`` for candle rows."""
+    return align_series({
+        sym: (
+            np.fromiter((c[0] for c in rows), dtype=np.int64, count=len(rows)),
+            np.fromiter((c[4] for c in rows), dtype=np.float64, count=len(rows)),
+        )
+        for sym, rows in candles.items()
+    })
+
+
+def log_returns(closes: np.ndarray) -> np.ndarray:
+    return np.diff(np.log(closes), axis=0)
+
+
+def pearson_matrix(returns: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.atleast_2d(np.corrcoef(returns, rowvar=False))
+    # np.corrcoef only yields NaN for a constant column when its variance rounds to exactly zero
+    flat = np.ptp(returns, axis=0) == 0 if len(returns) else np.zeros(corr.shape[0], dtype=bool)
+    corr[flat, :] = np.nan
+    corr[:, flat] = np.nan
+    return corr
+
+
+def spearman_matrix(returns: np.ndarray) -> np.ndarray:
+    # pandas ranks columns in compiled code and averages ties
+    ranks = pd.DataFrame(returns).rank(method="average").to_numpy()
+    return pearson_matrix(ranks)
+
+
+class RollingCorrelation:
+    """Pearson matrix over the last ``window`` return vectors, updated in O(N^2) per new row.
+
+    Keeps the sum vector and the sum of outer products of the rows in the
+    window instead of recomputing every pair over the whole window.
+    """
+
+    # Rebuild the sums from the buffer every N updates to cancel rounding drift
+    _RESYNC_EVERY = 1024
+
+    def __init__(self, n: int, window: int):
+        self.n = n
+        self.window = window
+        self._buf = np.zeros((window, n), dtype=np.float64)
+        self._pos = 0
+        self.count = 0
+        self._sum = np.zeros(n)
+        self._outer = np.zeros((n, n))
+        self._since_resync = 0
+        self.last_ts: Optional[int] = None
+
+    def update(self, row: np.ndarray) -> None:
+        if self.count >= self.window:
+            old = self._buf[self._pos]
+            self._sum -= old
+            self._outer -= np.outer(old, old)
+        else:
+            self.count += 1
+        self._sum += row
+        self._outer += np.outer(row, row)
+        self._buf[self._pos] = row
+        self._pos = (self._pos + 1) % self.window
+        self._since_resync += 1
+        if self._since_resync >= self._RESYNC_EVERY:
+            rows = self._buf[: self.count]
+            self._sum = rows.sum(axis=0)
+            self._outer = rows.T @ rows
+            self._since_resync = 0
+
+    def extend(self, rows: np.ndarray) -> None:
+        for row in rows:
+            self.update(row)
+
+    def matrix(self) -> np.ndarray:
+        if self.count < 2:
+            return np.full((self.n, self.n), np.nan)
+        k = self.count
+        mean = self._sum / k
+        cov = (self._outer - k * np.outer(mean, mean)) / (k - 1)
+        var = np.diag(cov)
+        # A constant column leaves only rounding noise in the running sums
+        flat = var <= 1e-12 * np.diag(self._outer) / k
+        std = np.sqrt(np.where(flat, 1.0, var))
+        corr = cov / np.outer(std, std)
+        np.fill_diagonal(corr, 1.0)
+        # Like np.corrcoef: rows and columns of a constant series are NaN, diagonal included
+        corr[flat, :] = np.nan
+        corr[:, flat] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+
+def matrix_to_dict(symbols: List[str], matrix: np.ndarray) -> Dict[str, Dict[str, Optional[float]]]:
+    return {
+        a: {b: (None if np.isnan(matrix[i, j]) else float(matrix[i, j])) for j, b in enumerate(symbols)}
+        for i, a in enumerate(symbols)
+    }
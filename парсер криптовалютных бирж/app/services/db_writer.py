@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert
+from sqlalchemy.engine import Engine
+
+from app.models.db import Price
+
+logger = logging.getLogger(__name__)
+
+Row = Dict[str, object]
+
+# Queued by ``stop``: the writer flushes what it holds and exits instead of being cancelled mid-batch
+_STOP: Row = {}
+
+
+def insert_prices(engine: Engine, rows: List[Row]) -> None:
+    """One executemany INSERT into ``prices`` in a single transaction."""
+    if rows:
+        with engine.begin() as conn:
+            conn.execute(insert(Price), rows)
+
+
+def prune_prices(engine: Engine, older_than: datetime) -> int:
+    """Delete ``prices`` rows stamped before ``older_than``; returns the number deleted."""
+    with engine.begin() as conn:
+        return conn.execute(delete(Price).where(Price.timestamp < older_than)).rowcount or 0
+
+
+async def run_pruning(engine: Engine, retention_s: float, every_s: float) -> None:
+    """Every ``every_s`` seconds drop rows older than ``retention_s`` (in a worker thread) until cancelled."""
+    while True:
+        try:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=retention_s)
+            deleted = await asyncio.to_thread(prune_prices, engine, cutoff)
+            if deleted:
+                logger.info("Pruned %d price rows older than %s", deleted, cutoff.isoformat())
+        except Exception:  # noqa: BLE001
+            logger.exception("Price pruning failed")
+        await asyncio.sleep(every_s)
+
+
+class BatchWriter:
+    """Bounded queue drained by a single writer task that flushes in batches.
+
+    Producers call ``offer``/``offer_many``, which never block: when the
+    queue is full the row is dropped and counted. The writer flushes when
+    ``max_batch`` rows are queued or ``max_delay`` seconds after the first
+    row of a batch, running ``flush`` in a worker thread so the event loop
+    never waits on the database.
+    """
+
+    def __init__(self, flush: Callable[[List[Row]], None], max_batch: int = 1000, max_delay: float = 0.2,
+                 maxsize: int = 100_000):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "asyncio.Queue[Row]" = asyncio.Queue(maxsize)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    def offer(self, row: Row) -> bool:
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    def offer_many(self, rows: Iterable[Row]) -> int:
+        return sum(self.offer(row) for row in rows)
+
+    async def _next_batch(self) -> Tuple[List[Row], bool]:
+        """Up to ``max_batch`` rows and whether ``stop`` was requested while collecting them."""
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                row = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if row is _STOP:
+                return batch, True
+            batch.append(row)
+        return batch, False
+
+    async def _write(self, batch: List[Row]) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await asyncio.to_thread(self.flush, batch)
+            self.written += len(batch)
+        except Exception:  # noqa: BLE001
+            self.failed += len(batch)
+            logger.exception("Batch write of %d rows failed", len(batch))
+        self.flushes += 1
+        self.last_flush_ms = (loop.time() - started) * 1000
+
+    async def run(self) -> None:
+        while True:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._write(batch)
+            if stopping:
+                return
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run(), name="db-writer")
+        return self._task
+
+    async def stop(self) -> None:
+        """Let the writer flush the batch it is collecting, then flush whatever is still queued."""
+        if self._task is not None:
+            if not self._task.done():
+                # May wait for a free slot; the writer keeps draining meanwhile
+                await self._queue.put(_STOP)
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        rest: List[Row] = []
+        while not self._queue.empty():
+            rest.append(self._queue.get_nowait())
+        for i in range(0, len(rest), self.max_batch):
+            await self._write(rest[i:i + self.max_batch])
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+        }
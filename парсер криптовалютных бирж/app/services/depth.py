@@ -0,0 +1,356 @@
+import asyncio
+import logging
+import zlib
+from abc import abstractmethod
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.parsers.binance import SYMBOL_TO_BINANCE
+from app.parsers.bitget import SYMBOL_TO_BITGET
+from app.parsers.bybit import SYMBOL_TO_BYBIT
+from app.parsers.coinbase import SYMBOL_TO_COINBASE
+from app.services.orderbook import OrderBook, OrderBookStore
+from app.services.stream import WebSocketFeed
+from app.utils.decoding import loads
+
+logger = logging.getLogger(__name__)
+
+# symbol -> {"bids", "asks", "update_id"} from the exchange REST API
+SnapshotFetch = Callable[[str], Awaitable[Dict]]
+
+
+class DepthStream(WebSocketFeed):
+    """Reconnecting WebSocket L2 depth client maintaining books in an OrderBookStore.
+
+    Shares the ticker streams' connection handling; ``store`` is the
+    OrderBookStore and ``apply`` handles one decoded message. Books are
+    marked out of sync on every reconnect until a fresh snapshot arrives,
+    and whenever ``apply`` detects a gap (``resync``).
+    """
+
+    def __init__(self, store: OrderBookStore, symbols: Iterable[str], url: Optional[str] = None,
+                 max_backoff: float = 60.0, snapshot: Optional[SnapshotFetch] = None, min_backoff: float = 1.0):
+        super().__init__(symbols, url=url, max_backoff=max_backoff, min_backoff=min_backoff)
+        self.store = store
+        self.snapshot = snapshot
+        self.resyncs = 0
+
+    def _book(self, native: Optional[str]) -> Optional[OrderBook]:
+        sym = self.pairs.get(native) if native else None
+        return self.store.book(self.source, sym, self.currency) if sym else None
+
+    def on_connect(self) -> None:
+        self.store.reset(self.source)
+
+    def resubscribe_messages(self, native: str) -> List[object]:
+        """Messages that make the exchange send a fresh snapshot of one book."""
+        return []
+
+    def resync(self, native: str, book: OrderBook, reason: str) -> int:
+        """Drop a book that lost sync and ask for a new snapshot; returns 0 for ``apply``."""
+        logger.info("%s depth %s for %s, resubscribing", self.source, reason, native)
+        book.reset()
+        self.resyncs += 1
+        for m in self.resubscribe_messages(native):
+            self.send(m)
+        return 0
+
+    def handle(self, raw: str) -> int:
+        try:
+            msg = loads(raw)
+        except ValueError:
+            return 0
+        return self.apply(msg) if isinstance(msg, dict) else 0
+
+    @abstractmethod
+    def apply(self, msg: Dict) -> int:
+        """Apply one message; returns the number of books touched."""
+
+    def stats(self) -> Dict[str, object]:
+        return {**super().stats(), "resyncs": self.resyncs}
+
+
+class BinanceDepthStream(DepthStream):
+    """``<pair>@depth@100ms`` diffs synced against a REST snapshot.
+
+    Diffs are buffered until the snapshot arrives; diffs up to its
+    ``lastUpdateId`` are dropped and the rest must chain (``U`` = previous
+    ``u`` + 1). Any gap drops the book back to buffering and refetches.
+    """
+
+    source = "binance"
+    default_url = "wss://stream.binance.com:9443/stream"
+    mapping = SYMBOL_TO_BINANCE
+    max_buffer = 1000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._buffers: Dict[str, List[Dict]] = {}
+        self._resync_tasks: Dict[str, asyncio.Task] = {}
+
+    def build_url(self) -> str:
+        streams = "/".join(f"{pair.lower()}@depth@100ms" for pair in self.pairs)
+        return f"{self.url}?streams={streams}"
+
+    def on_connect(self) -> None:
+        super().on_connect()
+        for task in self._resync_tasks.values():
+            task.cancel()
+        self._resync_tasks.clear()
+        self._buffers.clear()
+
+    def apply(self, msg: Dict) -> int:
+        data = msg.get("data", msg)
+        if not isinstance(data, dict) or data.get("e") != "depthUpdate":
+            return 0
+        native = data.get("s")
+        book = self._book(native)
+        if book is None:
+            return 0
+        if book.synced:
+            if data["u"] <= book.update_id:
+                return 0
+            if data["U"] <= book.update_id + 1:
+                book.apply_diff(data["b"], data["a"], data["u"])
+                return 1
+            logger.info("binance depth gap for %s, resyncing", native)
+            book.reset()
+        buf = self._buffers.setdefault(native, [])
+        if len(buf) >= self.max_buffer:
+            buf.pop(0)
+        buf.append(data)
+        self._schedule_resync(native, book)
+        return 0
+
+    def _schedule_resync(self, native: str, book: OrderBook) -> None:
+        task = self._resync_tasks.get(native)
+        if self.snapshot is not None and (task is None or task.done()):
+            self._resync_tasks[native] = asyncio.create_task(self._resync(native, book))
+
+    async def _resync(self, native: str, book: OrderBook) -> None:
+        delay = 0.5
+        while not book.synced:
+            self.resyncs += 1
+            try:
+                snap = await self.snapshot(book.symbol)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # noqa: BLE001
+                logger.warning("binance depth snapshot for %s failed: %s", native, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            last_id = snap["update_id"]
+            pending = [ev for ev in self._buffers.pop(native, []) if ev["u"] > last_id]
+            # Snapshot older than the first buffered diff: events in between are lost, fetch again
+            if pending and pending[0]["U"] > last_id + 1:
+                self._buffers[native] = pending
+                await asyncio.sleep(delay)
+                continue
+            book.load_snapshot(snap["bids"], snap["asks"], last_id)
+            for ev in pending:
+                book.apply_diff(ev["b"], ev["a"], ev["u"])
+
+    async def stop(self) -> None:
+        for task in self._resync_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._resync_tasks.values(), return_exceptions=True)
+        self._resync_tasks.clear()
+        await super().stop()
+
+
+class BybitDepthStream(DepthStream):
+    """``orderbook.50.<pair>``: a snapshot on subscribe (and whenever Bybit resets), then deltas.
+
+    Delta update ids ``u`` must follow the previous one by exactly 1; a
+    gap resubscribes the topic to get a new snapshot.
+    """
+
+    source = "bybit"
+    default_url = "wss://stream.bybit.com/v5/public/linear"
+    mapping = SYMBOL_TO_BYBIT
+    ping_message = {"op": "ping"}
+
+    def subscribe_messages(self) -> List[object]:
+        topics = [f"orderbook.50.{pair}" for pair in self.pairs]
+        return [{"op": "subscribe", "args": topics[i:i + 10]} for i in range(0, len(topics), 10)]
+
+    def resubscribe_messages(self, native: str) -> List[object]:
+        topic = f"orderbook.50.{native}"
+        return [{"op": "unsubscribe", "args": [topic]}, {"op": "subscribe", "args": [topic]}]
+
+    def apply(self, msg: Dict) -> int:
+        if not str(msg.get("topic", "")).startswith("orderbook."):
+            return 0
+        data = msg.get("data") or {}
+        native = data.get("s")
+        book = self._book(native)
+        if book is None:
+            return 0
+        update_id = data.get("u")
+        if msg.get("type") == "snapshot":
+            book.load_snapshot(data.get("b") or [], data.get("a") or [], update_id)
+            return 1
+        if not book.synced:
+            return 0
+        if update_id is None or book.update_id is None or update_id != book.update_id + 1:
+            return self.resync(native, book, f"gap ({book.update_id} -> {update_id})")
+        book.apply_diff(data.get("b") or [], data.get("a") or [], update_id)
+        return 1
+
+
+def bitget_checksum(bids: List[Tuple[str, str]], asks: List[Tuple[str, str]]) -> int:
+    """Signed CRC32 of "bid1p:bid1s:ask1p:ask1s:..." over the best 25 levels, as Bitget computes it."""
+    parts: List[str] = []
+    for i in range(25):
+        if i < len(bids):
+            parts.extend(bids[i])
+        if i < len(asks):
+            parts.extend(asks[i])
+    crc = zlib.crc32(":".join(parts).encode())
+    return crc - (1 << 32) if crc >= 1 << 31 else crc
+
+
+class BitgetDepthStream(DepthStream):
+    """Spot ``books`` channel: ``snapshot`` then incremental ``update`` actions.
+
+    Every update must carry a higher ``seq`` than the last one and its
+    ``checksum`` must match the local top 25 levels; otherwise the channel
+    is resubscribed for a new snapshot. The checksum is computed over the
+    exchange's own price/size strings, kept per level next to the book.
+    """
+
+    source = "bitget"
+    default_url = "wss://ws.bitget.com/v2/ws/public"
+    mapping = SYMBOL_TO_BITGET
+    ping_message = "ping"
+    ping_interval = 25.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # native -> (bids, asks): price -> (price text, size text)
+        self._text: Dict[str, Tuple[Dict[float, Tuple[str, str]], Dict[float, Tuple[str, str]]]] = {}
+
+    def subscribe_messages(self) -> List[object]:
+        args = [{"instType": "SPOT", "channel": "books", "instId": pair} for pair in self.pairs]
+        return [{"op": "subscribe", "args": args}]
+
+    def resubscribe_messages(self, native: str) -> List[object]:
+        args = [{"instType": "SPOT", "channel": "books", "instId": native}]
+        return [{"op": "unsubscribe", "args": args}, {"op": "subscribe", "args": args}]
+
+    @staticmethod
+    def _remember(text: Dict[float, Tuple[str, str]], levels: Iterable[List[str]]) -> None:
+        for price, size in levels:
+            if float(size) > 0:
+                text[float(price)] = (price, size)
+            else:
+                text.pop(float(price), None)
+
+    def _checksum(self, native: str, book: OrderBook) -> Optional[int]:
+        bids_text, asks_text = self._text[native]
+        try:
+            bids = [bids_text[p] for p in book.bids.prices[:25].tolist()]
+            asks = [asks_text[p] for p in book.asks.prices[:25].tolist()]
+        except KeyError:
+            return None
+        for text, side in ((bids_text, book.bids), (asks_text, book.asks)):
+            # Levels cut off by max_levels are gone from the book; forget their text too
+            if len(text) > 2 * side.max_levels:
+                keep = set(side.prices.tolist())
+                for p in [p for p in text if p not in keep]:
+                    del text[p]
+        return bitget_checksum(bids, asks)
+
+    def apply(self, msg: Dict) -> int:
+        arg = msg.get("arg") or {}
+        if arg.get("channel") != "books":
+            return 0
+        native = arg.get("instId")
+        book = self._book(native)
+        if book is None:
+            return 0
+        count = 0
+        for item in msg.get("data") or []:
+            seq = item.get("seq")
+            bids, asks = item.get("bids") or [], item.get("asks") or []
+            if msg.get("action") == "snapshot":
+                book.load_snapshot(bids, asks, seq)
+                self._text[native] = ({}, {})
+            elif not book.synced:
+                continue
+            elif seq is not None and book.update_id is not None and int(seq) <= int(book.update_id):
+                return self.resync(native, book, f"out-of-order seq ({book.update_id} -> {seq})")
+            else:
+                book.apply_diff(bids, asks, seq)
+            self._remember(self._text[native][0], bids)
+            self._remember(self._text[native][1], asks)
+            expected = item.get("checksum")
+            if expected is not None and self._checksum(native, book) != int(expected):
+                return self.resync(native, book, "checksum mismatch")
+            count += 1
+        return count
+
+
+class CoinbaseDepthStream(DepthStream):
+    """``level2_batch`` channel: ``snapshot`` then ``l2update`` changes as [side, price, size].
+
+    The channel has no sequence numbers, so a crossed book (best bid at or
+    above best ask) is the loss-of-sync signal; it resubscribes the product.
+    """
+
+    source = "coinbase"
+    currency = "USD"
+    default_url = "wss://ws-feed.exchange.coinbase.com"
+    mapping = SYMBOL_TO_COINBASE
+
+    def subscribe_messages(self) -> List[object]:
+        return [{"type": "subscribe", "product_ids": list(self.pairs), "channels": ["level2_batch"]}]
+
+    def resubscribe_messages(self, native: str) -> List[object]:
+        return [
+            {"type": "unsubscribe", "product_ids": [native], "channels": ["level2_batch"]},
+            {"type": "subscribe", "product_ids": [native], "channels": ["level2_batch"]},
+        ]
+
+    def apply(self, msg: Dict) -> int:
+        kind = msg.get("type")
+        if kind not in ("snapshot", "l2update"):
+            return 0
+        native = msg.get("product_id")
+        book = self._book(native)
+        if book is None:
+            return 0
+        if kind == "snapshot":
+            book.load_snapshot(msg.get("bids") or [], msg.get("asks") or [])
+            return 1
+        if not book.synced:
+            return 0
+        changes = msg.get("changes") or []
+        book.apply_diff(
+            [(p, s) for side, p, s in changes if side == "buy"],
+            [(p, s) for side, p, s in changes if side == "sell"],
+        )
+        bid, ask = book.bids.best(), book.asks.best()
+        if bid is not None and ask is not None and bid >= ask:
+            return self.resync(native, book, f"crossed book ({bid} >= {ask})")
+        return 1
+
+
+DEPTH_STREAM_CLASSES = {
+    "binance": BinanceDepthStream,
+    "bybit": BybitDepthStream,
+    "bitget": BitgetDepthStream,
+    "coinbase": CoinbaseDepthStream,
+}
+
+
+def start_depth_streams(store: OrderBookStore, symbols: Iterable[str], urls: Optional[Dict[str, str]] = None,
+                        snapshots: Optional[Dict[str, SnapshotFetch]] = None) -> Dict[str, DepthStream]:
+    """Create and start one depth stream per exchange; ``snapshots`` supplies REST snapshots where needed."""
+    symbols = list(symbols)
+    streams: Dict[str, DepthStream] = {}
+    for name, cls in DEPTH_STREAM_CLASSES.items():
+        stream = cls(store, symbols, url=(urls or {}).get(name) or None, snapshot=(snapshots or {}).get(name))
+        stream.start()
+        streams[name] = stream
+    return streams
@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point and, from each of ``n_out - 2`` equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket. The shape of
+    a line chart survives far better than with plain striding.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket boundaries over the interior points 1 .. n-2
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    # Average of every bucket, used as the third triangle vertex for the bucket before it
+    cx = np.cumsum(np.r_[0.0, x])
+    cy = np.cumsum(np.r_[0.0, y])
+    nxt_lo = np.r_[edges[1:-1], n - 1]
+    nxt_hi = np.r_[edges[2:], n]
+    avg_x = (cx[nxt_hi] - cx[nxt_lo]) / (nxt_hi - nxt_lo)
+    avg_y = (cy[nxt_hi] - cy[nxt_lo]) / (nxt_hi - nxt_lo)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((x[a] - avg_x[i]) * (by - y[a]) - (x[a] - bx) * (avg_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:  # optional: brotli variant of precompressed assets
+    import brotli  # type: ignore
+except Exception:  # noqa: BLE001
+    brotli = None
+
+# Preferred first when the client accepts several
+_ENCODINGS = ("br", "gzip")
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etags) -> bool:
+    """True when an If-None-Match header matches one of ``etags`` (weak comparison, ``*`` matches all)."""
+    if not if_none_match:
+        return False
+    for token in if_none_match.split(","):
+        token = token.strip()
+        if token == "*":
+            return True
+        if token.startswith("W/"):
+            token = token[2:]
+        if token in etags:
+            return True
+    return False
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    """Codings from an Accept-Encoding header, excluding those with q=0."""
+    accepted = []
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            accepted.append(coding.strip().lower())
+    return accepted
+
+
+class StaticAsset:
+    """A response body prepared once: identity, gzip and (with ``brotli`` installed) br variants plus ETags.
+
+    ``response`` picks the variant from Accept-Encoding and answers a
+    matching If-None-Match with an empty 304.
+    """
+
+    def __init__(self, body: bytes, media_type: str, cache_control: str = "no-cache"):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        base = make_etag(body)
+        # encoding -> (body, etag); each representation gets its own strong ETag
+        self.variants: Dict[str, Tuple[bytes, str]] = {"identity": (body, base)}
+        self.variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), base[:-1] + '-gz"')
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=11), base[:-1] + '-br"')
+
+    def pick(self, accept_encoding: Optional[str]) -> str:
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in _ENCODINGS:
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def response(self, request: Request) -> Response:
+        encoding = self.pick(request.headers.get("accept-encoding"))
+        body, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), (etag,)):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=self.media_type, headers=headers)
+
+    def stats(self) -> Dict[str, int]:
+        return {encoding: len(body) for encoding, (body, _) in self.variants.items()}
+
+
+class ConditionalGetMiddleware:
+    """Pure ASGI middleware adding ETag/304 and Cache-Control to successful GET JSON responses.
+
+    ``max_age(route_template)`` returns the Cache-Control max-age in seconds
+    for a route, or None to leave its responses untouched. The body is
+    buffered to hash it, so this is meant for small JSON payloads.
+    """
+
+    def __init__(self, app, max_age: Callable[[str], Optional[float]]):
+        self.app = app
+        self.max_age = max_age
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        start: Optional[dict] = None
+        max_age = 0.0
+        chunks: List[bytes] = []
+        if_none_match = None
+        for name, value in scope.get("headers") or []:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        async def send_wrapper(message):
+            nonlocal start, max_age
+            if message["type"] == "http.response.start":
+                route = getattr(scope.get("route"), "path", None)
+                age = self.max_age(route) if route and message["status"] == 200 else None
+                if age is None or any(k == b"etag" for k, _ in message.get("headers") or []):
+                    await send(message)
+                    return
+                start, max_age = {**message, "headers": list(message.get("headers") or [])}, age
+                return
+            if start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            body = b"".join(chunks)
+            etag = make_etag(body)
+            extra = [(b"etag", etag.encode()), (b"cache-control", f"public, max-age={int(max_age)}".encode())]
+            if etag_matches(if_none_match, {etag}):
+                # 304 carries the validators but no body or entity headers
+                headers = [(k, v) for k, v in start["headers"] if k not in (b"content-length", b"content-type")]
+                await send({"type": "http.response.start", "status": 304, "headers": headers + extra})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": start["headers"] + extra})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,4 +1,7 @@
-from typing import Dict
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
 
@@ -36,3 +39,157 @@ def compute_bollinger(series: pd.Series, window: int = 20, num_std: float = 2.0)
     return {"middle": sma, "upper": upper, "lower": lower}
 
 
+INDICATOR_NAMES = ("sma", "ema", "rsi", "macd", "bollinger")
+
+
+def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if window <= len(x):
+        csum = np.cumsum(np.r_[0.0, x])
+        out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+
+def _window_sums(csum: np.ndarray, window: int) -> np.ndarray:
+    """Sums over each full window, from a cumulative sum with a leading 0."""
+    return csum[window:] - csum[:-window]
+
+
+class _Shared:
+    """Intermediates shared between indicators within one engine call."""
+
+    def __init__(self, close: np.ndarray):
+        self.close = close
+        # Sums run over prices centered on their mean, so sum-of-squares differences keep their precision
+        self.shift = float(close.mean()) if len(close) else 0.0
+        self._memo: Dict[Tuple, np.ndarray] = {}
+
+    def _get(self, key: Tuple, fn) -> np.ndarray:
+        val = self._memo.get(key)
+        if val is None:
+            val = self._memo[key] = fn()
+        return val
+
+    def sums(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cumulative sum and sum of squares of the centered prices (leading 0), shared by SMA and Bollinger."""
+        def calc() -> np.ndarray:
+            centered = self.close - self.shift
+            return np.stack([np.cumsum(np.r_[0.0, centered]), np.cumsum(np.r_[0.0, centered * centered])])
+        both = self._get(("sums",), calc)
+        return both[0], both[1]
+
+    def mean(self, window: int) -> np.ndarray:
+        def calc() -> np.ndarray:
+            out = np.full(self.close.shape, np.nan)
+            if window <= len(self.close):
+                out[window - 1:] = self.shift + _window_sums(self.sums()[0], window) / window
+            return out
+        return self._get(("mean", window), calc)
+
+    def std(self, window: int) -> np.ndarray:
+        """Sample standard deviation from the rolling sums: (S2 - S1^2 / w) / (w - 1)."""
+        def calc() -> np.ndarray:
+            out = np.full(self.close.shape, np.nan)
+            if 1 < window <= len(self.close):
+                csum, csum2 = self.sums()
+                s1 = _window_sums(csum, window)
+                var = np.maximum(_window_sums(csum2, window) - s1 * s1 / window, 0.0) / (window - 1)
+                # Flat windows must be exactly 0, not the rounding residue of the sums
+                moves = np.cumsum(np.r_[0.0, (np.diff(self.close) != 0).astype(np.float64)])
+                var[_window_sums(moves, window - 1) == 0] = 0.0
+                out[window - 1:] = np.sqrt(var)
+            return out
+        return self._get(("std", window), calc)
+
+    def ema_of(self, x: np.ndarray, span: int, key: str) -> np.ndarray:
+        """EMA of ``x``, memoized under ``key`` (which must name ``x``)."""
+        # pandas' EWM kernel is compiled; reusing it keeps values identical to compute_ema
+        return self._get(("ema", span, key), lambda: pd.Series(x).ewm(span=span, adjust=False).mean().to_numpy())
+
+    def ema(self, span: int) -> np.ndarray:
+        return self.ema_of(self.close, span, "close")
+
+    def delta_parts(self) -> Tuple[np.ndarray, np.ndarray]:
+        def calc() -> np.ndarray:
+            delta = np.diff(self.close, prepend=np.nan)
+            return np.stack([np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)])
+        parts = self._get(("delta",), calc)
+        return parts[0], parts[1]
+
+
+def compute_indicators(close: Iterable[float], names: Iterable[str] = INDICATOR_NAMES, window: int = 14,
+                       fast: int = 12, slow: int = 26, signal: int = 9,
+                       bb_window: int = 20, num_std: float = 2.0) -> Dict[str, object]:
+    """Compute several indicators over one price array, sharing rolling sums and EMAs.
+
+    Values match the single-indicator functions above (``window`` drives
+    SMA, EMA and RSI). Returns NumPy arrays; MACD and Bollinger return dicts
+    of arrays like their pandas counterparts.
+    """
+    shared = _Shared(np.asarray(close, dtype=np.float64))
+    out: Dict[str, object] = {}
+    for name in names:
+        if name == "sma":
+            out["sma"] = shared.mean(window)
+        elif name == "ema":
+            out["ema"] = shared.ema(window)
+        elif name == "rsi":
+            gain, loss = shared.delta_parts()
+            # Differences of cumulative sums leave rounding residue; windows without losses must be exactly 0
+            avg_gain = np.where(_rolling_mean((gain > 0).astype(np.float64), window) == 0, 0.0, _rolling_mean(gain, window))
+            avg_loss = np.where(_rolling_mean((loss > 0).astype(np.float64), window) == 0, 0.0, _rolling_mean(loss, window))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rs = np.where(avg_loss == 0, np.nan, avg_gain / avg_loss)
+            out["rsi"] = 100 - (100 / (1 + rs))
+        elif name == "macd":
+            macd_line = shared.ema(fast) - shared.ema(slow)
+            signal_line = shared.ema_of(macd_line, signal, f"macd{fast},{slow}")
+            out["macd"] = {"macd": macd_line, "signal": signal_line, "hist": macd_line - signal_line}
+        elif name == "bollinger":
+            middle = shared.mean(bb_window)
+            std = shared.std(bb_window)
+            out["bollinger"] = {"middle": middle, "upper": middle + num_std * std, "lower": middle - num_std * std}
+        else:
+            raise ValueError(f"Unknown indicator: {name}")
+    return out
+
+
+def latest_values(result: Dict[str, object]) -> Dict[str, object]:
+    """Last value of every series in a compute_indicators result; NaN becomes None."""
+    def last(arr: np.ndarray) -> Optional[float]:
+        if not len(arr) or np.isnan(arr[-1]):
+            return None
+        return float(arr[-1])
+
+    return {
+        name: ({k: last(v) for k, v in val.items()} if isinstance(val, dict) else last(val))
+        for name, val in result.items()
+    }
+
+
+class IndicatorCache:
+    """Small LRU of engine results keyed by (symbol, interval, last candle ts, request params).
+
+    Values are opaque, so it also bounds other per-request state (rolling correlation sums).
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        val = self._data.get(key)
+        if val is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return val
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
@@ -0,0 +1,209 @@
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (price, size) as sent by the exchanges, usually strings
+Level = Sequence
+
+
+class BookSide:
+    """One side of an L2 book as sorted parallel NumPy arrays, best level first.
+
+    Prices are stored as sort keys (negated for bids) so both sides keep
+    ascending order and a level lookup is one ``searchsorted``. Inserts and
+    deletes shift the tail in place; the arrays grow by doubling and the
+    side is truncated to ``max_levels`` so far-away levels do not pile up.
+    """
+
+    def __init__(self, bids: bool, max_levels: int = 1000, capacity: int = 256):
+        self._sign = -1.0 if bids else 1.0
+        self.max_levels = max_levels
+        self._keys = np.empty(capacity)
+        self._sizes = np.empty(capacity)
+        self.n = 0
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self._keys[: self.n] * self._sign
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self._sizes[: self.n]
+
+    def _grow(self, need: int) -> None:
+        cap = len(self._keys)
+        while cap < need:
+            cap *= 2
+        keys, sizes = np.empty(cap), np.empty(cap)
+        keys[: self.n], sizes[: self.n] = self._keys[: self.n], self._sizes[: self.n]
+        self._keys, self._sizes = keys, sizes
+
+    def replace(self, levels: Iterable[Level]) -> None:
+        """Load a full snapshot, dropping empty levels."""
+        arr = np.array([(float(lv[0]), float(lv[1])) for lv in levels], dtype=np.float64).reshape(-1, 2)
+        arr = arr[arr[:, 1] > 0]
+        keys = arr[:, 0] * self._sign
+        order = np.argsort(keys, kind="stable")[: self.max_levels]
+        n = len(order)
+        if n > len(self._keys):
+            self._grow(n)
+        self._keys[:n] = keys[order]
+        self._sizes[:n] = arr[order, 1]
+        self.n = n
+
+    def set(self, price: float, size: float) -> None:
+        """Set the size at ``price``; size 0 removes the level."""
+        key = price * self._sign
+        n = self.n
+        i = int(np.searchsorted(self._keys[:n], key))
+        hit = i < n and self._keys[i] == key
+        if size <= 0:
+            if hit:
+                self._keys[i:n - 1] = self._keys[i + 1:n]
+                self._sizes[i:n - 1] = self._sizes[i + 1:n]
+                self.n = n - 1
+        elif hit:
+            self._sizes[i] = size
+        elif i < self.max_levels:
+            if n == len(self._keys):
+                self._grow(n + 1)
+            self._keys[i + 1:n + 1] = self._keys[i:n]
+            self._sizes[i + 1:n + 1] = self._sizes[i:n]
+            self._keys[i] = key
+            self._sizes[i] = size
+            self.n = min(n + 1, self.max_levels)
+
+    def apply(self, levels: Iterable[Level]) -> int:
+        count = 0
+        for lv in levels:
+            self.set(float(lv[0]), float(lv[1]))
+            count += 1
+        return count
+
+    def best(self) -> Optional[float]:
+        return float(self._keys[0] * self._sign) if self.n else None
+
+    def fill(self, notional: float) -> Tuple[float, float, int]:
+        """Walk the side for ``notional`` of quote currency: (base filled, quote filled, levels touched)."""
+        prices, sizes = self.prices, self.sizes
+        if not self.n or notional <= 0:
+            return 0.0, 0.0, 0
+        quote = np.cumsum(prices * sizes)
+        k = int(np.searchsorted(quote, notional))
+        if k >= self.n:
+            return float(sizes.sum()), float(quote[-1]), self.n
+        base_before = float(sizes[:k].sum())
+        quote_before = float(quote[k - 1]) if k else 0.0
+        return base_before + (notional - quote_before) / float(prices[k]), notional, k + 1
+
+    def levels(self, n: int) -> List[List[float]]:
+        return np.column_stack((self.prices[:n], self.sizes[:n])).tolist()
+
+
+class OrderBook:
+    """L2 order book for one (source, symbol), maintained from a snapshot plus diffs."""
+
+    def __init__(self, source: str, symbol: str, currency: str = "USDT", max_levels: int = 1000):
+        self.source = source
+        self.symbol = symbol
+        self.currency = currency
+        self.bids = BookSide(bids=True, max_levels=max_levels)
+        self.asks = BookSide(bids=False, max_levels=max_levels)
+        # Exchange sequence number of the last applied snapshot/diff, when the feed has one
+        self.update_id: Optional[int] = None
+        self.synced = False
+        self.ts = 0.0
+        self.updates = 0
+
+    def load_snapshot(self, bids: Iterable[Level], asks: Iterable[Level], update_id: Optional[int] = None,
+                      ts: Optional[float] = None) -> None:
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.update_id = update_id
+        self.synced = True
+        self.ts = ts if ts is not None else time.time()
+
+    def apply_diff(self, bids: Iterable[Level], asks: Iterable[Level], update_id: Optional[int] = None,
+                   ts: Optional[float] = None) -> None:
+        self.updates += self.bids.apply(bids) + self.asks.apply(asks)
+        if update_id is not None:
+            self.update_id = update_id
+        self.ts = ts if ts is not None else time.time()
+
+    def reset(self) -> None:
+        """Mark the book as out of sync until the next snapshot."""
+        self.synced = False
+        self.update_id = None
+
+    def effective_price(self, side: str, notional: float) -> Dict[str, object]:
+        """Volume-weighted price of buying (walking asks) or selling (walking bids) ``notional`` quote."""
+        if side not in ("buy", "sell"):
+            raise ValueError("side must be buy or sell")
+        book_side = self.asks if side == "buy" else self.bids
+        base, quote, used = book_side.fill(notional)
+        best = book_side.best()
+        avg = quote / base if base else None
+        slippage = None
+        if avg is not None and best:
+            # Positive = worse than the top of book
+            slippage = (avg / best - 1.0 if side == "buy" else 1.0 - avg / best) * 10_000
+        return {
+            "avg_price": avg,
+            "base_qty": base,
+            "filled_notional": quote,
+            "complete": bool(base) and quote >= notional * (1 - 1e-12),
+            "levels": used,
+            "worst_price": float(book_side.prices[used - 1]) if used else None,
+            "slippage_bps": slippage,
+        }
+
+    def summary(self, notional: float, levels: int = 0) -> Dict[str, object]:
+        bid, ask = self.bids.best(), self.asks.best()
+        mid = (bid + ask) / 2 if bid is not None and ask is not None else None
+        out: Dict[str, object] = {
+            "source": self.source,
+            "currency": self.currency,
+            "best_bid": bid,
+            "best_ask": ask,
+            "mid": mid,
+            "spread_bps": (ask - bid) / mid * 10_000 if mid else None,
+            "depth_levels": {"bids": self.bids.n, "asks": self.asks.n},
+            "buy": self.effective_price("buy", notional),
+            "sell": self.effective_price("sell", notional),
+            "age_s": round(time.time() - self.ts, 3) if self.ts else None,
+        }
+        if levels:
+            out["bids"] = self.bids.levels(levels)
+            out["asks"] = self.asks.levels(levels)
+        return out
+
+
+class OrderBookStore:
+    """Order books keyed by (source, symbol)."""
+
+    def __init__(self, max_levels: int = 1000):
+        self.max_levels = max_levels
+        self._books: Dict[Tuple[str, str], OrderBook] = {}
+
+    def book(self, source: str, symbol: str, currency: str = "USDT") -> OrderBook:
+        key = (source, symbol)
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = OrderBook(source, symbol, currency, self.max_levels)
+        return book
+
+    def get(self, source: str, symbol: str) -> Optional[OrderBook]:
+        return self._books.get((source, symbol))
+
+    def reset(self, source: str) -> None:
+        for (src, _), book in self._books.items():
+            if src == source:
+                book.reset()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "books": len(self._books),
+            "synced": sum(b.synced for b in self._books.values()),
+            "updates": sum(b.updates for b in self._books.values()),
+        }
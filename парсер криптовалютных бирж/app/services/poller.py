@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.services.stream import PriceBook
+
+logger = logging.getLogger(__name__)
+
+BulkFetch = Callable[[], Awaitable[Dict[str, Dict]]]
+PriceRow = Dict[str, object]
+
+
+class SourcePoller:
+    """Polls one exchange's bulk ticker endpoint on a fixed cadence.
+
+    Ticks are scheduled on a fixed grid plus random jitter, so pollers for
+    different exchanges do not fire in lockstep. A poll never overlaps the
+    previous one: when a poll overruns its interval, the missed ticks are
+    skipped instead of being fired back to back.
+    """
+
+    def __init__(self, source: str, fetch: BulkFetch, book: PriceBook, interval: float, jitter: float = 0.0,
+                 sink: Optional[Callable[[List[PriceRow]], Awaitable[None]]] = None):
+        self.source = source
+        self.fetch = fetch
+        self.book = book
+        self.interval = interval
+        self.jitter = jitter
+        self.sink = sink
+        self.polls = 0
+        self.errors = 0
+        self.overruns = 0
+        self.skipped_ticks = 0
+        self.last_duration = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_success: Optional[float] = None
+
+    async def poll_once(self) -> int:
+        prices = await self.fetch()
+        now = time.time()
+        rows: List[PriceRow] = []
+        stamp = datetime.fromtimestamp(now, tz=timezone.utc)
+        for sym, data in prices.items():
+            self.book.update(self.source, sym, data["price"], data.get("currency"), ts=now)
+            rows.append({"timestamp": stamp, "symbol": sym, "price": data["price"], "source": self.source})
+        self.last_success = now
+        if self.sink is not None and rows:
+            await self.sink(rows)
+        return len(rows)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            due = next_tick + random.uniform(0.0, self.jitter)
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            started = loop.time()
+            # Event loop lag: how late the poll starts relative to its (jittered) schedule
+            self.last_lag = max(started - due, 0.0)
+            self.max_lag = max(self.max_lag, self.last_lag)
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # noqa: BLE001
+                self.errors += 1
+                logger.debug("%s poll failed: %s", self.source, e)
+            self.polls += 1
+            finished = loop.time()
+            self.last_duration = finished - started
+            next_tick += self.interval
+            if finished > next_tick:
+                missed = int((finished - next_tick) // self.interval) + 1
+                self.overruns += 1
+                self.skipped_ticks += missed
+                next_tick += missed * self.interval
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "polls": self.polls,
+            "errors": self.errors,
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped_ticks,
+            "last_duration_ms": round(self.last_duration * 1000, 1),
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "age_s": round(time.time() - self.last_success, 1) if self.last_success else None,
+        }
+
+
+def start_pollers(fetchers: Dict[str, BulkFetch], book: PriceBook, interval: float, jitter: float,
+                  sink: Optional[Callable[[List[PriceRow]], Awaitable[None]]] = None):
+    """One SourcePoller task per exchange; returns ({source: poller}, [tasks])."""
+    pollers = {src: SourcePoller(src, fetch, book, interval, jitter, sink) for src, fetch in fetchers.items()}
+    tasks = [asyncio.create_task(p.run(), name=f"poll-{src}") for src, p in pollers.items()]
+    return pollers, tasks
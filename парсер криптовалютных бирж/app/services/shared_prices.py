@@ -0,0 +1,175 @@
+import sys
+import time
+import zlib
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_MAGIC = 0x43525950544F5031  # "CRYPTOP1"
+# Header words: magic, layout checksum, slot count, version (bumped on every publish)
+_HEADER = 4
+_CURRENCY_BYTES = 8
+
+Key = Tuple[str, str]
+
+SOURCES = ("binance", "bybit", "bitget", "coinbase")
+
+
+def _layout(keys: Sequence[Key]) -> int:
+    return zlib.crc32("|".join(f"{src}:{sym}" for src, sym in keys).encode())
+
+
+class SharedPriceTable:
+    """Latest price per (source, symbol) in a shared memory block: one writer process, many readers.
+
+    Slots are fixed by ``keys``, which every process derives from the same
+    configuration (a checksum in the header catches a mismatch). Each slot
+    is guarded by a seqlock: the writer makes its sequence odd, writes price,
+    timestamp and currency, then makes it even again; a reader retries when
+    it sees an odd or changed sequence, so it never returns a torn entry
+    and never blocks the writer.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, keys: Sequence[Key], owner: bool):
+        self.shm = shm
+        self.keys = list(keys)
+        self.owner = owner
+        self._index: Dict[Key, int] = {key: i for i, key in enumerate(self.keys)}
+        n = len(self.keys)
+        buf = shm.buf
+        self._header = np.ndarray((_HEADER,), dtype=np.uint64, buffer=buf)
+        offset = _HEADER * 8
+        self._seq = np.ndarray((n,), dtype=np.uint64, buffer=buf, offset=offset)
+        offset += n * 8
+        self._price = np.ndarray((n,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += n * 8
+        self._ts = np.ndarray((n,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += n * 8
+        self._currency = np.ndarray((n,), dtype=f"S{_CURRENCY_BYTES}", buffer=buf, offset=offset)
+        self.retries = 0
+
+    @staticmethod
+    def size(n_slots: int) -> int:
+        return _HEADER * 8 + n_slots * (24 + _CURRENCY_BYTES)
+
+    @classmethod
+    def create(cls, keys: Sequence[Key], name: Optional[str] = None) -> "SharedPriceTable":
+        keys = list(keys)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls.size(len(keys)))
+        table = cls(shm, keys, owner=True)
+        table._seq[:] = 0
+        table._price[:] = 0.0
+        table._ts[:] = 0.0
+        table._header[:] = (_MAGIC, _layout(keys), len(keys), 0)
+        return table
+
+    @classmethod
+    def attach(cls, name: str, keys: Sequence[Key]) -> "SharedPriceTable":
+        keys = list(keys)
+        # Attach from children of the creator (multiprocessing/uvicorn workers): before Python 3.13 every
+        # process registers the block with its resource tracker, and children share the creator's one,
+        # which then unlinks the block only if the creator dies without closing it
+        shm = shared_memory.SharedMemory(name=name, **({"track": False} if sys.version_info >= (3, 13) else {}))
+        if shm.size < _HEADER * 8:
+            shm.close()
+            raise ValueError(f"shared price table {name!r} is too small")
+        header = np.ndarray((_HEADER,), dtype=np.uint64, buffer=shm.buf)
+        magic, layout, n = int(header[0]), int(header[1]), int(header[2])
+        del header
+        if magic != _MAGIC or n != len(keys) or layout != _layout(keys):
+            shm.close()
+            raise ValueError(f"shared price table {name!r} has a different layout (symbols/sources differ)")
+        return cls(shm, keys, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def version(self) -> int:
+        return int(self._header[3])
+
+    def publish(self, item: Dict) -> bool:
+        """Write one PriceBook update; usable directly as a PriceBook listener. Single writer only."""
+        i = self._index.get((item["source"], item["symbol"]))
+        if i is None:
+            return False
+        seq = int(self._seq[i])
+        self._seq[i] = seq + 1
+        self._price[i] = item["price"]
+        self._ts[i] = item.get("ts") or time.time()
+        self._currency[i] = (item.get("currency") or "").encode()[:_CURRENCY_BYTES]
+        self._seq[i] = seq + 2
+        self._header[3] += 1
+        return True
+
+    def _read(self, i: int, spins: int = 100) -> Optional[Tuple[int, float, float, str]]:
+        for _ in range(spins):
+            seq = int(self._seq[i])
+            if seq & 1:
+                self.retries += 1
+                continue
+            price, ts, currency = float(self._price[i]), float(self._ts[i]), self._currency[i]
+            if int(self._seq[i]) == seq:
+                return seq, price, ts, currency.decode()
+            self.retries += 1
+        return None
+
+    def get(self, source: str, symbol: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """The entry as a price dict, or None when never written, older than ``max_age`` or contended."""
+        i = self._index.get((source, symbol))
+        if i is None:
+            return None
+        entry = self._read(i)
+        if entry is None or entry[0] == 0:
+            return None
+        _, price, ts, currency = entry
+        if max_age is not None and time.time() - ts > max_age:
+            return None
+        return {"symbol": symbol, "price": price, "source": source, "currency": currency or None, "ts": ts}
+
+    def changed(self, seen: np.ndarray) -> List[Dict]:
+        """Entries whose sequence differs from ``seen`` (updated in place); for mirroring into a PriceBook."""
+        items: List[Dict] = []
+        for i in np.flatnonzero(self._seq != seen):
+            entry = self._read(int(i))
+            if entry is None:
+                continue
+            seq, price, ts, currency = entry
+            seen[i] = seq
+            source, symbol = self.keys[i]
+            items.append({"symbol": symbol, "price": price, "source": source, "currency": currency or None, "ts": ts})
+        return items
+
+    def new_cursor(self) -> np.ndarray:
+        """A ``seen`` array for ``changed`` that reports every written entry on the first call."""
+        return np.zeros(len(self.keys), dtype=np.uint64)
+
+    def stats(self) -> Dict[str, object]:
+        now = time.time()
+        written = self._ts[self._seq > 0]
+        return {
+            "name": self.name,
+            "slots": len(self.keys),
+            "filled": int(written.size),
+            "version": self.version,
+            "oldest_s": round(float(now - written.min()), 1) if written.size else None,
+            "read_retries": self.retries,
+        }
+
+    def close(self) -> None:
+        # Drop the numpy views first: SharedMemory.close fails while buffers are exported
+        self._header = self._seq = self._price = self._ts = self._currency = None  # type: ignore[assignment]
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def table_keys(symbols: Iterable[str], sources: Iterable[str] = SOURCES) -> List[Key]:
+    """Slot layout shared by the launcher, the ingestion process and the API workers."""
+    symbols = list(symbols)
+    return [(src, sym) for src in sources for sym in symbols]
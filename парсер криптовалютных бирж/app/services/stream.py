@@ -0,0 +1,332 @@
+import asyncio
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import aiohttp
+
+from app.parsers.binance import SYMBOL_TO_BINANCE
+from app.parsers.bitget import SYMBOL_TO_BITGET
+from app.parsers.bybit import SYMBOL_TO_BYBIT
+from app.parsers.coinbase import SYMBOL_TO_COINBASE
+from app.utils.decoding import loads
+from app.utils.http import create_aiohttp_session
+from app.utils.symbols import SYMBOL_INDEX
+
+logger = logging.getLogger(__name__)
+
+PriceUpdate = Dict[str, object]
+
+
+class Subscription:
+    """Per-client view of the price book: symbol filter plus a bounded update queue."""
+
+    def __init__(self, symbols: Optional[Iterable[str]] = None, maxsize: int = 256):
+        # None follows every symbol; an empty filter (nothing valid requested) follows none
+        self.symbols: Optional[Set[str]] = {s.upper() for s in symbols} if symbols is not None else None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, symbol: str) -> bool:
+        return self.symbols is None or symbol in self.symbols
+
+    def offer(self, update: PriceUpdate) -> None:
+        # Slow clients lose the oldest updates instead of stalling the feed
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(update)
+
+
+class PriceBook:
+    """Latest price per (source, symbol), fanned out to subscribers and listeners."""
+
+    def __init__(self) -> None:
+        self._prices: Dict[Tuple[str, str], PriceUpdate] = {}
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: List[Callable[[PriceUpdate], None]] = []
+        self.updates = 0
+
+    def update(self, source: str, symbol: str, price: float, currency: Optional[str] = None,
+               ts: Optional[float] = None) -> None:
+        item: PriceUpdate = {
+            "symbol": symbol,
+            "price": price,
+            "source": source,
+            "currency": currency,
+            "ts": ts if ts is not None else time.time(),
+        }
+        self._prices[(source, symbol)] = item
+        self.updates += 1
+        for listener in self._listeners:
+            try:
+                listener(item)
+            except Exception:  # noqa: BLE001
+                logger.exception("Price listener failed")
+        for sub in self._subscribers:
+            if sub.wants(symbol):
+                sub.offer(item)
+
+    def get(self, source: str, symbol: str) -> Optional[PriceUpdate]:
+        return self._prices.get((source, symbol))
+
+    def snapshot(self, symbols: Optional[Set[str]] = None) -> List[PriceUpdate]:
+        return [p for (_, sym), p in self._prices.items() if symbols is None or sym in symbols]
+
+    def add_listener(self, listener: Callable[[PriceUpdate], None]) -> None:
+        self._listeners.append(listener)
+
+    def subscribe(self, symbols: Optional[Iterable[str]] = None, maxsize: int = 256) -> Subscription:
+        sub = Subscription(symbols, maxsize=maxsize)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._prices),
+            "subscribers": len(self._subscribers),
+            "updates": self.updates,
+        }
+
+
+class WebSocketFeed(ABC):
+    """Reconnecting WebSocket client for one exchange, with jittered exponential backoff.
+
+    Subclasses provide the URL, subscribe messages and ``handle`` for each
+    text frame; ``url`` can be overridden to point at a local fake server.
+    """
+
+    source = ""
+    currency = "USDT"
+    default_url = ""
+    mapping: Dict[str, Optional[str]] = {}
+    # Application-level ping (text or JSON-able), sent every ping_interval seconds
+    ping_message: Optional[object] = None
+    ping_interval = 20.0
+
+    def __init__(self, symbols: Iterable[str], url: Optional[str] = None, max_backoff: float = 60.0,
+                 min_backoff: float = 1.0):
+        self.pairs: Dict[str, str] = {}
+        for sym in symbols:
+            native = SYMBOL_INDEX.native(self.source, sym.upper(), self.mapping)
+            if native:
+                self.pairs[native] = sym.upper()
+        self.url = url or self.default_url
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.messages = 0
+        self.bad_frames = 0
+        self.reconnects = 0
+        self._task: Optional[asyncio.Task] = None
+        self._outbox: List[object] = []
+
+    def build_url(self) -> str:
+        return self.url
+
+    def subscribe_messages(self) -> List[object]:
+        return []
+
+    def on_connect(self) -> None:
+        """Called after every (re)connect, before subscribing."""
+
+    def send(self, message: object) -> None:
+        """Queue a JSON message from ``handle``; sent right after the current frame is processed."""
+        self._outbox.append(message)
+
+    @abstractmethod
+    def handle(self, raw: str) -> int:
+        """Process one text frame; returns the number of updates applied."""
+
+    async def _pinger(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            if isinstance(self.ping_message, str):
+                await ws.send_str(self.ping_message)
+            else:
+                await ws.send_json(self.ping_message)
+
+    async def run(self) -> None:
+        if not self.pairs:
+            return
+        backoff = self.min_backoff
+        async with create_aiohttp_session() as session:
+            while True:
+                pinger: Optional[asyncio.Task] = None
+                try:
+                    async with session.ws_connect(self.build_url(), heartbeat=30) as ws:
+                        self.connected = True
+                        backoff = self.min_backoff
+                        self._outbox.clear()
+                        self.on_connect()
+                        for m in self.subscribe_messages():
+                            await ws.send_json(m)
+                        if self.ping_message is not None:
+                            pinger = asyncio.create_task(self._pinger(ws))
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                self.messages += 1
+                                try:
+                                    self.handle(msg.data)
+                                except Exception as e:  # noqa: BLE001
+                                    # One malformed frame must not cost every symbol a reconnect
+                                    self.bad_frames += 1
+                                    logger.warning("%s: dropped malformed frame: %s", self.source, e)
+                                while self._outbox:
+                                    await ws.send_json(self._outbox.pop(0))
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:  # noqa: BLE001
+                    logger.warning("%s stream error: %s", self.source, e)
+                finally:
+                    self.connected = False
+                    if pinger is not None:
+                        pinger.cancel()
+                self.reconnects += 1
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name=f"stream-{self.source}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {"connected": self.connected, "messages": self.messages, "bad_frames": self.bad_frames,
+                "reconnects": self.reconnects}
+
+
+class ExchangeStream(WebSocketFeed):
+    """Ticker stream feeding a PriceBook; subclasses parse the exchange's ticker messages."""
+
+    def __init__(self, book: PriceBook, symbols: Iterable[str], url: Optional[str] = None,
+                 max_backoff: float = 60.0, min_backoff: float = 1.0):
+        super().__init__(symbols, url=url, max_backoff=max_backoff, min_backoff=min_backoff)
+        self.book = book
+
+    @abstractmethod
+    def parse(self, msg: object) -> Iterable[Tuple[str, float]]:
+        """Yield (native pair, price) tuples from one decoded message."""
+
+    def handle(self, raw: str) -> int:
+        """Decode one text frame and push any prices into the book; returns the number of updates."""
+        try:
+            msg = loads(raw)
+        except ValueError:
+            return 0  # e.g. plain-text "pong"
+        count = 0
+        for native, price in self.parse(msg):
+            sym = self.pairs.get(native)
+            if sym is not None:
+                self.book.update(self.source, sym, price, self.currency)
+                count += 1
+        return count
+
+
+class BinanceStream(ExchangeStream):
+    source = "binance"
+    default_url = "wss://stream.binance.com:9443/stream"
+    mapping = SYMBOL_TO_BINANCE
+
+    def build_url(self) -> str:
+        streams = "/".join(f"{pair.lower()}@miniTicker" for pair in self.pairs)
+        return f"{self.url}?streams={streams}"
+
+    def parse(self, msg: object) -> Iterable[Tuple[str, float]]:
+        data = msg.get("data", msg) if isinstance(msg, dict) else None
+        if isinstance(data, dict) and "s" in data and "c" in data:
+            yield data["s"], float(data["c"])
+
+
+class BybitStream(ExchangeStream):
+    source = "bybit"
+    default_url = "wss://stream.bybit.com/v5/public/linear"
+    mapping = SYMBOL_TO_BYBIT
+    ping_message = {"op": "ping"}
+
+    def subscribe_messages(self) -> List[object]:
+        topics = [f"tickers.{pair}" for pair in self.pairs]
+        # Bybit caps args per subscribe request
+        return [{"op": "subscribe", "args": topics[i:i + 10]} for i in range(0, len(topics), 10)]
+
+    def parse(self, msg: object) -> Iterable[Tuple[str, float]]:
+        if not isinstance(msg, dict) or not str(msg.get("topic", "")).startswith("tickers."):
+            return
+        data = msg.get("data") or {}
+        # Deltas only carry changed fields; skip those without a last price
+        price = data.get("lastPrice")
+        if price is not None:
+            yield data.get("symbol") or msg["topic"].split(".", 1)[1], float(price)
+
+
+class BitgetStream(ExchangeStream):
+    source = "bitget"
+    default_url = "wss://ws.bitget.com/v2/ws/public"
+    mapping = SYMBOL_TO_BITGET
+    ping_message = "ping"
+    ping_interval = 25.0
+
+    def subscribe_messages(self) -> List[object]:
+        args = [{"instType": "SPOT", "channel": "ticker", "instId": pair} for pair in self.pairs]
+        return [{"op": "subscribe", "args": args}]
+
+    def parse(self, msg: object) -> Iterable[Tuple[str, float]]:
+        if not isinstance(msg, dict) or (msg.get("arg") or {}).get("channel") != "ticker":
+            return
+        for item in msg.get("data") or []:
+            price = item.get("lastPr") or item.get("last")
+            inst = item.get("instId") or (msg.get("arg") or {}).get("instId")
+            if price is not None and inst:
+                yield inst, float(price)
+
+
+class CoinbaseStream(ExchangeStream):
+    source = "coinbase"
+    currency = "USD"
+    default_url = "wss://ws-feed.exchange.coinbase.com"
+    mapping = SYMBOL_TO_COINBASE
+
+    def subscribe_messages(self) -> List[object]:
+        return [{"type": "subscribe", "product_ids": list(self.pairs), "channels": ["ticker"]}]
+
+    def parse(self, msg: object) -> Iterable[Tuple[str, float]]:
+        if isinstance(msg, dict) and msg.get("type") == "ticker" and msg.get("price") is not None:
+            yield msg.get("product_id"), float(msg["price"])
+
+
+STREAM_CLASSES = {
+    "binance": BinanceStream,
+    "bybit": BybitStream,
+    "bitget": BitgetStream,
+    "coinbase": CoinbaseStream,
+}
+
+
+def start_streams(book: PriceBook, symbols: Iterable[str], urls: Optional[Dict[str, str]] = None) -> Dict[str, ExchangeStream]:
+    """Create and start one stream per exchange on the running loop."""
+    symbols = list(symbols)
+    streams: Dict[str, ExchangeStream] = {}
+    for name, cls in STREAM_CLASSES.items():
+        stream = cls(book, symbols, url=(urls or {}).get(name) or None)
+        stream.start()
+        streams[name] = stream
+    return streams
+
+
+async def stop_streams(streams: Dict[str, ExchangeStream]) -> None:
+    await asyncio.gather(*(s.stop() for s in streams.values()), return_exceptions=True)
@@ -0,0 +1,181 @@
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+_NAN = float("nan")
+
+
+class RunningEMA:
+    """EMA with adjust=False semantics: seeded with the first sample."""
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = _NAN
+        self.count = 0
+
+    def update(self, x: float) -> float:
+        if self.count == 0:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        self.count += 1
+        return self.value
+
+
+class RollingWindow:
+    """Fixed-size ring buffer with running mean and sample variance (Welford, add/remove form)."""
+
+    # Recompute moments from the buffer every N replacements to cancel rounding drift
+    _RESYNC_EVERY = 4096
+
+    def __init__(self, window: int):
+        self.window = window
+        self._buf = np.zeros(window, dtype=np.float64)
+        self._pos = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._since_resync = 0
+        # Non-zero samples in the window; an all-zero window has a mean of exactly 0
+        self._nonzero = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.window
+
+    def update(self, x: float) -> None:
+        if self.count < self.window:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (x - self.mean)
+        else:
+            old = self._buf[self._pos]
+            self._nonzero -= int(old != 0)
+            old_mean = self.mean
+            self.mean += (x - old) / self.window
+            self._m2 += (x - old) * (x - self.mean + old - old_mean)
+            self._since_resync += 1
+        self._nonzero += int(x != 0)
+        self._buf[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        if self._since_resync >= self._RESYNC_EVERY:
+            self.mean = float(self._buf.mean())
+            self._m2 = float(((self._buf - self.mean) ** 2).sum())
+            self._since_resync = 0
+
+    def sma(self) -> float:
+        if not self.full:
+            return _NAN
+        return self.mean if self._nonzero else 0.0
+
+    def std(self) -> float:
+        if not self.full or self.window < 2:
+            return _NAN
+        return math.sqrt(max(self._m2, 0.0) / (self.window - 1))
+
+
+class RunningRSI:
+    """RSI over rolling means of gains and losses, mirroring compute_rsi.
+
+    compute_rsi averages gains/losses with a simple rolling mean rather than
+    Wilder smoothing, so this keeps two rolling windows to stay identical.
+    """
+
+    def __init__(self, period: int = 14):
+        self._gains = RollingWindow(period)
+        self._losses = RollingWindow(period)
+        self._prev: Optional[float] = None
+        self.value = _NAN
+
+    def update(self, x: float) -> float:
+        delta = x - self._prev if self._prev is not None else 0.0
+        self._prev = x
+        self._gains.update(delta if delta > 0 else 0.0)
+        self._losses.update(-delta if delta < 0 else 0.0)
+        avg_gain, avg_loss = self._gains.sma(), self._losses.sma()
+        if math.isnan(avg_loss) or avg_loss == 0:
+            self.value = _NAN
+        else:
+            self.value = 100 - 100 / (1 + avg_gain / avg_loss)
+        return self.value
+
+
+class RunningMACD:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = RunningEMA(fast)
+        self._slow = RunningEMA(slow)
+        self._signal = RunningEMA(signal)
+        self.macd = self.signal = self.hist = _NAN
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        self.macd = self._fast.update(x) - self._slow.update(x)
+        self.signal = self._signal.update(self.macd)
+        self.hist = self.macd - self.signal
+        return self.macd, self.signal, self.hist
+
+
+class RunningBollinger:
+    def __init__(self, window: int = 20, num_std: float = 2.0):
+        self._win = RollingWindow(window)
+        self.num_std = num_std
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        self._win.update(x)
+        middle, std = self._win.sma(), self._win.std()
+        return middle, middle + self.num_std * std, middle - self.num_std * std
+
+
+class IndicatorState:
+    """All streaming indicators for one price series, O(1) per sample."""
+
+    def __init__(self, window: int = 14, fast: int = 12, slow: int = 26, signal: int = 9,
+                 bb_window: int = 20, num_std: float = 2.0):
+        self._sma = RollingWindow(window)
+        self._ema = RunningEMA(window)
+        self._rsi = RunningRSI(window)
+        self._macd = RunningMACD(fast, slow, signal)
+        self._bollinger = RunningBollinger(bb_window, num_std)
+        self.samples = 0
+        self.last: Dict[str, object] = {}
+
+    def update(self, x: float) -> Dict[str, object]:
+        self._sma.update(x)
+        macd, signal, hist = self._macd.update(x)
+        middle, upper, lower = self._bollinger.update(x)
+        self.samples += 1
+        self.last = {
+            "sma": self._sma.sma(),
+            "ema": self._ema.update(x),
+            "rsi": self._rsi.update(x),
+            "macd": {"macd": macd, "signal": signal, "hist": hist},
+            "bollinger": {"middle": middle, "upper": upper, "lower": lower},
+        }
+        return self.last
+
+
+def _clean(val: object) -> object:
+    if isinstance(val, dict):
+        return {k: _clean(v) for k, v in val.items()}
+    return None if isinstance(val, float) and math.isnan(val) else val
+
+
+class LiveIndicators:
+    """IndicatorState per (source, symbol), fed with every newly fetched or streamed price."""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+
+    def feed(self, source: str, symbol: str, price: float) -> None:
+        state = self._states.get((source, symbol))
+        if state is None:
+            state = self._states[(source, symbol)] = IndicatorState(self.window)
+        state.update(float(price))
+
+    def get(self, source: str, symbol: str) -> Optional[Dict[str, object]]:
+        state = self._states.get((source, symbol))
+        if state is None:
+            return None
+        return {**_clean(state.last), "samples": state.samples}
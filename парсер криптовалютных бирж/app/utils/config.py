@@ -4,10 +4,104 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./crypto.db")
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"
 BINANCE_API_KEY = os.getenv("BINANCE_API_KEY", "")
 SUPPORTED_SYMBOLS = os.getenv(
     "SUPPORTED_SYMBOLS",
     "BTC,ETH,BNB,ADA,XRP,SOL,DOT,DOGE,AVAX,MATIC",
 ).split(",")
 
+# Ticker snapshot cache (seconds)
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "2"))
+PRICE_CACHE_STALE_TTL = float(os.getenv("PRICE_CACHE_STALE_TTL", "10"))
+# Cache-Control max-age (seconds) on price JSON responses
+PRICE_HTTP_MAX_AGE = float(os.getenv("PRICE_HTTP_MAX_AGE", os.getenv("PRICE_CACHE_TTL", "2")))
 
+# Exchange WebSocket ticker streams (URLs can point to a local fake server)
+PRICE_STREAM_ENABLED = os.getenv("PRICE_STREAM_ENABLED", "1") == "1"
+STREAM_URLS = {
+    "binance": os.getenv("BINANCE_WS_URL", ""),
+    "bybit": os.getenv("BYBIT_WS_URL", ""),
+    "bitget": os.getenv("BITGET_WS_URL", ""),
+    "coinbase": os.getenv("COINBASE_WS_URL", ""),
+}
+
+# Multi-worker mode (python -m app.launcher): shared-memory price table written by the ingestion process.
+# The launcher sets the name; workers serve entries up to MAX_AGE seconds old and mirror updates every SYNC_MS
+SHARED_PRICES_NAME = os.getenv("SHARED_PRICES_NAME", "")
+SHARED_PRICES_MAX_AGE = float(os.getenv("SHARED_PRICES_MAX_AGE", "10"))
+SHARED_PRICES_SYNC_MS = float(os.getenv("SHARED_PRICES_SYNC_MS", "50"))
+
+# Hot JSON endpoints skip response_model validation and encode precomputed dicts directly
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", "0") == "1"
+
+# /metrics: how often the event loop lag probe wakes up (seconds)
+METRICS_LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+
+# Exchange REST base URLs (empty = the real exchange; e.g. the benchmark fake server)
+API_URLS = {
+    "binance": os.getenv("BINANCE_API_URL", ""),
+    "bybit": os.getenv("BYBIT_API_URL", ""),
+    "bitget": os.getenv("BITGET_API_URL", ""),
+    "coinbase": os.getenv("COINBASE_API_URL", ""),
+    "coinbase_exchange": os.getenv("COINBASE_EXCHANGE_URL", ""),
+}
+
+# L2 order books from exchange depth streams (same WS URLs as the ticker streams); levels kept per side
+DEPTH_STREAM_ENABLED = os.getenv("DEPTH_STREAM_ENABLED", "1") == "1"
+DEPTH_LEVELS = int(os.getenv("DEPTH_LEVELS", "1000"))
+# A streamed book older than this is not trusted; the endpoint falls back to a REST snapshot
+DEPTH_MAX_AGE = float(os.getenv("DEPTH_MAX_AGE", "10"))
+
+# Optional Parquet candle archive (requires pyarrow)
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "0") == "1"
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./data/archive")
+ARCHIVE_COMPACT_INTERVAL = float(os.getenv("ARCHIVE_COMPACT_INTERVAL", "3600"))
+
+# Hedged requests for source=auto: off | delay | immediate
+HEDGE_MODE = os.getenv("HEDGE_MODE", "delay").lower()
+HEDGE_DELAY_MS = float(os.getenv("HEDGE_DELAY_MS", "300"))
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+
+# Per-exchange circuit breaker: open after N consecutive failures, probe again after the timeout
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# Shared outbound HTTP pool
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "200"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "50"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+HTTP_USE_AIODNS = os.getenv("HTTP_USE_AIODNS", "1") == "1"
+
+# Symbol universe discovered from the exchanges' instrument lists, persisted for offline cold starts
+SYMBOLS_DISCOVERY_ENABLED = os.getenv("SYMBOLS_DISCOVERY_ENABLED", "1") == "1"
+SYMBOLS_FILE = os.getenv("SYMBOLS_FILE", "./data/symbols.json")
+SYMBOLS_REFRESH_INTERVAL = float(os.getenv("SYMBOLS_REFRESH_INTERVAL", "21600"))
+
+# Learned ticker endpoint per symbol (Bitget/Bybit), persisted across restarts
+ROUTES_DIR = os.getenv("ROUTES_DIR", "./data/routes")
+ROUTE_RACE_STAGGER_MS = float(os.getenv("ROUTE_RACE_STAGGER_MS", "100"))
+
+# Background bulk price poller (seconds); writes every poll to the prices table
+POLL_ENABLED = os.getenv("POLL_ENABLED", "1") == "1"
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "2"))
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.2"))
+POLL_STORE_PRICES = os.getenv("POLL_STORE_PRICES", "1") == "1"
+# Rows of the prices table older than this are deleted every PRUNE_INTERVAL seconds (0 = keep forever)
+PRICES_RETENTION_HOURS = float(os.getenv("PRICES_RETENTION_HOURS", "72"))
+PRICES_PRUNE_INTERVAL = float(os.getenv("PRICES_PRUNE_INTERVAL", "600"))
+
+# Async batched writer for the prices table: flush every N rows or T ms, bounded queue
+DB_WRITE_BATCH = int(os.getenv("DB_WRITE_BATCH", "1000"))
+DB_WRITE_INTERVAL_MS = float(os.getenv("DB_WRITE_INTERVAL_MS", "200"))
+DB_WRITE_QUEUE = int(os.getenv("DB_WRITE_QUEUE", "100000"))
+
+# history?mode=lttb: pick a rollup level with up to max_points * N bars before downsampling
+HISTORY_LTTB_OVERSAMPLE = int(os.getenv("HISTORY_LTTB_OVERSAMPLE", "8"))
+
+# Cross-exchange arbitrage scanner: top-K spreads, taker fee per leg, quote freshness, WS push throttle
+ARBITRAGE_TOP_K = int(os.getenv("ARBITRAGE_TOP_K", "10"))
+ARBITRAGE_FEE_BPS = float(os.getenv("ARBITRAGE_FEE_BPS", "10"))
+ARBITRAGE_MAX_AGE = float(os.getenv("ARBITRAGE_MAX_AGE", "30"))
+ARBITRAGE_WS_INTERVAL_MS = float(os.getenv("ARBITRAGE_WS_INTERVAL_MS", "250"))
@@ -0,0 +1,110 @@
+import json
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+
+try:
+    import msgspec  # type: ignore
+except Exception:  # pragma: no cover
+    msgspec = None
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
+if msgspec is not None:
+    BACKEND = "msgspec"
+    _json_decoder = msgspec.json.Decoder()
+    loads = _json_decoder.decode
+elif orjson is not None:
+    BACKEND = "orjson"
+    loads = orjson.loads
+else:
+    BACKEND = "json"
+    loads = json.loads
+
+
+_DECODERS: Dict[str, Any] = {}
+
+if msgspec is not None:
+    _Num = Optional[Union[str, float]]
+
+    class _Item(msgspec.Struct):
+        """Struct readable like the dicts the parsers already handle (``item.get(key)``, ``item[key]``)."""
+
+        def get(self, key: str, default: Any = None) -> Any:
+            return getattr(self, key, default)
+
+        def __getitem__(self, key: str) -> Any:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+
+    # Only the fields the parsers read are declared; everything else is skipped while decoding
+
+    class BinanceTicker(_Item):
+        symbol: str
+        price: str
+
+    class BybitTicker(_Item):
+        symbol: str = ""
+        lastPrice: _Num = None
+        markPrice: _Num = None
+        bid1Price: _Num = None
+        ask1Price: _Num = None
+
+    class BybitResult(_Item):
+        list: List[BybitTicker] = []
+
+    class BybitTickers(_Item):
+        retCode: int = 0
+        result: BybitResult = msgspec.field(default_factory=BybitResult)
+
+    class BitgetTicker(_Item):
+        # Every key bitget._extract_price falls back to, in its order
+        symbol: str = ""
+        instId: str = ""
+        lastPr: _Num = None
+        close: _Num = None
+        last: _Num = None
+        markPr: _Num = None
+        markPrice: _Num = None
+        bidPr: _Num = None
+        askPr: _Num = None
+        bestBid: _Num = None
+        bestAsk: _Num = None
+        buyOne: _Num = None
+        sellOne: _Num = None
+        bid1Price: _Num = None
+        ask1Price: _Num = None
+
+    class BitgetTickers(_Item):
+        data: Optional[List[BitgetTicker]] = None
+
+    _DECODERS.update(
+        binance_tickers=msgspec.json.Decoder(List[BinanceTicker]),
+        bybit_tickers=msgspec.json.Decoder(BybitTickers),
+        bitget_tickers=msgspec.json.Decoder(BitgetTickers),
+    )
+
+
+def decode(raw: Union[bytes, str], schema: Optional[str] = None) -> Any:
+    """Decode JSON, straight into typed ticker structs when ``schema`` is known and msgspec is installed.
+
+    Without msgspec (or when the payload does not match the schema, e.g. an
+    error envelope) this returns plain dicts/lists, which the parsers read
+    the same way.
+    """
+    decoder = _DECODERS.get(schema) if schema else None
+    if decoder is not None:
+        try:
+            return decoder.decode(raw)
+        except msgspec.ValidationError:
+            pass
+    return loads(raw)
+
+
+async def read_json(resp: aiohttp.ClientResponse, schema: Optional[str] = None) -> Any:
+    return decode(await resp.read(), schema)
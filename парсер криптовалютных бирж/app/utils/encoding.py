@@ -0,0 +1,65 @@
+import json
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+try:
+    import msgspec  # type: ignore
+except Exception:  # pragma: no cover
+    msgspec = None
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    # numpy scalars (candle values, order book sums) are not plain floats/ints to every encoder
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if msgspec is not None:
+    BACKEND = "msgspec"
+    dumps = msgspec.json.Encoder(enc_hook=_default).encode
+elif orjson is not None:
+    BACKEND = "orjson"
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+else:
+    BACKEND = "json"
+
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded in one call from plain dicts/lists (and msgspec structs with msgspec installed).
+
+    Returning it from an endpoint skips FastAPI's ``response_model``
+    validation and ``jsonable_encoder`` pass, so the payload must already
+    have the model's shape (see ``check_payload``).
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def check_payload(model: Any, payload: Any) -> None:
+    """Raise ValueError unless ``payload`` encodes exactly as FastAPI would encode it through ``model``.
+
+    ``model`` is a pydantic model class or a type such as ``List[Model]``;
+    meant for startup and tests, not the request path.
+    """
+    adapter = TypeAdapter(model)
+    expected = json.loads(adapter.dump_json(adapter.validate_python(payload)))
+    actual = json.loads(dumps(payload))
+    if actual != expected:
+        raise ValueError(f"fast payload differs from {model}: {actual!r} != {expected!r}")
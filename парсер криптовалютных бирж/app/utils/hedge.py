@@ -0,0 +1,88 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Recent upstream latencies per source in a bounded window."""
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, source: str, seconds: float) -> None:
+        samples = self._samples.get(source)
+        if samples is None:
+            samples = self._samples[source] = deque(maxlen=self.size)
+        samples.append(seconds)
+
+    def percentile(self, source: str, q: float, min_samples: int = 10) -> Optional[float]:
+        samples = self._samples.get(source)
+        if not samples or len(samples) < min_samples:
+            return None
+        return float(np.percentile(np.fromiter(samples, dtype=np.float64, count=len(samples)), q))
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {
+            src: {
+                "samples": len(samples),
+                "p50": self.percentile(src, 50, 1),
+                "p95": self.percentile(src, 95, 1),
+                "p99": self.percentile(src, 99, 1),
+            }
+            for src, samples in self._samples.items()
+        }
+
+
+class HedgedCallError(Exception):
+    def __init__(self, errors: Dict[str, BaseException]):
+        super().__init__("; ".join(f"{s}: {e}" for s, e in errors.items()) or "All sources failed")
+        self.errors = errors
+
+
+async def hedged_call(sources: List[str], call: Callable[[str], Awaitable[T]],
+                      delay: Callable[[str], float]) -> Tuple[str, T]:
+    """Return the first successful ``call(source)``, starting backups as needed.
+
+    ``sources[0]`` starts immediately. If no call has succeeded after
+    ``delay(last started source)`` seconds, or a call fails, the next source
+    is started. The remaining calls are cancelled once one succeeds; a call
+    that waits on a shared TickerCache load cancels only its own wait, and
+    the load stops when no other request is waiting on it.
+    """
+    pending: Dict[asyncio.Task, str] = {}
+    errors: Dict[str, BaseException] = {}
+    queue = list(sources)
+
+    def launch() -> Optional[str]:
+        if not queue:
+            return None
+        src = queue.pop(0)
+        pending[asyncio.ensure_future(call(src))] = src
+        return src
+
+    try:
+        last = launch()
+        while pending:
+            timeout = delay(last) if queue else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                last = launch()  # hedge: primary is slow
+                continue
+            for task in done:
+                src = pending.pop(task)
+                exc = task.exception()
+                if exc is None:
+                    return src, task.result()
+                errors[src] = exc
+            if queue:
+                # Failed fast: start the next source without waiting out the hedge delay
+                last = launch()
+        raise HedgedCallError(errors)
+    finally:
+        for task in pending:
+            task.cancel()
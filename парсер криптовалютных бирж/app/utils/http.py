@@ -1,28 +1,112 @@
 import ssl
-from typing import Optional, Dict
+from functools import lru_cache
+from typing import Optional, Dict, List
 
 import aiohttp
 
+from app.utils.config import (
+    HTTP_DNS_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_USE_AIODNS,
+)
+
 try:
     import certifi  # type: ignore
 except Exception:  # pragma: no cover
     certifi = None
 
+try:
+    import aiodns  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    aiodns = None
+
+# Shared by every verified session; created lazily inside the running loop
+_connector: Optional[aiohttp.TCPConnector] = None
+
+
+@lru_cache(maxsize=1)
+def ssl_context() -> ssl.SSLContext:
+    """Verified SSL context, built once (loading the CA bundle is the expensive part)."""
+    if certifi is not None:
+        return ssl.create_default_context(cafile=certifi.where())
+    return ssl.create_default_context()
+
+
+def create_connector(verify: bool = True) -> aiohttp.TCPConnector:
+    """TCP connector tuned for many small requests to a handful of hosts.
+
+    aiohttp speaks HTTP/1.1 without pipelining, so throughput comes from
+    keep-alive reuse and ``limit_per_host`` parallel connections instead.
+    """
+    resolver = aiohttp.AsyncResolver() if HTTP_USE_AIODNS and aiodns is not None else None
+    return aiohttp.TCPConnector(
+        ssl=ssl_context() if verify else False,
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        use_dns_cache=True,
+        ttl_dns_cache=HTTP_DNS_TTL,
+        resolver=resolver,
+    )
+
+
+def shared_connector() -> aiohttp.TCPConnector:
+    global _connector
+    if _connector is None or _connector.closed:
+        _connector = create_connector()
+    return _connector
+
+
+async def close_shared_connector() -> None:
+    global _connector
+    if _connector is not None and not _connector.closed:
+        await _connector.close()
+    _connector = None
 
-def create_aiohttp_session(headers: Optional[Dict[str, str]] = None, verify: bool = True) -> aiohttp.ClientSession:
-    """Create aiohttp session with SSL context based on certifi if available.
+
+def pool_stats() -> Dict[str, object]:
+    """Open/idle/acquired connections of the shared pool, per host and in total."""
+    conn = _connector
+    if conn is None or conn.closed:
+        return {"open": 0, "idle": 0, "acquired": 0, "limit": HTTP_POOL_LIMIT,
+                "limit_per_host": HTTP_POOL_LIMIT_PER_HOST, "hosts": {}}
+    hosts: Dict[str, Dict[str, int]] = {}
+    idle = 0
+    acquired_total = 0
+    # aiohttp exposes no pool counters, so these come from private attributes; zeros if their shape changes
+    try:
+        for key, conns in getattr(conn, "_conns", {}).items():
+            hosts.setdefault(key.host, {"idle": 0, "acquired": 0})["idle"] += len(conns)
+            idle += len(conns)
+        for key, acquired in getattr(conn, "_acquired_per_host", {}).items():
+            hosts.setdefault(key.host, {"idle": 0, "acquired": 0})["acquired"] += len(acquired)
+        acquired_total = len(getattr(conn, "_acquired", ()))
+    except Exception:  # noqa: BLE001
+        hosts, idle, acquired_total = {}, 0, 0
+    return {
+        "open": idle + acquired_total,
+        "idle": idle,
+        "acquired": acquired_total,
+        "limit": conn.limit,
+        "limit_per_host": conn.limit_per_host,
+        "hosts": hosts,
+    }
+
+
+def create_aiohttp_session(headers: Optional[Dict[str, str]] = None, verify: bool = True,
+                           trace_configs: Optional[List[aiohttp.TraceConfig]] = None) -> aiohttp.ClientSession:
+    """Create aiohttp session on the shared connection pool.
 
     Args:
         headers: Optional default headers
-        verify: Whether to verify SSL certs
+        verify: Whether to verify SSL certs (unverified sessions get a private pool)
+        trace_configs: Optional request hooks (e.g. a rate limiter)
     """
     if not verify:
-        connector = aiohttp.TCPConnector(ssl=False)
-        return aiohttp.ClientSession(headers=headers or {}, connector=connector)
-
-    if certifi is not None:
-        ctx = ssl.create_default_context(cafile=certifi.where())
-    else:
-        ctx = ssl.create_default_context()
-    connector = aiohttp.TCPConnector(ssl=ctx)
-    return aiohttp.ClientSession(headers=headers or {}, connector=connector)
+        return aiohttp.ClientSession(headers=headers or {}, connector=create_connector(verify=False),
+                                     trace_configs=trace_configs)
+    # Closing a session must not close the pool other sessions share
+    return aiohttp.ClientSession(headers=headers or {}, connector=shared_connector(), connector_owner=False,
+                                 trace_configs=trace_configs)
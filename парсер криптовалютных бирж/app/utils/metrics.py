@@ -0,0 +1,249 @@
+import asyncio
+import re
+import time
+from bisect import bisect_left
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import aiohttp
+import yarl
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, k)} {_num(v)}" for k, v in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, k)} {_num(v)}" for k, v in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; ``observe`` is one bisect and two additions per sample."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last = +Inf), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bounds = self.buckets + (float("inf"),)
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = 'le="' + _num(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics plus scrape-time collectors, rendered in the Prometheus text format (0.0.4)."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        """``collector`` builds fresh metrics from other components' state at every scrape."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_DURATION = REGISTRY.register(Histogram(
+    "crypto_http_request_duration_seconds", "API request latency by route template.", ("method", "route", "status"),
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge("crypto_http_requests_in_flight", "API requests being served."))
+UPSTREAM_DURATION = REGISTRY.register(Histogram(
+    "crypto_upstream_request_duration_seconds", "Exchange REST request latency by endpoint.",
+    ("exchange", "endpoint", "status"),
+))
+UPSTREAM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "crypto_upstream_requests_in_flight", "Exchange REST requests awaiting a response.", ("exchange",),
+))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "crypto_upstream_errors_total", "Failed exchange calls by error type.", ("exchange", "type"),
+))
+LOOP_LAG = REGISTRY.register(Histogram(
+    "crypto_event_loop_lag_seconds", "How late the event loop wakes a timer.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+))
+LOOP_LAG_LAST = REGISTRY.register(Gauge("crypto_event_loop_lag_last_seconds", "Most recent event loop lag sample."))
+
+# Symbol-like path segments (BTC-USD, BTCUSDT_SPBL) would explode the endpoint label
+_PRODUCT_SEGMENT = re.compile(r"/[A-Z0-9]+[-_][A-Z0-9]+(?=/|$)")
+# Query parameters that select an endpoint variant (Bybit linear/spot, Bitget product type); few values each
+_VARIANT_PARAMS = ("category", "productType")
+
+
+def endpoint_label(url: "aiohttp.typedefs.StrOrURL") -> str:
+    """Path with product segments folded, plus the variant-selecting query parameters.
+
+    ``/v5/market/tickers?category=linear&symbol=BTCUSDT`` becomes
+    ``/v5/market/tickers?category=linear``.
+    """
+    url = url if isinstance(url, yarl.URL) else yarl.URL(str(url))
+    variant = "&".join(f"{k}={url.query[k]}" for k in _VARIANT_PARAMS if url.query.get(k))
+    label = _PRODUCT_SEGMENT.sub("/{product}", url.path)
+    return f"{label}?{variant}" if variant else label
+
+
+def upstream_trace_config(exchange: str) -> aiohttp.TraceConfig:
+    """aiohttp hooks recording latency, in-flight count and errors of every request to ``exchange``."""
+    tc = aiohttp.TraceConfig(trace_config_ctx_factory=lambda trace_request_ctx: SimpleNamespace(start=0.0))
+
+    async def on_start(session, ctx, params) -> None:
+        ctx.start = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.inc(exchange)
+
+    async def on_end(session, ctx, params) -> None:
+        UPSTREAM_IN_FLIGHT.dec(exchange)
+        status = f"{params.response.status // 100}xx"
+        UPSTREAM_DURATION.observe(time.perf_counter() - ctx.start, exchange, endpoint_label(params.url), status)
+
+    async def on_exception(session, ctx, params) -> None:
+        UPSTREAM_IN_FLIGHT.dec(exchange)
+        UPSTREAM_DURATION.observe(time.perf_counter() - ctx.start, exchange, endpoint_label(params.url), "error")
+
+    tc.on_request_start.append(on_start)
+    tc.on_request_end.append(on_end)
+    tc.on_request_exception.append(on_exception)
+    return tc
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware timing every HTTP request by method, route template and status.
+
+    The route template comes from ``scope["route"]`` set by the router, so
+    ``/api/crypto/BTC`` and ``/api/crypto/ETH`` share one series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_DURATION.observe(time.perf_counter() - started, scope["method"], template, status)
+
+
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    """Sleep ``interval`` repeatedly and record how much later than asked the loop woke up."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - started - interval, 0.0)
+        LOOP_LAG.observe(lag)
+        LOOP_LAG_LAST.set(lag)
+
+
+def render() -> str:
+    return REGISTRY.render()
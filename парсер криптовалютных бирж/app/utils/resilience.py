@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Mapping, Optional, TypeVar
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Async token bucket: ``capacity`` tokens, refilled at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.waited = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` (e.g. after a 429 with Retry-After)."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        cost = min(cost, self.capacity)
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                wait = max(self._paused_until - now, 0.0)
+                if not wait and self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                wait = wait or (cost - self.tokens) / self.rate
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """Token bucket that resyncs with the exchange's own rate-limit headers.
+
+    - ``used_header``/``limit``: consumed weight in the current window
+      (Binance ``X-MBX-USED-WEIGHT-1M`` against 6000/min)
+    - ``remaining_header``/``reset_header``: remaining requests and the
+      window reset time in ms (Bybit ``X-Bapi-Limit-Status``)
+    - ``Retry-After`` on 429/418 pauses the bucket
+    """
+
+    def __init__(self, rate: float, capacity: float, used_header: Optional[str] = None,
+                 remaining_header: Optional[str] = None, reset_header: Optional[str] = None,
+                 cost: Optional[Callable[[str], float]] = None, clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
+        super().__init__(rate, capacity, clock)
+        self._wall_clock = wall_clock
+        self.used_header = used_header
+        self.remaining_header = remaining_header
+        self.reset_header = reset_header
+        self.cost = cost or (lambda url: 1.0)
+        self.throttled = 0
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> None:
+        if status in (418, 429):
+            self.throttled += 1
+            try:
+                retry_after = float(headers.get("Retry-After", "1"))
+            except ValueError:
+                retry_after = 1.0
+            logger.warning("Rate limited (HTTP %s), pausing %.1fs", status, retry_after)
+            self.pause(retry_after)
+            return
+        self._refill(self._clock())
+        if self.used_header and headers.get(self.used_header):
+            try:
+                used = float(headers[self.used_header])
+            except ValueError:
+                return
+            # The server's count is authoritative when it is ahead of ours
+            self.tokens = min(self.tokens, max(self.capacity - used, 0.0))
+        elif self.remaining_header and headers.get(self.remaining_header):
+            try:
+                remaining = float(headers[self.remaining_header])
+            except ValueError:
+                return
+            self.tokens = min(self.tokens, remaining)
+            if remaining <= 0 and self.reset_header and headers.get(self.reset_header):
+                try:
+                    reset_in = float(headers[self.reset_header]) / 1000.0 - self._wall_clock()
+                except ValueError:
+                    return
+                if reset_in > 0:
+                    self.pause(reset_in)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """aiohttp hooks: take tokens before every request, read headers after every response."""
+        trace = aiohttp.TraceConfig()
+
+        async def on_start(_session, _ctx, params: aiohttp.TraceRequestStartParams) -> None:
+            await self.acquire(self.cost(str(params.url)))
+
+        async def on_end(_session, _ctx, params: aiohttp.TraceRequestEndParams) -> None:
+            self.observe(params.response.status, params.response.headers)
+
+        trace.on_request_start.append(on_start)
+        trace.on_request_end.append(on_end)
+        return trace
+
+    def stats(self) -> Dict[str, float]:
+        now = self._clock()
+        self._refill(now)
+        return {"tokens": round(self.tokens, 2), "capacity": self.capacity, "waited_s": round(self.waited, 3),
+                "throttled": self.throttled, "paused_s": round(max(self._paused_until - now, 0.0), 3)}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """closed -> open after ``failure_threshold`` consecutive failures -> half-open after ``reset_timeout``.
+
+    While open, calls fail immediately with CircuitOpenError. In half-open
+    state a single probe call is let through; its outcome closes or re-opens
+    the breaker. ValueError (unsupported symbol, unexpected payload) is not
+    counted as an exchange failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self._clock = clock
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.short_circuited = 0
+
+    def _allow(self) -> None:
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.short_circuited += 1
+        raise CircuitOpenError(f"{self.name} circuit open")
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("%s circuit opened after %d failures", self.name, self.failures)
+            self.state = self.OPEN
+            self._opened_at = self._clock()
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        self._allow()
+        try:
+            result = await fn()
+        except ValueError:
+            self._probing = False
+            raise
+        except asyncio.CancelledError:
+            self._probing = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        return {"state": self.state, "failures": self.failures, "short_circuited": self.short_circuited}
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from app.utils.config import SYMBOLS_FILE
+
+logger = logging.getLogger(__name__)
+
+# Quote our API symbols are priced in on each exchange (the parsers' "currency")
+QUOTES = {"binance": "USDT", "bybit": "USDT", "bitget": "USDT", "coinbase": "USD"}
+
+
+def decimals(step: object) -> int:
+    """Decimal places of a tick/step size ("0.0100" -> 2, "1" -> 0, "1e-05" -> 5)."""
+    try:
+        exponent = Decimal(str(step)).normalize().as_tuple().exponent
+    except (InvalidOperation, ValueError):
+        return 0
+    return max(-int(exponent), 0) if isinstance(exponent, int) else 0
+
+
+class Instrument:
+    """One tradable pair on one exchange; strings are interned, so 2,000+ pairs share their base/quote names."""
+
+    __slots__ = ("exchange", "base", "quote", "native", "price_decimals", "qty_decimals")
+
+    def __init__(self, exchange: str, base: str, quote: str, native: str, price_decimals: int = 8,
+                 qty_decimals: int = 8):
+        self.exchange = sys.intern(exchange)
+        self.base = sys.intern(base.upper())
+        self.quote = sys.intern(quote.upper())
+        self.native = sys.intern(native)
+        self.price_decimals = price_decimals
+        self.qty_decimals = qty_decimals
+
+    def row(self) -> list:
+        return [self.base, self.quote, self.native, self.price_decimals, self.qty_decimals]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "native": self.native,
+            "base": self.base,
+            "quote": self.quote,
+            "price_decimals": self.price_decimals,
+            "qty_decimals": self.qty_decimals,
+        }
+
+
+# Full instrument list of one exchange
+InstrumentFetch = Callable[[], Awaitable[List[Instrument]]]
+
+
+class SymbolIndex:
+    """Symbol universe discovered from the exchanges: (base, quote) -> exchange -> Instrument.
+
+    Lookups are single dict probes. An exchange that was never discovered
+    (no persisted file, failed refresh) falls back to the caller's built-in
+    map, so the hard-coded symbols keep working offline. The index is
+    persisted as JSON in ``path``; a cold start loads it without network.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._pairs: Dict[Tuple[str, str], Dict[str, Instrument]] = {}
+        self._natives: Dict[str, Dict[str, Instrument]] = {}
+        # Bases with a pair in the exchange's API quote (QUOTES) on at least one exchange
+        self._symbols: Set[str] = set()
+        self.fetched_at: Dict[str, float] = {}
+        self.loaded_mtime: Optional[float] = None
+        self.refreshes = 0
+        self.errors = 0
+
+    def replace(self, exchange: str, instruments: Iterable[Instrument], fetched_at: Optional[float] = None) -> int:
+        """Swap in the full instrument list of ``exchange``; returns its size."""
+        natives = {inst.native: inst for inst in instruments}
+        for key in [k for k, per in self._pairs.items() if exchange in per]:
+            per = self._pairs[key]
+            del per[exchange]
+            if not per:
+                del self._pairs[key]
+        for inst in natives.values():
+            self._pairs.setdefault((inst.base, inst.quote), {})[exchange] = inst
+        self._natives[exchange] = natives
+        self.fetched_at[exchange] = fetched_at if fetched_at is not None else time.time()
+        self._symbols = {base for (base, quote), per in self._pairs.items()
+                         if any(QUOTES.get(ex) == quote for ex in per)}
+        return len(natives)
+
+    def has_exchange(self, exchange: str) -> bool:
+        return exchange in self._natives
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    def __len__(self) -> int:
+        return sum(len(n) for n in self._natives.values())
+
+    def instrument(self, exchange: str, symbol: str, quote: Optional[str] = None) -> Optional[Instrument]:
+        per = self._pairs.get((symbol, quote or QUOTES.get(exchange, "USDT")))
+        return per.get(exchange) if per else None
+
+    def native(self, exchange: str, symbol: str, fallback: Optional[Mapping[str, Optional[str]]] = None) -> Optional[str]:
+        """Exchange pair for ``symbol`` in the exchange's API quote; ``fallback`` until ``exchange`` is discovered."""
+        if exchange not in self._natives:
+            return fallback.get(symbol) if fallback is not None else None
+        inst = self.instrument(exchange, symbol)
+        return inst.native if inst is not None else None
+
+    def symbols(self) -> List[str]:
+        return sorted(self._symbols)
+
+    def describe(self, symbol: str) -> Dict[str, Dict[str, object]]:
+        """Per exchange: the instrument ``symbol`` is quoted with in this API."""
+        out: Dict[str, Dict[str, object]] = {}
+        for exchange in self._natives:
+            inst = self.instrument(exchange, symbol)
+            if inst is not None:
+                out[exchange] = inst.to_dict()
+        return out
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.path) if self.path else None
+        except OSError:
+            return None
+
+    def _read(self) -> Optional[Tuple[Dict[str, Tuple[float, List[Instrument]]], Optional[float]]]:
+        mtime = self._mtime()
+        if mtime is None:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {
+                exchange: (float(entry["fetched_at"]), [Instrument(exchange, *row) for row in entry["instruments"]])
+                for exchange, entry in data["exchanges"].items()
+            }, mtime
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("Ignoring unreadable symbol index %s", self.path)
+            return None
+
+    def _apply(self, loaded: Tuple[Dict[str, Tuple[float, List[Instrument]]], Optional[float]]) -> None:
+        exchanges, self.loaded_mtime = loaded
+        for exchange, (fetched_at, instruments) in exchanges.items():
+            self.replace(exchange, instruments, fetched_at)
+
+    def load(self) -> bool:
+        """Load the persisted index (cold start without network); False when missing or unreadable."""
+        loaded = self._read()
+        if loaded is None:
+            return False
+        self._apply(loaded)
+        return True
+
+    def _save(self, data: Dict) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Per-process temp name: API workers and the ingestion process may share one file
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self.loaded_mtime = self._mtime()
+
+    def snapshot(self) -> Dict:
+        """Compact persisted form: per exchange [[base, quote, native, price_decimals, qty_decimals], ...]."""
+        return {
+            "exchanges": {
+                exchange: {"fetched_at": self.fetched_at[exchange], "instruments": [i.row() for i in natives.values()]}
+                for exchange, natives in self._natives.items()
+            }
+        }
+
+    async def refresh(self, fetchers: Dict[str, InstrumentFetch]) -> Dict[str, object]:
+        """Fetch every exchange's list concurrently; a failed exchange keeps its previous instruments."""
+        names = list(fetchers)
+        results = await asyncio.gather(*(fetchers[n]() for n in names), return_exceptions=True)
+        summary: Dict[str, object] = {}
+        for name, res in zip(names, results):
+            if isinstance(res, BaseException) or not res:
+                self.errors += 1
+                summary[name] = f"error: {res}" if isinstance(res, BaseException) else "error: empty list"
+                logger.warning("symbol discovery for %s failed: %s", name, summary[name])
+                continue
+            summary[name] = self.replace(name, res)
+        self.refreshes += 1
+        if self.path and any(isinstance(v, int) for v in summary.values()):
+            await asyncio.to_thread(self._save, self.snapshot())
+        return summary
+
+    def age(self) -> Optional[float]:
+        """Seconds since the stalest exchange was fetched (None when nothing is discovered)."""
+        return time.time() - min(self.fetched_at.values()) if self.fetched_at else None
+
+    def stats(self) -> Dict[str, object]:
+        age = self.age()
+        return {
+            "symbols": len(self._symbols),
+            "instruments": {exchange: len(natives) for exchange, natives in self._natives.items()},
+            "age_s": round(age, 1) if age is not None else None,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
+
+
+async def run_refresh(index: SymbolIndex, fetchers: Dict[str, InstrumentFetch], interval: float) -> None:
+    """Refresh now unless the persisted index is complete and fresh, then every ``interval`` seconds."""
+    age = index.age()
+    complete = all(index.has_exchange(name) for name in fetchers)
+    delay = max(interval - age, 0.0) if complete and age is not None else 0.0
+    while True:
+        await asyncio.sleep(delay)
+        await index.refresh(fetchers)
+        delay = interval
+
+
+async def run_follow(index: SymbolIndex, interval: float) -> None:
+    """Reload the persisted index whenever another process (the launcher's ingestion) rewrites it."""
+    while True:
+        await asyncio.sleep(interval)
+        if index._mtime() in (None, index.loaded_mtime):
+            continue
+        # Parse off the loop, swap in on it: request handlers read the index without locks
+        loaded = await asyncio.to_thread(index._read)
+        if loaded is not None:
+            index._apply(loaded)
+
+
+# Shared by the parsers and streams of this process
+SYMBOL_INDEX = SymbolIndex(SYMBOLS_FILE)
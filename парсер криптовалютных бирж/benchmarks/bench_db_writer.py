@@ -0,0 +1,88 @@
+"""Benchmark: sustained price inserts through BatchWriter on a throwaway SQLite file.
+
+Usage (from the project root):
+
+    python -m benchmarks.bench_db_writer
+    python -m benchmarks.bench_db_writer --rate 20000 --duration 5 --batch 2000
+
+Producers queue ``--rate`` rows per second for ``--duration`` seconds in
+10 ms ticks, the way the poller does. Reports rows written and dropped,
+the number and duration of flushes, and the event-loop lag measured by a
+probe task: the writer must keep up without stalling the loop.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+
+_TMP = tempfile.mkdtemp(prefix="bench-db-writer-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'bench.db')}"
+
+from app.models.db import engine, init_db  # noqa: E402
+from app.services.db_writer import BatchWriter, insert_prices  # noqa: E402
+
+
+async def _probe_lag(samples: list, interval: float = 0.01) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - started - interval)
+
+
+async def run(rate: int, duration: float, batch: int, delay_ms: float) -> None:
+    init_db()
+    flush_ms: list = []
+
+    def flush(rows) -> None:
+        t0 = time.perf_counter()
+        insert_prices(engine, rows)
+        flush_ms.append((time.perf_counter() - t0) * 1000)
+
+    writer = BatchWriter(flush, max_batch=batch, max_delay=delay_ms / 1000)
+    writer.start()
+    lag: list = []
+    probe = asyncio.create_task(_probe_lag(lag))
+    per_tick = max(1, rate // 100)
+    started = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - started < duration:
+        now = datetime.now(timezone.utc)
+        writer.offer_many(
+            {"timestamp": now, "symbol": f"S{(sent + i) % 50}", "price": 100.0 + i, "source": "bench"}
+            for i in range(per_tick)
+        )
+        sent += per_tick
+        await asyncio.sleep(0.01)
+    await writer.stop()
+    elapsed = time.perf_counter() - started
+    probe.cancel()
+    await asyncio.gather(probe, return_exceptions=True)
+
+    lag_ms = sorted(x * 1000 for x in lag) or [0.0]
+    print(f"queued {sent} rows in {elapsed:.2f}s ({sent / elapsed:,.0f} rows/s)")
+    print(f"written {writer.written}, dropped {writer.dropped}, failed {writer.failed}")
+    print(f"flushes {writer.flushes}, flush ms p50 {statistics.median(flush_ms or [0]):.1f} max {max(flush_ms or [0]):.1f}")
+    print(f"event-loop lag ms p50 {lag_ms[len(lag_ms) // 2]:.2f} p99 {lag_ms[int(len(lag_ms) * 0.99)]:.2f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rate", type=int, default=10_000, help="rows queued per second")
+    ap.add_argument("--duration", type=float, default=3.0, help="seconds of load")
+    ap.add_argument("--batch", type=int, default=1000, help="BatchWriter max_batch (DB_WRITE_BATCH)")
+    ap.add_argument("--delay-ms", type=float, default=200.0, help="BatchWriter max_delay (DB_WRITE_INTERVAL_MS)")
+    args = ap.parse_args()
+    try:
+        asyncio.run(run(args.rate, args.duration, args.batch, args.delay_ms))
+    finally:
+        engine.dispose()
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
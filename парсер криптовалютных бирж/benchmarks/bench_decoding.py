@@ -0,0 +1,155 @@
+"""Micro-benchmark: stdlib json vs the pluggable decoder on exchange ticker-list payloads.
+
+Usage (from the project root):
+
+    python -m benchmarks.bench_decoding            # recorded fixtures, synthetic if none recorded
+    python -m benchmarks.bench_decoding --record   # fetch fresh payloads into benchmarks/fixtures/
+    python -m benchmarks.bench_decoding --output benchmarks/results/decoding.json
+
+Each case decodes the full payload and extracts the prices of the supported
+symbols, i.e. what ``get_all_prices`` does per response. ``--output``
+saves the timings together with whether each payload was recorded or
+synthetic, since synthetic lists are not representative of live sizes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+from app.parsers.binance import SYMBOL_TO_BINANCE
+from app.parsers.bitget import SYMBOL_TO_BITGET, _extract_price
+from app.parsers.bybit import SYMBOL_TO_BYBIT, _ticker_price
+from app.utils import decoding
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+SOURCES = {
+    "binance_tickers": "https://api.binance.com/api/v3/ticker/price",
+    "bybit_tickers": "https://api.bybit.com/v5/market/tickers?category=linear",
+    "bitget_tickers": "https://api.bitget.com/api/v2/spot/market/tickers",
+}
+
+
+def _synthetic(schema: str, n: int = 2000) -> bytes:
+    """Payload with the shape (and roughly the size) of the live response."""
+    rnd = random.Random(42)
+    natives = [f"COIN{i}USDT" for i in range(n)] + list(SYMBOL_TO_BINANCE.values())
+    rnd.shuffle(natives)
+
+    def px() -> str:
+        return f"{rnd.uniform(0.0001, 70000):.8f}"
+
+    if schema == "binance_tickers":
+        return json.dumps([{"symbol": s, "price": px()} for s in natives]).encode()
+    if schema == "bybit_tickers":
+        items = [{
+            "symbol": s, "lastPrice": px(), "indexPrice": px(), "markPrice": px(), "prevPrice24h": px(),
+            "price24hPcnt": "0.0123", "highPrice24h": px(), "lowPrice24h": px(), "prevPrice1h": px(),
+            "openInterest": "123456.7", "openInterestValue": "98765432.1", "turnover24h": "123456789.12",
+            "volume24h": "4567.89", "fundingRate": "0.0001", "nextFundingTime": "1700000000000",
+            "predictedDeliveryPrice": "", "basisRate": "", "deliveryFeeRate": "", "deliveryTime": "0",
+            "ask1Size": "1.2", "bid1Price": px(), "ask1Price": px(), "bid1Size": "3.4", "basis": "",
+        } for s in natives]
+        return json.dumps({"retCode": 0, "retMsg": "OK", "result": {"category": "linear", "list": items},
+                           "retExtInfo": {}, "time": 1700000000000}).encode()
+    items = [{
+        "symbol": s, "high24h": px(), "open": px(), "lastPr": px(), "low24h": px(), "quoteVolume": "1234567.89",
+        "baseVolume": "1234.5", "usdtVolume": "1234567.89", "bidPr": px(), "askPr": px(), "bidSz": "1.5",
+        "askSz": "2.5", "openUtc": px(), "ts": "1700000000000", "changeUtc24h": "0.01", "change24h": "0.02",
+    } for s in natives]
+    return json.dumps({"code": "00000", "msg": "success", "requestTime": 1700000000000, "data": items}).encode()
+
+
+def load_fixture(schema: str) -> Tuple[bytes, str]:
+    path = os.path.join(FIXTURES, f"{schema}.json")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read(), "recorded"
+    return _synthetic(schema), "synthetic"
+
+
+async def record() -> None:
+    from app.utils.http import close_shared_connector, create_aiohttp_session
+
+    os.makedirs(FIXTURES, exist_ok=True)
+    async with create_aiohttp_session() as session:
+        for schema, url in SOURCES.items():
+            async with session.get(url) as resp:
+                resp.raise_for_status()
+                raw = await resp.read()
+            with open(os.path.join(FIXTURES, f"{schema}.json"), "wb") as f:
+                f.write(raw)
+            print(f"recorded {schema}: {len(raw) / 1024:.0f} KiB")
+    await close_shared_connector()
+
+
+def _extract(schema: str, data) -> Dict[str, float]:
+    """Same filtering as the parsers' get_all_prices."""
+    out: Dict[str, float] = {}
+    if schema == "binance_tickers":
+        pairs = {v: k for k, v in SYMBOL_TO_BINANCE.items()}
+        for item in data:
+            sym = pairs.get(item.get("symbol"))
+            if sym is not None:
+                out[sym] = float(item.get("price"))
+    elif schema == "bybit_tickers":
+        pairs = {v: k for k, v in SYMBOL_TO_BYBIT.items()}
+        for item in data.get("result", {}).get("list") or []:
+            sym = pairs.get(item.get("symbol"))
+            if sym is not None:
+                out[sym] = _ticker_price(item)
+    else:
+        pairs = {v: k for k, v in SYMBOL_TO_BITGET.items() if v}
+        for item in data.get("data") or []:
+            sym = pairs.get((item.get("symbol") or item.get("instId") or "").upper())
+            if sym is not None:
+                out[sym] = _extract_price(item)
+    return out
+
+
+def run(number: int) -> Dict[str, Dict[str, object]]:
+    """Print and return the timings per schema: payload origin and size, best ms per case."""
+    print(f"decoder backend: {decoding.BACKEND}")
+    results: Dict[str, Dict[str, object]] = {}
+    for schema in SOURCES:
+        raw, origin = load_fixture(schema)
+        cases: List[Tuple[str, Callable[[], object]]] = [
+            ("stdlib json", lambda: _extract(schema, json.loads(raw))),
+            (f"{decoding.BACKEND} (generic)", lambda: _extract(schema, decoding.loads(raw))),
+            (f"{decoding.BACKEND} (typed)", lambda: _extract(schema, decoding.decode(raw, schema))),
+        ]
+        expected = cases[0][1]()
+        print(f"\n{schema}: {len(raw) / 1024:.0f} KiB ({origin})")
+        baseline = None
+        timings: Dict[str, float] = {}
+        for label, fn in cases:
+            assert fn() == expected, label
+            best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+            baseline = baseline or best
+            timings[label] = round(best * 1e3, 4)
+            print(f"  {label:<22} {best * 1e3:8.3f} ms   x{baseline / best:.1f}")
+        results[schema] = {"fixture": origin, "bytes": len(raw), "ms": timings}
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--record", action="store_true", help="fetch live payloads into benchmarks/fixtures/")
+    ap.add_argument("--number", type=int, default=20, help="decodes per timing run")
+    ap.add_argument("--output", help="also write the results as JSON to this file")
+    args = ap.parse_args()
+    if args.record:
+        asyncio.run(record())
+    results = run(args.number)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"backend": decoding.BACKEND, "number": args.number, "results": results}, f, indent=1)
+        print(f"saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
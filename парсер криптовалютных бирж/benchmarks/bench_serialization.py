@@ -0,0 +1,114 @@
+"""Micro-benchmark: response_model serialization vs FAST_JSON_ENABLED on the hot endpoints' payloads.
+
+Usage (from the project root):
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --candles 5000 --number 200
+
+Each case turns what an endpoint returns into the response body bytes:
+``pydantic models`` is the previous code (models built in the handler and
+re-validated by FastAPI), ``dicts + response_model`` is the default path
+(FastAPI validates the builder's dict) and ``fast`` is FastJSONResponse on
+the same dict. All three must produce equal JSON.
+"""
+import argparse
+import inspect
+import json
+import os
+import random
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+import app.main as api  # noqa: E402
+from app.parsers.base import candle_to_dict  # noqa: E402
+from app.utils import encoding  # noqa: E402
+
+# Newer FastAPI serializes response_model output to bytes in pydantic-core (dump_json)
+_DUMP_JSON = "dump_json" in inspect.signature(serialize_response).parameters
+
+
+def _route_field(path: str):
+    route = next(r for r in api.app.routes if isinstance(r, APIRoute) and r.path == path)
+    return route.response_field
+
+
+def _fastapi_body(field, content: Any) -> bytes:
+    """Body bytes the way FastAPI builds them for a handler returning ``content``."""
+    # serialize_response does not await anything for async endpoints: drive it by hand, no event loop
+    coro = serialize_response(field=field, response_content=content, **({"dump_json": True} if _DUMP_JSON else {}))
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        value = done.value
+    return value if _DUMP_JSON else JSONResponse(value).body
+
+
+def _cases(n_candles: int) -> List[Tuple[str, str, Callable[[], Any], Callable[[], Any]]]:
+    """(name, route, old handler result, new handler dict) per endpoint."""
+    rnd = random.Random(42)
+    sources = ["binance", "bybit", "bitget", "coinbase"]
+    quotes = {
+        sym: {src: {"symbol": sym, "price": rnd.uniform(1, 70000), "source": src,
+                    "currency": "USD" if src == "coinbase" else "USDT"} for src in sources}
+        for sym in api.SUPPORTED_SYMBOLS
+    }
+    btc = quotes["BTC"]["binance"]
+    diff_entries = [{"source": src, "price": float(q["price"]), "currency": q["currency"]}
+                    for src, q in quotes["BTC"].items()]
+    start = 1_700_000_000_000
+    candles = [(start + i * 3_600_000, *(rnd.uniform(1, 70000) for _ in range(4)), rnd.uniform(0, 1000))
+               for i in range(n_candles)]
+
+    def old_diffs():
+        d = api._diff_payload("BTC", diff_entries)
+        return api.DiffSummary(**{**d, "prices": [api.ExchangePrice(**p) for p in d["prices"]]})
+
+    return [
+        ("price", "/api/crypto/{symbol}",
+         lambda: api.PriceResponse(**btc), lambda: api._price_payload(btc)),
+        ("prices", "/api/crypto/prices",
+         lambda: api.BatchPriceResponse(prices={s: api.PriceResponse(**q["binance"]) for s, q in quotes.items()},
+                                        missing=[]),
+         lambda: {"prices": {s: api._price_payload(q["binance"]) for s, q in quotes.items()}, "missing": []}),
+        ("diffs", "/api/crypto/{symbol}/diffs", old_diffs, lambda: api._diff_payload("BTC", diff_entries)),
+        (f"history ({n_candles})", "/api/crypto/{symbol}/history",
+         lambda: [api.HistoryPoint(**candle_to_dict(c)) for c in candles],
+         lambda: [candle_to_dict(c) for c in candles]),
+    ]
+
+
+def run(number: int, n_candles: int) -> None:
+    print(f"encoder backend: {encoding.BACKEND}, FastAPI dump_json: {_DUMP_JSON}")
+    for name, path, old, new in _cases(n_candles):
+        field = _route_field(path)
+        variants: Dict[str, Callable[[], bytes]] = {
+            "pydantic models": lambda: _fastapi_body(field, old()),
+            "dicts + response_model": lambda: _fastapi_body(field, new()),
+            "fast": lambda: encoding.FastJSONResponse(new()).body,
+        }
+        expected = json.loads(variants["pydantic models"]())
+        print(f"\n{name}:")
+        baseline = None
+        for label, fn in variants.items():
+            assert json.loads(fn()) == expected, label
+            number_here = max(number // max(n_candles // 100, 1), 5) if name.startswith("history") else number
+            best = min(timeit.repeat(fn, number=number_here, repeat=5)) / number_here
+            baseline = baseline or best
+            print(f"  {label:<24} {best * 1e6:10.1f} us   x{baseline / best:.1f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--number", type=int, default=2000, help="serializations per timing run")
+    ap.add_argument("--candles", type=int, default=1000, help="history points in the history case")
+    args = ap.parse_args()
+    run(args.number, args.candles)
+
+
+if __name__ == "__main__":
+    main()
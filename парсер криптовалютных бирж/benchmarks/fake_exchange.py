@@ -0,0 +1,319 @@
+"""Local fake of the Binance/Bybit/Bitget/Coinbase REST endpoints the parsers call.
+
+Usage (from the project root):
+
+    python -m benchmarks.fake_exchange --port 8790 --latency-ms 50 --jitter-ms 20 --error-rate 0.01
+
+Each exchange gets its own port (binance=port, bybit=port+1, bitget=port+2,
+coinbase=port+3) so the client connection pool sees four hosts. Ticker
+lists replay the payloads recorded by ``bench_decoding --record`` (synthetic
+if none are recorded); single tickers, klines, order books and
+instrument lists are derived from those prices. Every response is delayed by ``latency ± jitter`` and
+``error_rate`` of requests fail with HTTP 500.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from app.parsers.coinbase import SYMBOL_TO_COINBASE
+from benchmarks.bench_decoding import load_fixture
+
+EXCHANGES = ("binance", "bybit", "bitget", "coinbase")
+
+
+class FakeExchange:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: int = 42):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rnd = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.raw: Dict[str, bytes] = {}
+        # schema -> "recorded" or "synthetic", reported by /_stats
+        self.fixtures: Dict[str, str] = {}
+        self.prices: Dict[str, Dict[str, float]] = {}
+        for schema, field in (("binance_tickers", "price"), ("bybit_tickers", "lastPrice"), ("bitget_tickers", "lastPr")):
+            raw, self.fixtures[schema] = load_fixture(schema)
+            self.raw[schema] = raw
+            data = json.loads(raw)
+            items = data if isinstance(data, list) else (data.get("result") or {}).get("list") or data.get("data") or []
+            self.prices[schema.split("_")[0]] = {it["symbol"]: float(it[field]) for it in items if it.get(field)}
+        # Coinbase quotes USD; reuse the Binance USDT prices
+        binance = self.prices["binance"]
+        self.prices["coinbase"] = {
+            product: binance[product.split("-")[0] + "USDT"]
+            for product in SYMBOL_TO_COINBASE.values() if product and product.split("-")[0] + "USDT" in binance
+        }
+
+    # -- helpers ---------------------------------------------------------------------------
+
+    def _price(self, exchange: str, native: str) -> float:
+        price = self.prices[exchange].get(native.replace("_SPBL", "").upper())
+        if price is None:
+            raise web.HTTPBadRequest(text=json.dumps({"code": 400, "msg": f"Unknown symbol {native}"}),
+                                     content_type="application/json")
+        return price
+
+    @staticmethod
+    def _klines(price: float, start_ms: int, end_ms: int, step_ms: int, limit: int) -> List[List[float]]:
+        """Deterministic daily sine wave around ``price``; [open time, open, high, low, close, volume]."""
+        def close_at(ts: int) -> float:
+            return price * (1 + 0.02 * math.sin(ts / 86_400_000 * 2 * math.pi))
+
+        first = start_ms - start_ms % step_ms
+        if first < start_ms:
+            first += step_ms
+        rows = []
+        for ts in range(first, end_ms + 1, step_ms):
+            o, c = close_at(ts - step_ms), close_at(ts)
+            rows.append([ts, o, max(o, c) * 1.001, min(o, c) * 0.999, c, 10.0])
+            if len(rows) >= limit:
+                break
+        return rows
+
+    @staticmethod
+    def _book(price: float, levels: int) -> Dict[str, List[List[str]]]:
+        tick = price * 1e-4
+        return {
+            "bids": [[f"{price - tick * (i + 1):.8f}", f"{0.5 + i * 0.1:.4f}"] for i in range(levels)],
+            "asks": [[f"{price + tick * (i + 1):.8f}", f"{0.5 + i * 0.1:.4f}"] for i in range(levels)],
+        }
+
+    @web.middleware
+    async def inject(self, request: web.Request, handler):
+        self.requests += 1
+        delay = self.latency + self.rnd.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.rnd.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "injected"}, status=500)
+        return await handler(request)
+
+    def _instruments(self, exchange: str) -> List[tuple]:
+        """(native, base, quote, tick size, step size) for every priced pair."""
+        out = []
+        for native, price in self.prices[exchange].items():
+            base, quote = native.split("-") if "-" in native else (native[:-4], native[-4:])
+            tick = f"{10 ** -max(min(6 - int(math.log10(max(price, 1e-9))), 8), 0):.8f}"
+            out.append((native, base, quote, tick, "0.00100000"))
+        return out
+
+    # -- Binance ---------------------------------------------------------------------------
+
+    async def binance_ticker(self, request: web.Request) -> web.Response:
+        symbol = request.query.get("symbol")
+        if symbol is None:
+            return web.Response(body=self.raw["binance_tickers"], content_type="application/json")
+        return web.json_response({"symbol": symbol, "price": f"{self._price('binance', symbol):.8f}"})
+
+    async def binance_klines(self, request: web.Request) -> web.Response:
+        q = request.query
+        step = _STEP_MS[q["interval"]]
+        rows = self._klines(self._price("binance", q["symbol"]), int(q["startTime"]), int(q["endTime"]), step,
+                            int(q.get("limit", 500)))
+        return web.json_response([[ts, *(f"{v:.8f}" for v in vals), ts + step - 1] for ts, *vals in rows])
+
+    async def binance_depth(self, request: web.Request) -> web.Response:
+        q = request.query
+        book = self._book(self._price("binance", q["symbol"]), min(int(q.get("limit", 100)), 1000))
+        return web.json_response({"lastUpdateId": 1, **book})
+
+    async def binance_exchange_info(self, request: web.Request) -> web.Response:
+        symbols = [
+            {"symbol": native, "status": "TRADING", "baseAsset": base, "quoteAsset": quote,
+             "filters": [{"filterType": "PRICE_FILTER", "tickSize": tick}, {"filterType": "LOT_SIZE", "stepSize": step}]}
+            for native, base, quote, tick, step in self._instruments("binance")
+        ]
+        return web.json_response({"timezone": "UTC", "symbols": symbols})
+
+    # -- Bybit -----------------------------------------------------------------------------
+
+    async def bybit_tickers(self, request: web.Request) -> web.Response:
+        symbol = request.query.get("symbol")
+        if symbol is None:
+            return web.Response(body=self.raw["bybit_tickers"], content_type="application/json")
+        item = {"symbol": symbol, "lastPrice": f"{self._price('bybit', symbol):.8f}"}
+        return web.json_response({"retCode": 0, "retMsg": "OK", "result": {"list": [item]}})
+
+    async def bybit_kline(self, request: web.Request) -> web.Response:
+        q = request.query
+        step = _BYBIT_STEP_MS[q["interval"]]
+        rows = self._klines(self._price("bybit", q["symbol"]), int(q["start"]), int(q["end"]), step,
+                            int(q.get("limit", 200)))
+        out = [[str(ts), *(f"{v:.8f}" for v in vals), "0"] for ts, *vals in reversed(rows)]
+        return web.json_response({"retCode": 0, "retMsg": "OK", "result": {"list": out}})
+
+    async def bybit_orderbook(self, request: web.Request) -> web.Response:
+        q = request.query
+        book = self._book(self._price("bybit", q["symbol"]), min(int(q.get("limit", 25)), 500))
+        result = {"s": q["symbol"], "b": book["bids"], "a": book["asks"], "u": 1}
+        return web.json_response({"retCode": 0, "retMsg": "OK", "result": result})
+
+    async def bybit_instruments(self, request: web.Request) -> web.Response:
+        # Everything in the linear category, in pages of ``limit`` with a numeric cursor
+        items = self._instruments("bybit") if request.query.get("category") == "linear" else []
+        offset, limit = int(request.query.get("cursor") or 0), int(request.query.get("limit", 500))
+        page = [
+            {"symbol": native, "status": "Trading", "baseCoin": base, "quoteCoin": quote,
+             "priceFilter": {"tickSize": tick}, "lotSizeFilter": {"qtyStep": step}}
+            for native, base, quote, tick, step in items[offset:offset + limit]
+        ]
+        cursor = str(offset + limit) if offset + limit < len(items) else ""
+        return web.json_response({"retCode": 0, "retMsg": "OK", "result": {"list": page, "nextPageCursor": cursor}})
+
+    # -- Bitget ----------------------------------------------------------------------------
+
+    def _bitget_item(self, symbol: str) -> Dict[str, str]:
+        return {"symbol": symbol, "lastPr": f"{self._price('bitget', symbol):.8f}"}
+
+    async def bitget_ticker(self, request: web.Request) -> web.Response:
+        return web.json_response({"code": "00000", "data": self._bitget_item(request.query["symbol"])})
+
+    async def bitget_tickers(self, request: web.Request) -> web.Response:
+        symbol = request.query.get("symbol")
+        if symbol is None:
+            return web.Response(body=self.raw["bitget_tickers"], content_type="application/json")
+        return web.json_response({"code": "00000", "data": [self._bitget_item(symbol)]})
+
+    async def bitget_candles(self, request: web.Request) -> web.Response:
+        q = request.query
+        step = _BITGET_STEP_MS[q["granularity"]]
+        rows = self._klines(self._price("bitget", q["symbol"]), int(q["startTime"]), int(q["endTime"]), step,
+                            int(q.get("limit", 100)))
+        return web.json_response({"code": "00000", "data": [[str(ts), *(f"{v:.8f}" for v in vals)] for ts, *vals in rows]})
+
+    async def bitget_orderbook(self, request: web.Request) -> web.Response:
+        q = request.query
+        book = self._book(self._price("bitget", q["symbol"]), min(int(q.get("limit", 100)), 150))
+        return web.json_response({"code": "00000", "data": book})
+
+    async def bitget_symbols(self, request: web.Request) -> web.Response:
+        data = [
+            {"symbol": native, "status": "online", "baseCoin": base, "quoteCoin": quote,
+             "pricePrecision": str(len(tick.rstrip("0").split(".")[1])), "quantityPrecision": "3"}
+            for native, base, quote, tick, _ in self._instruments("bitget")
+        ]
+        return web.json_response({"code": "00000", "data": data})
+
+    # -- Coinbase --------------------------------------------------------------------------
+
+    async def coinbase_spot(self, request: web.Request) -> web.Response:
+        product = request.match_info["product"]
+        return web.json_response({"data": {"amount": f"{self._price('coinbase', product):.2f}", "currency": "USD"}})
+
+    async def coinbase_rates(self, request: web.Request) -> web.Response:
+        rates = {p.split("-")[0]: f"{1 / price:.12f}" for p, price in self.prices["coinbase"].items()}
+        return web.json_response({"data": {"currency": "USD", "rates": rates}})
+
+    async def coinbase_candles(self, request: web.Request) -> web.Response:
+        q = request.query
+        step = int(q["granularity"]) * 1000
+        start = int(datetime.fromisoformat(q["start"]).timestamp() * 1000)
+        end = int(datetime.fromisoformat(q["end"]).timestamp() * 1000)
+        rows = self._klines(self._price("coinbase", request.match_info["product"]), start, end, step, 300)
+        # [time (s), low, high, open, close, volume], newest first
+        return web.json_response([[ts // 1000, lo, hi, o, c, v] for ts, o, hi, lo, c, v in reversed(rows)])
+
+    async def coinbase_book(self, request: web.Request) -> web.Response:
+        book = self._book(self._price("coinbase", request.match_info["product"]), 50)
+        return web.json_response({
+            "sequence": 1,
+            "bids": [lv + [1] for lv in book["bids"]],
+            "asks": [lv + [1] for lv in book["asks"]],
+        })
+
+    async def coinbase_products(self, request: web.Request) -> web.Response:
+        return web.json_response([
+            {"id": native, "base_currency": base, "quote_currency": quote, "quote_increment": tick,
+             "base_increment": step, "status": "online", "trading_disabled": False}
+            for native, base, quote, tick, step in self._instruments("coinbase")
+        ])
+
+    # -- app -------------------------------------------------------------------------------
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"requests": self.requests, "errors": self.errors, "fixtures": self.fixtures})
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.inject])
+        app.router.add_get("/api/v3/ticker/price", self.binance_ticker)
+        app.router.add_get("/api/v3/klines", self.binance_klines)
+        app.router.add_get("/api/v3/depth", self.binance_depth)
+        app.router.add_get("/api/v3/exchangeInfo", self.binance_exchange_info)
+        app.router.add_get("/v5/market/tickers", self.bybit_tickers)
+        app.router.add_get("/v5/market/kline", self.bybit_kline)
+        app.router.add_get("/v5/market/orderbook", self.bybit_orderbook)
+        app.router.add_get("/v5/market/instruments-info", self.bybit_instruments)
+        app.router.add_get("/api/v2/spot/market/ticker", self.bitget_ticker)
+        app.router.add_get("/api/v2/spot/market/tickers", self.bitget_tickers)
+        app.router.add_get("/api/spot/v1/market/tickers", self.bitget_tickers)
+        app.router.add_get("/api/v2/spot/market/candles", self.bitget_candles)
+        app.router.add_get("/api/v2/spot/market/orderbook", self.bitget_orderbook)
+        app.router.add_get("/api/v2/spot/public/symbols", self.bitget_symbols)
+        app.router.add_get("/v2/prices/{product}/spot", self.coinbase_spot)
+        app.router.add_get("/v2/exchange-rates", self.coinbase_rates)
+        app.router.add_get("/products/{product}/candles", self.coinbase_candles)
+        app.router.add_get("/products/{product}/book", self.coinbase_book)
+        app.router.add_get("/products", self.coinbase_products)
+        app.router.add_get("/_stats", self.stats)
+        return app
+
+
+_STEP_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000}
+_BYBIT_STEP_MS = {"1": 60_000, "5": 300_000, "15": 900_000, "60": 3_600_000, "240": 14_400_000, "D": 86_400_000}
+_BITGET_STEP_MS = {"1min": 60_000, "5min": 300_000, "15min": 900_000, "1h": 3_600_000, "4h": 14_400_000,
+                   "1day": 86_400_000}
+
+
+def api_env(host: str, port: int) -> Dict[str, str]:
+    """Environment pointing the parsers at a fake server started on ``port``..``port + 3``."""
+    urls = {name: f"http://{host}:{port + i}" for i, name in enumerate(EXCHANGES)}
+    return {
+        "BINANCE_API_URL": urls["binance"],
+        "BYBIT_API_URL": urls["bybit"],
+        "BITGET_API_URL": urls["bitget"],
+        "COINBASE_API_URL": urls["coinbase"],
+        "COINBASE_EXCHANGE_URL": urls["coinbase"],
+    }
+
+
+async def serve(fake: FakeExchange, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(fake.app(), access_log=None)
+    await runner.setup()
+    for i in range(len(EXCHANGES)):
+        await web.TCPSite(runner, host, port + i).start()
+    return runner
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8790, help="first of four consecutive ports")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    args = ap.parse_args(argv)
+
+    async def run() -> None:
+        fake = FakeExchange(args.latency_ms, args.jitter_ms, args.error_rate)
+        await serve(fake, args.host, args.port)
+        for key, value in api_env(args.host, args.port).items():
+            print(f"{key}={value}", flush=True)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Load test: the API against the fake exchange server, latency percentiles and throughput per endpoint.
+
+Usage (from the project root):
+
+    python -m benchmarks.load_test                                  # all scenarios, 10 s each, 32 clients
+    python -m benchmarks.load_test --scenarios price,diffs --concurrency 64 --duration 20
+    python -m benchmarks.load_test --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+    python -m benchmarks.load_test --env PRICE_CACHE_TTL=0         # extra settings for the API process
+    python -m benchmarks.load_test --url http://127.0.0.1:8000      # an already running API (no fakes started)
+    python -m benchmarks.load_test --compare benchmarks/results/old.json
+
+The fake exchange (``benchmarks.fake_exchange``) and the API (uvicorn, one
+worker, streams and poller off unless overridden with ``--env``) run as
+separate processes so the load generator does not share their event loop.
+Each scenario runs ``--concurrency`` closed-loop clients for ``--duration``
+seconds after a short warm-up. Results are written as JSON to
+``benchmarks/results/`` for comparison across versions.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+import numpy as np
+
+from app.utils.config import SUPPORTED_SYMBOLS
+from benchmarks.fake_exchange import api_env
+
+RESULTS = os.path.join(os.path.dirname(__file__), "results")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scenario name -> path for the i-th request (symbols rotate)
+SCENARIOS: Dict[str, Callable[[str], str]] = {
+    "price": lambda sym: f"/api/crypto/{sym}",
+    "diffs": lambda sym: f"/api/crypto/{sym}/diffs",
+    "history": lambda sym: f"/api/crypto/{sym}/history?days=7&interval=1h&source=binance",
+}
+
+
+def _free_port(count: int = 1) -> int:
+    """First of ``count`` consecutive free ports (best effort)."""
+    for _ in range(50):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        if port + count > 65535:
+            continue
+        try:
+            for i in range(1, count):
+                with socket.socket() as s:
+                    s.bind(("127.0.0.1", port + i))
+            return port
+        except OSError:
+            continue
+    raise RuntimeError("no free port range found")
+
+
+async def _wait_ready(url: str, timeout: float = 30.0) -> object:
+    """Poll ``url`` until it answers 200; returns the decoded JSON body."""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        return await resp.json(content_type=None)
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], elapsed: float) -> Dict[str, object]:
+    lat = np.asarray(latencies) * 1000
+    ok = sum(n for code, n in statuses.items() if code.startswith("2"))
+    total = sum(statuses.values())
+    pct = np.percentile(lat, [50, 95, 99]) if len(lat) else [None] * 3
+    return {
+        "requests": total,
+        "ok": ok,
+        "error_rate": round(1 - ok / total, 4) if total else None,
+        "rps": round(total / elapsed, 1) if elapsed else None,
+        "p50_ms": round(float(pct[0]), 2) if len(lat) else None,
+        "p95_ms": round(float(pct[1]), 2) if len(lat) else None,
+        "p99_ms": round(float(pct[2]), 2) if len(lat) else None,
+        "max_ms": round(float(lat.max()), 2) if len(lat) else None,
+        "mean_ms": round(float(lat.mean()), 2) if len(lat) else None,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+async def run_scenario(base_url: str, path_for: Callable[[str], str], concurrency: int, duration: float,
+                       warmup: float) -> Dict[str, object]:
+    """``concurrency`` clients issuing requests back to back for ``warmup`` + ``duration`` seconds."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = 0
+    connector = aiohttp.TCPConnector(limit=concurrency, force_close=False)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + warmup
+        stop_at = measure_from + duration
+
+        async def client() -> None:
+            nonlocal counter
+            while True:
+                started = loop.time()
+                if started >= stop_at:
+                    return
+                sym = SUPPORTED_SYMBOLS[counter % len(SUPPORTED_SYMBOLS)]
+                counter += 1
+                try:
+                    async with session.get(base_url + path_for(sym)) as resp:
+                        await resp.read()
+                        status = str(resp.status)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = type(e).__name__
+                if started >= measure_from:
+                    latencies.append(loop.time() - started)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = loop.time() - measure_from
+    return summarize(latencies, statuses, elapsed)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                             timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(current: Dict, baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('git')}):")
+    for name, res in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        parts = []
+        for key in ("rps", "p50_ms", "p99_ms"):
+            if res.get(key) and old.get(key):
+                parts.append(f"{key} {old[key]} -> {res[key]} ({(res[key] / old[key] - 1) * 100:+.0f}%)")
+        print(f"  {name:<8} " + ", ".join(parts))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated: " + ", ".join(SCENARIOS))
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    ap.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="fake exchange response delay")
+    ap.add_argument("--jitter-ms", type=float, default=10.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of fake exchange responses that are HTTP 500")
+    ap.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra env for the API process")
+    ap.add_argument("--url", help="benchmark an already running API instead of starting one")
+    ap.add_argument("--output", help="result file (default: benchmarks/results/load-<timestamp>.json)")
+    ap.add_argument("--compare", metavar="JSON", help="print the change against an earlier result file")
+    args = ap.parse_args(argv)
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        ap.error(f"unknown scenario: {', '.join(unknown)}")
+
+    procs: List[subprocess.Popen] = []
+    tmp = tempfile.TemporaryDirectory(prefix="crypto-bench-")
+    fixtures: Optional[Dict[str, str]] = None
+    try:
+        base_url = args.url
+        if base_url is None:
+            fake_port = _free_port(4)
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.fake_exchange", "--port", str(fake_port),
+                 "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+                 "--error-rate", str(args.error_rate)],
+                cwd=ROOT, stdout=subprocess.DEVNULL,
+            ))
+            api_port = _free_port()
+            env = {
+                **os.environ,
+                **api_env("127.0.0.1", fake_port),
+                "DATABASE_URL": f"sqlite:///{os.path.join(tmp.name, 'bench.db')}",
+                "ROUTES_DIR": os.path.join(tmp.name, "routes"),
+                "SYMBOLS_FILE": os.path.join(tmp.name, "symbols.json"),
+                "PRICE_STREAM_ENABLED": "0",
+                "DEPTH_STREAM_ENABLED": "0",
+                "POLL_ENABLED": "0",
+            }
+            env.update(kv.split("=", 1) for kv in args.env)
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(api_port),
+                 "--log-level", "warning", "--no-access-log"],
+                # App logs go to stdout; uvicorn startup errors still reach stderr
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+            ))
+            base_url = f"http://127.0.0.1:{api_port}"
+            fixtures = asyncio.run(_wait_ready(f"http://127.0.0.1:{fake_port}/_stats"))["fixtures"]
+            if "synthetic" in fixtures.values():
+                print("note: no recorded ticker lists for", ", ".join(s for s, o in fixtures.items() if o == "synthetic"),
+                      "- the fake exchange serves synthetic ones (python -m benchmarks.bench_decoding --record)")
+        asyncio.run(_wait_ready(base_url + "/health"))
+
+        report: Dict[str, object] = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "git": _git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "target": args.url or "local",
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "fake_latency_ms": None if args.url else args.latency_ms,
+                "fake_jitter_ms": None if args.url else args.jitter_ms,
+                "fake_error_rate": None if args.url else args.error_rate,
+                # schema -> "recorded" or "synthetic" ticker lists behind the fake exchange
+                "fixtures": fixtures,
+                "env": args.env,
+            },
+            "results": {},
+        }
+        for name in names:
+            res = asyncio.run(run_scenario(base_url, SCENARIOS[name], args.concurrency, args.duration, args.warmup))
+            report["results"][name] = res
+            print(f"{name:<8} {res['rps']:>8} rps  p50 {res['p50_ms']} ms  p95 {res['p95_ms']} ms  "
+                  f"p99 {res['p99_ms']} ms  errors {res['error_rate']}  {res['statuses']}")
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        tmp.cleanup()
+
+    path = args.output or os.path.join(RESULTS, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"saved {path}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
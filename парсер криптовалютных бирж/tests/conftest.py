@@ -0,0 +1,37 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict
+
+import pytest
+from aiohttp import web
+
+from app.utils.http import close_shared_connector
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+@asynccontextmanager
+async def _serve(routes: Dict[str, Handler]) -> AsyncIterator[str]:
+    """Local HTTP server answering GET ``routes`` (path -> handler); yields its base URL.
+
+    On exit the shared outbound connector is closed too, so the next
+    ``asyncio.run`` starts with a fresh one.
+    """
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await close_shared_connector()
+        await runner.cleanup()
+
+
+@pytest.fixture
+def http_server():
+    """``async with http_server({"/path": handler}) as base_url: ...`` inside a test's ``asyncio.run``."""
+    return _serve
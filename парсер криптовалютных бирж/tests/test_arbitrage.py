@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.arbitrage import ArbitrageScanner
+
+SOURCES = ["binance", "bybit", "bitget"]
+
+
+def _scanner(n_symbols: int = 30, k: int = 3, **kw) -> ArbitrageScanner:
+    return ArbitrageScanner([f"S{i}" for i in range(n_symbols)], SOURCES, k=k, fee_bps=0.0, **kw)
+
+
+def test_update_ranks_best_spread_first():
+    scanner = _scanner()
+    scanner.update("binance", "S0", 100.0)
+    scanner.update("bybit", "S0", 101.0)
+    scanner.update("binance", "S1", 50.0)
+    assert scanner.update("bitget", "S1", 52.0)
+    top = scanner.opportunities()
+    assert [(o["symbol"], o["buy"], o["sell"]) for o in top] == [("S1", "binance", "bitget"), ("S0", "binance", "bybit")]
+    assert top[0]["spread_pct"] == pytest.approx(4.0)
+    assert top[1]["buy_price"] == 100.0 and top[1]["sell_price"] == 101.0
+
+
+def test_unknown_or_bad_quotes_are_ignored():
+    scanner = _scanner()
+    assert not scanner.update("kraken", "S0", 1.0)
+    assert not scanner.update("binance", "NOPE", 1.0)
+    assert not scanner.update("binance", "S0", 0.0)
+    assert not scanner.update("binance", "S0", float("nan"))
+    assert scanner.updates == 0 and scanner.opportunities() == []
+
+
+def test_k_above_the_maintained_top_is_served():
+    scanner = _scanner(k=3)
+    for i in range(20):
+        scanner.update("binance", f"S{i}", 100.0)
+        scanner.update("bybit", f"S{i}", 100.0 + i + 1)
+    assert len(scanner.opportunities()) == 3
+    top = scanner.opportunities(k=15)
+    assert len(top) == 15
+    assert [o["symbol"] for o in top] == [f"S{i}" for i in range(19, 4, -1)]
+    assert len(scanner.opportunities(k=15, rerank=False)) == 3
+
+
+def test_reads_drop_stale_quotes_without_touching_the_ranking():
+    scanner = _scanner(max_age=30.0)
+    now = time.time()
+    scanner.update("binance", "S0", 100.0, ts=now)
+    scanner.update("bybit", "S0", 110.0, ts=now)
+    scanner.update("binance", "S1", 100.0, ts=now)
+    scanner.update("bybit", "S1", 101.0, ts=now)
+    scanner.ts[0, 1] = now - 60  # S0's bybit quote goes stale after the last update
+    version = scanner.version
+    event = scanner.listen()
+    assert [o["symbol"] for o in scanner.opportunities()] == ["S1"]
+    assert scanner.version == version and not event.is_set()
+    assert [o["symbol"] for o in scanner.opportunities(rerank=False)] == ["S0", "S1"]
+
+
+def test_stale_quotes_do_not_rank_on_update():
+    scanner = _scanner(max_age=30.0)
+    old = time.time() - 60
+    scanner.update("binance", "S0", 100.0, ts=old)
+    assert not scanner.update("bybit", "S0", 110.0)
+    assert scanner.opportunities(rerank=False) == []
+
+
+def test_listeners_are_woken_only_when_the_ranking_changes():
+    scanner = _scanner()
+    event = scanner.listen()
+    scanner.update("binance", "S0", 100.0)
+    assert not event.is_set()
+    scanner.update("bybit", "S0", 101.0)
+    assert event.is_set() and scanner.version == 1
+    event.clear()
+    assert not scanner.update("bybit", "S0", 101.0)
+    assert not event.is_set()
+    scanner.unlisten(event)
+    assert scanner.stats()["listeners"] == 0
+
+
+class _ArbitrageClient:
+    def __init__(self, **params):
+        self.query_params = params
+        self.closed = None
+        self.sent = []
+
+    async def accept(self) -> None:
+        pass
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = code
+
+    async def send_json(self, data) -> None:
+        self.sent.append(data)
+
+
+@pytest.mark.parametrize("k", ["-3", "0", "101", "abc"])
+def test_ws_arbitrage_rejects_k_out_of_range(k):
+    from app import main
+
+    client = _ArbitrageClient(k=k)
+    asyncio.run(main.ws_arbitrage(client))
+    assert client.closed == 1008 and client.sent == []
+
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.services.cache import TickerCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_concurrent_misses_share_one_load():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"price": 100.0}
+
+    async def scenario():
+        cache = TickerCache(ttl=5.0)
+        results = await asyncio.gather(*(cache.get_or_fetch(("binance", "BTC"), loader) for _ in range(10)))
+        again = await cache.get_or_fetch(("binance", "BTC"), loader)
+        return cache, results, again
+
+    cache, results, again = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert results == [{"price": 100.0}] * 10 and again == {"price": 100.0}
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"], stats["stale_hits"]) == (1, 9, 1, 0)
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    clock = _Clock()
+    calls = []
+    release = None
+
+    async def loader():
+        calls.append(1)
+        await release.wait()
+        return len(calls)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        cache = TickerCache(ttl=2.0, stale_ttl=10.0, clock=clock)
+        cache.put("k", 0)
+        clock.now += 5.0  # stale but within stale_ttl
+        served = [await cache.get_or_fetch("k", loader) for _ in range(3)]
+        assert cache.stats()["inflight"] == 1
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return cache, served
+
+    cache, served = asyncio.run(scenario())
+    assert served == [0, 0, 0]
+    assert len(calls) == 1
+    assert cache.peek("k") == 1
+    assert cache.stats()["stale_hits"] == 3 and cache.stats()["inflight"] == 0
+
+
+def test_failed_load_is_not_cached():
+    attempts = []
+
+    async def loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return 42
+
+    async def scenario():
+        cache = TickerCache(ttl=5.0)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_fetch("k", loader)
+        assert cache.peek("k") is None
+        return cache, await cache.get_or_fetch("k", loader)
+
+    cache, value = asyncio.run(scenario())
+    assert value == 42 and len(attempts) == 2
+    assert cache.stats()["errors"] == 1 and cache.stats()["misses"] == 2
@@ -0,0 +1,191 @@
+import asyncio
+import json
+from typing import List, Optional, Tuple
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.models.db import Base
+from app.parsers.base import INTERVAL_MS, BaseParser, candle_to_dict
+from app.services.candles import CandleStore, fetch_candles, fetch_closes, rollup_candles
+
+T0 = 1_700_000_000_000 - 1_700_000_000_000 % INTERVAL_MS["1d"]
+MINUTE = INTERVAL_MS["1m"]
+
+
+def _candles(start_ms: int, n: int, step: int = MINUTE):
+    return [(start_ms + i * step, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 1.0) for i in range(n)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'candles.db'}", future=True)
+    Base.metadata.create_all(engine)
+    yield CandleStore(engine)
+    engine.dispose()
+
+
+def test_iter_chunks_matches_load(store):
+    candles = _candles(T0, 2_500)
+    store.upsert("binance", "BTC", "1m", candles)
+    end = T0 + 2_500 * MINUTE
+    chunks = list(store.iter_chunks("binance", "BTC", "1m", T0, end, chunk=1_000))
+    assert [len(c) for c in chunks] == [1_000, 1_000, 500]
+    assert [row for chunk in chunks for row in chunk] == store.load("binance", "BTC", "1m", T0, end)
+    rollup = [row for chunk in store.iter_chunks("binance", "BTC", "1h", T0, end, base="1m") for row in chunk]
+    assert rollup == store.load_rollup("binance", "BTC", "1m", "1h", T0, end)
+
+
+def test_history_body_streams_valid_json(store):
+    from app.main import _history_body
+
+    candles = _candles(T0, 1_234)
+    store.upsert("binance", "BTC", "1m", candles)
+    chunks = store.iter_chunks("binance", "BTC", "1m", T0, T0 + 10**9, chunk=500)
+    parts = list(_history_body(chunks))
+    assert len(parts) == 5  # "[", three chunks, "]"
+    assert json.loads(b"".join(parts)) == [candle_to_dict(c) for c in candles]
+    assert json.loads(b"".join(_history_body(iter([[], []])))) == []
+
+
+class FakeKlineParser(BaseParser):
+    """Serves synthetic 1m candles; ``truncate`` cuts every page to that many bars."""
+
+    name = "fake"
+    symbol_map = {"BTC": "BTCUSDT"}
+    kline_intervals = {"1m": "1m"}
+    kline_limit = 100
+
+    def __init__(self, truncate: Optional[int] = None, delay: float = 0.0):
+        self.truncate = truncate
+        self.delay = delay
+        self.calls: List[Tuple[int, int]] = []
+
+    async def _fetch_klines(self, pair, interval, start_ms, end_ms):
+        self.calls.append((start_ms, end_ms))
+        await asyncio.sleep(self.delay)
+        n = (end_ms - start_ms) // MINUTE + 1
+        return _candles(start_ms, min(n, self.truncate or n))
+
+    async def get_current_price(self, symbol):
+        raise NotImplementedError
+
+    async def get_all_prices(self, symbols=None):
+        return {}
+
+    async def get_order_book(self, symbol, limit=100):
+        raise NotImplementedError
+
+    async def get_instruments(self):
+        return []
+
+
+def test_concurrent_fills_fetch_once(store):
+    parser = FakeKlineParser(delay=0.01)
+    end = T0 + 499 * MINUTE
+
+    async def scenario():
+        return await asyncio.gather(*(
+            fetch_candles(parser, store, "fake", "BTC", "1m", T0, end) for _ in range(5)
+        ))
+
+    results = asyncio.run(scenario())
+    assert len(parser.calls) == 5  # one request per 100-bar page, not per caller
+    assert all(r == results[0] for r in results) and len(results[0]) == 500
+    assert store.coverage("fake", "BTC", "1m", T0, end) == [(T0, end)]
+
+
+def test_truncated_page_is_not_marked_covered(store):
+    end = T0 + 199 * MINUTE
+    short = FakeKlineParser(truncate=60)
+    rows = asyncio.run(fetch_candles(short, store, "fake", "BTC", "1m", T0, end))
+    assert len(rows) == 120  # 60 of each 100-bar page
+    # Covered only up to the first hole, the rest is still missing
+    assert store.coverage("fake", "BTC", "1m", T0, end) == [(T0, T0 + 59 * MINUTE)]
+    assert store.missing_ranges("fake", "BTC", "1m", T0, end) == [(T0 + 60 * MINUTE, end)]
+
+    full = FakeKlineParser()
+    rows = asyncio.run(fetch_candles(full, store, "fake", "BTC", "1m", T0, end))
+    assert full.calls == [(T0 + 60 * MINUTE, T0 + 159 * MINUTE), (T0 + 160 * MINUTE, end)]
+    assert [r[0] for r in rows] == [T0 + i * MINUTE for i in range(200)]
+    assert store.missing_ranges("fake", "BTC", "1m", T0, end) == []
+
+
+def test_fetch_closes_falls_back_until_archive_is_complete(store, tmp_path):
+    pytest.importorskip("pyarrow")
+    from app.services.archive import CandleArchive
+
+    archive = CandleArchive(str(tmp_path / "archive"))
+    end = T0 + 299 * MINUTE
+    # The first 100 bars were stored before the archive existed
+    store.upsert("fake", "BTC", "1m", _candles(T0, 100))
+    store.mark_covered("fake", "BTC", "1m", T0, T0 + 99 * MINUTE)
+    ts, close = asyncio.run(fetch_closes(FakeKlineParser(), store, "fake", "BTC", "1m", T0, end, archive))
+    assert ts.tolist() == [T0 + i * MINUTE for i in range(300)]
+    assert close.tolist() == [c[4] for c in store.load("fake", "BTC", "1m", T0, end)]
+
+    # Once the archive holds the whole range it is read instead of the store
+    archive.write("fake", "BTC", "1m", _candles(T0, 100))
+    store.load_closes = None  # type: ignore[assignment]
+    parser = FakeKlineParser()
+    ts2, close2 = asyncio.run(fetch_closes(parser, store, "fake", "BTC", "1m", T0, end, archive))
+    assert parser.calls == []
+    assert ts2.tolist() == ts.tolist() and close2.tolist() == close.tolist()
+    assert archive.read_arrays("fake", "BTC", "1m", T0, end)["ts"].size == 300
+
+
+def test_rollup_candles_buckets_ohlcv():
+    rows = [
+        (T0, 10.0, 12.0, 9.0, 11.0, 1.0),
+        (T0 + MINUTE, 11.0, 15.0, 10.0, 14.0, 2.0),
+        (T0 + 4 * MINUTE, 14.0, 14.5, 8.0, 9.5, 3.0),
+        (T0 + 5 * MINUTE, 9.5, 10.0, 9.0, 9.8, 4.0),  # next 5m bucket
+        (T0 + 11 * MINUTE, 9.8, 11.0, 9.7, 10.5, 5.0),  # 5m bucket with a hole before it
+    ]
+    assert rollup_candles(rows, 5 * MINUTE) == [
+        (T0, 10.0, 15.0, 8.0, 9.5, 6.0),
+        (T0 + 5 * MINUTE, 9.5, 10.0, 9.0, 9.8, 4.0),
+        (T0 + 10 * MINUTE, 9.8, 11.0, 9.7, 10.5, 5.0),
+    ]
+    assert rollup_candles([], 5 * MINUTE) == []
+
+
+def test_rollups_are_keyed_by_base_interval(store):
+    store.upsert("binance", "BTC", "1m", _candles(T0, 60))
+    store.upsert("binance", "BTC", "5m", [(T0 + i * 5 * MINUTE, 1.0, 2.0, 0.5, 1.5, 100.0) for i in range(12)])
+    from_1m = store.load_rollup("binance", "BTC", "1m", "1h", T0, T0)
+    from_5m = store.load_rollup("binance", "BTC", "5m", "1h", T0, T0)
+    assert from_1m == [(T0, 100.0, 160.0, 99.0, 159.5, 60.0)]
+    assert from_5m == [(T0, 1.0, 2.0, 0.5, 1.5, 1200.0)]
+    # 1d is built on top of the 1h level of the same base
+    assert store.load_rollup("binance", "BTC", "1m", "1d", T0, T0)[0][5] == 60.0
+
+
+def test_resolution_returns_only_whole_buckets(store):
+    hour = INTERVAL_MS["1h"]
+    parser = FakeKlineParser()
+    # Starts and ends mid-hour: both edge buckets must still be built from all 60 base bars
+    bars = asyncio.run(fetch_candles(parser, store, "fake", "BTC", "1m", T0 + 10 * MINUTE, T0 + 3 * hour + 20 * MINUTE,
+                                     resolution="1h"))
+    assert [b[0] for b in bars] == [T0 + i * hour for i in range(4)]
+    assert all(b[5] == 60.0 for b in bars)
+    assert store.coverage("fake", "BTC", "1m", T0, T0 + 4 * hour) == [(T0, T0 + 4 * hour - MINUTE)]
+
+
+@pytest.mark.parametrize("portable", [False, True], ids=["on_conflict", "delete_insert"])
+def test_upsert_overwrites_and_rolls_up(store, monkeypatch, portable):
+    if portable:
+        # What databases other than SQLite/PostgreSQL get
+        monkeypatch.setattr(store, "_native_insert", lambda table: None)
+    candles = _candles(T0, 1_500)
+    assert store.upsert("binance", "BTC", "1m", candles) == 1_500
+    changed = [(ts, o, h, l, c * 2, v) for ts, o, h, l, c, v in candles[100:1_200]]
+    repeated = changed + [(changed[-1][0], 1.0, 1.0, 1.0, 7.0, 1.0)]
+    store.upsert("binance", "BTC", "1m", repeated)
+    stored = store.load("binance", "BTC", "1m", T0, T0 + 1_499 * MINUTE)
+    assert len(stored) == 1_500
+    assert stored[:100] == candles[:100] and stored[1_200:] == candles[1_200:]
+    assert stored[100:1_199] == changed[:-1] and stored[1_199][4] == 7.0
+    hourly = store.load_rollup("binance", "BTC", "1m", "1h", T0, T0 + 24 * 60 * MINUTE)
+    assert len(hourly) == 25 and hourly[1][4] == stored[119][4]
+
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from app.services.correlation import RollingCorrelation, align_closes, align_series, pearson_matrix
+
+
+@pytest.mark.parametrize("window", [5, 50, 200])
+def test_rolling_matches_full(window):
+    rng = np.random.default_rng(window)
+    returns = rng.normal(size=(300, 4))
+    rolling = RollingCorrelation(4, window)
+    rolling.extend(returns)
+    np.testing.assert_allclose(rolling.matrix(), pearson_matrix(returns[-window:]), atol=1e-9)
+
+
+@pytest.mark.parametrize("constant", [0.0, 0.001])
+def test_constant_series_is_nan_in_both_modes(constant):
+    rng = np.random.default_rng(1)
+    returns = rng.normal(size=(100, 3))
+    returns[:, 1] = constant
+    rolling = RollingCorrelation(3, 100)
+    rolling.extend(returns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        full = pearson_matrix(returns)
+    got = rolling.matrix()
+    np.testing.assert_array_equal(np.isnan(got), np.isnan(full))
+    assert np.isnan(got[1]).all() and np.isnan(got[:, 1]).all()
+    np.testing.assert_allclose(got[[0, 2]][:, [0, 2]], full[[0, 2]][:, [0, 2]], atol=1e-9)
+
+
+def test_align_closes_matches_align_series():
+    a = [(3, 0, 0, 0, 30.0, 0), (1, 0, 0, 0, 10.0, 0), (2, 0, 0, 0, 20.0, 0)]
+    b = [(2, 0, 0, 0, 2.0, 0), (3, 0, 0, 0, 3.0, 0), (4, 0, 0, 0, 4.0, 0)]
+    ts, closes = align_closes({"A": a, "B": b})
+    assert ts.tolist() == [2, 3]
+    assert closes.tolist() == [[20.0, 2.0], [30.0, 3.0]]
+    ts2, closes2 = align_series({"A": (np.array([3, 1, 2]), np.array([30.0, 10.0, 20.0])),
+                                 "B": (np.array([2, 3, 4]), np.array([2.0, 3.0, 4.0]))})
+    assert ts2.tolist() == ts.tolist() and closes2.tolist() == closes.tolist()
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import create_engine, func, select
+
+from app.models.db import Base, Price
+from app.services.db_writer import BatchWriter, Row, insert_prices, prune_prices
+
+
+def _rows(n: int, start: int = 0) -> List[Row]:
+    return [{"i": i} for i in range(start, start + n)]
+
+
+def test_stop_flushes_the_batch_being_collected():
+    flushed: List[List[Row]] = []
+
+    async def scenario():
+        # The deadline is far away, so these rows sit in the writer's batch, not in the queue
+        writer = BatchWriter(flushed.append, max_batch=100, max_delay=30.0)
+        writer.start()
+        writer.offer_many(_rows(5))
+        await asyncio.sleep(0.05)
+        assert writer.stats()["queued"] == 0
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [row for batch in flushed for row in batch] == _rows(5)
+    assert writer.written == 5 and writer.failed == 0
+
+
+def test_stop_waits_for_a_running_flush_and_drains_the_rest():
+    flushed: List[List[Row]] = []
+
+    def slow_flush(rows: List[Row]) -> None:
+        time.sleep(0.1)
+        flushed.append(rows)
+
+    async def scenario():
+        writer = BatchWriter(slow_flush, max_batch=10, max_delay=0.01)
+        writer.start()
+        writer.offer_many(_rows(10))
+        await asyncio.sleep(0.03)  # first batch is now being written
+        writer.offer_many(_rows(25, start=10))
+        await writer.stop()
+        writer.offer_many(_rows(3, start=35))  # after stop: flushed by the next stop
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [row for batch in flushed for row in batch] == _rows(38)
+    assert all(len(batch) <= 10 for batch in flushed)
+    assert writer.written == 38 and writer.dropped == 0
+
+
+def test_prune_prices_keeps_rows_inside_the_retention_window(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'prices.db'}", future=True)
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    insert_prices(engine, [
+        {"timestamp": now - timedelta(hours=h), "symbol": "BTC", "price": 100.0, "source": "binance"}
+        for h in (0, 1, 80, 100)
+    ])
+    assert prune_prices(engine, now - timedelta(hours=72)) == 2
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(Price)).scalar() == 2
+    engine.dispose()
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from app.parsers import BinanceParser
+from app.parsers.bitget import _extract_price
+from app.utils import decoding
+
+# GET /api/v3/ticker/price as Binance returns it (trimmed to a few pairs)
+TICKER_PRICE = (
+    b'[{"symbol":"ETHBTC","price":"0.05123000"},'
+    b'{"symbol":"BTCUSDT","price":"65000.50000000"},'
+    b'{"symbol":"ETHUSDT","price":"3350.01000000"},'
+    b'{"symbol":"BNBBTC","price":"0.00891000"},'
+    b'{"symbol":"SOLUSDT","price":"142.37000000"}]'
+)
+
+
+@pytest.fixture(params=["typed", "plain"])
+def backend(request, monkeypatch):
+    if request.param == "typed":
+        if decoding.msgspec is None:
+            pytest.skip("msgspec not installed")
+    else:
+        # What the parsers get without msgspec: plain dicts from loads()
+        monkeypatch.setattr(decoding, "_DECODERS", {})
+    return request.param
+
+
+def test_binance_get_all_prices_through_read_json(http_server, backend):
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(body=TICKER_PRICE, content_type="application/json")
+
+    async def scenario():
+        async with http_server({"/api/v3/ticker/price": handler}) as base_url:
+            parser = BinanceParser()
+            parser.base_url = base_url
+            try:
+                return await parser.get_all_prices(["BTC", "ETH", "SOL", "DOGE"])
+            finally:
+                await parser.close()
+
+    prices = asyncio.run(scenario())
+    assert prices == {
+        "BTC": {"symbol": "BTC", "price": 65000.5, "source": "binance", "currency": "USDT"},
+        "ETH": {"symbol": "ETH", "price": 3350.01, "source": "binance", "currency": "USDT"},
+        "SOL": {"symbol": "SOL", "price": 142.37, "source": "binance", "currency": "USDT"},
+    }
+
+
+def test_error_envelope_falls_back_to_plain_json(backend):
+    data = decoding.decode(b'{"code":-1003,"msg":"Too many requests"}', "binance_tickers")
+    assert data == {"code": -1003, "msg": "Too many requests"}
+
+
+# Bitget tickers without lastPr/close/last: the price comes from a fallback field
+BITGET_FALLBACKS = (
+    b'{"code":"00000","data":['
+    b'{"symbol":"BTCUSDT","markPr":"65000.1","bidPr":"64999"},'
+    b'{"instId":"ETHUSDT_SPBL","markPrice":"3350.2"},'
+    b'{"symbol":"SOLUSDT","bestBid":"142.3","bestAsk":"142.5"},'
+    b'{"symbol":"DOGEUSDT","bid1Price":"0.1","ask1Price":"0.2"},'
+    b'{"symbol":"XRPUSDT","ask1Price":"0.6"},'
+    b'{"symbol":"ADAUSDT"}]}'
+)
+
+
+def test_bitget_fallback_fields_decode_the_same_on_both_paths(backend):
+    data = decoding.decode(BITGET_FALLBACKS, "bitget_tickers")
+    if backend == "typed":
+        assert isinstance(data, decoding.BitgetTickers)
+    prices = [_extract_price(it) for it in data.get("data")]
+    assert prices == [65000.1, 3350.2, 142.3, 0.1, 0.6, None]
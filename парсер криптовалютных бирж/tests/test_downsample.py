@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from app.services.downsample import lttb_indices
+
+
+def _series(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=np.float64), np.cumsum(rng.normal(size=n))
+
+
+@pytest.mark.parametrize("n, n_out", [(1000, 100), (101, 7), (10, 3)])
+def test_keeps_endpoints_and_one_point_per_bucket(n, n_out):
+    x, y = _series(n)
+    idx = lttb_indices(x, y, n_out)
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+@pytest.mark.parametrize("n_out", [50, 51, 1000, 2])
+def test_short_series_or_tiny_budget_is_returned_whole(n_out):
+    x, y = _series(50)
+    assert lttb_indices(x, y, n_out).tolist() == list(range(50))
+
+
+def test_keeps_a_spike():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[437] = 50.0
+    assert 437 in lttb_indices(x, y, 20)
@@ -0,0 +1,15 @@
+import pytest
+
+from app import main
+from app.utils.encoding import check_payload
+
+
+def test_fast_payload_builders_match_their_response_models():
+    main._check_fast_payloads()
+
+
+def test_check_payload_rejects_drift():
+    payload = main._price_payload({"symbol": "BTC", "price": 100, "source": "binance", "currency": "USDT"})
+    check_payload(main.PriceResponse, payload)
+    with pytest.raises(ValueError):
+        check_payload(main.PriceResponse, {**payload, "extra": 1})
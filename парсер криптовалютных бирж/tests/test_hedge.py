@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.cache import TickerCache
+from app.utils.hedge import HedgedCallError, LatencyTracker, hedged_call
+
+
+def _sources(behaviour, log):
+    """``call(source)`` per ``behaviour[source] = (seconds, result or exception)``; logs starts and cancels."""
+
+    async def call(src):
+        log.append(("start", src, time.monotonic()))
+        seconds, outcome = behaviour[src]
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            log.append(("cancelled", src, time.monotonic()))
+            raise
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return call
+
+
+def _started(log):
+    return [src for event, src, _ in log if event == "start"]
+
+
+def test_slow_primary_starts_a_backup_after_the_delay():
+    log = []
+    call = _sources({"a": (1.0, "A"), "b": (0.0, "B"), "c": (0.0, "C")}, log)
+    t0 = time.monotonic()
+    assert asyncio.run(hedged_call(["a", "b", "c"], call, lambda src: 0.05)) == ("b", "B")
+    starts = {src: ts - t0 for event, src, ts in log if event == "start"}
+    assert _started(log) == ["a", "b"]
+    assert 0.04 <= starts["b"] < 0.5
+
+
+def test_fast_failure_starts_the_next_source_immediately():
+    log = []
+    call = _sources({"a": (0.0, RuntimeError("down")), "b": (0.0, "B")}, log)
+    t0 = time.monotonic()
+    assert asyncio.run(hedged_call(["a", "b"], call, lambda src: 10.0)) == ("b", "B")
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_losing_attempts_are_cancelled():
+    log = []
+    call = _sources({"a": (1.0, "A"), "b": (1.0, "B"), "c": (0.01, "C")}, log)
+    assert asyncio.run(hedged_call(["a", "b", "c"], call, lambda src: 0.01)) == ("c", "C")
+    assert sorted(src for event, src, _ in log if event == "cancelled") == ["a", "b"]
+
+
+def test_all_errors_are_collected():
+    log = []
+    call = _sources({"a": (0.0, RuntimeError("down")), "b": (0.0, ValueError("not listed"))}, log)
+    with pytest.raises(HedgedCallError) as info:
+        asyncio.run(hedged_call(["a", "b"], call, lambda src: 0.01))
+    assert {src: type(e) for src, e in info.value.errors.items()} == {"a": RuntimeError, "b": ValueError}
+    assert "a: down" in str(info.value) and "b: not listed" in str(info.value)
+
+
+def test_losing_cached_attempt_cancels_its_upstream_call_unless_shared():
+    upstream = []
+
+    def loader(src, seconds):
+        async def load():
+            try:
+                await asyncio.sleep(seconds)
+            except asyncio.CancelledError:
+                upstream.append(src)
+                raise
+            return src
+        return load
+
+    async def scenario():
+        cache = TickerCache(ttl=5.0)
+        delays = {"a": 1.0, "b": 0.0}
+        call = lambda src: cache.get_or_fetch((src, "BTC"), loader(src, delays[src]))  # noqa: E731
+        won = await hedged_call(["a", "b"], call, lambda src: 0.01)
+        await asyncio.sleep(0.01)  # losers are cancelled, not awaited
+        assert upstream == ["a"] and cache.abandoned == 1
+
+        # Another request still waits on the slow source: the hedge loser leaves the call running
+        other = asyncio.ensure_future(cache.get_or_fetch(("a", "ETH"), loader("a-eth", 0.05)))
+        await asyncio.sleep(0)
+        delays["a"] = 0.05
+        call = lambda src: cache.get_or_fetch((src, "ETH"), loader(src, delays[src]))  # noqa: E731
+        await hedged_call(["a", "b"], call, lambda src: 0.01)
+        assert await other == "a-eth"
+        return won, cache
+
+    won, cache = asyncio.run(scenario())
+    assert won == ("b", "b")
+    assert upstream == ["a"] and cache.abandoned == 1
+
+
+def test_latency_tracker_percentiles_need_enough_samples():
+    tracker = LatencyTracker(size=4)
+    for s in (0.1, 0.2, 0.3):
+        tracker.observe("binance", s)
+    assert tracker.percentile("binance", 50) is None
+    assert tracker.percentile("binance", 50, min_samples=3) == pytest.approx(0.2)
+    for s in (1.0, 1.0, 1.0):
+        tracker.observe("binance", s)  # window keeps the last 4
+    assert tracker.stats()["binance"]["samples"] == 4
+    assert tracker.percentile("binance", 50, min_samples=1) == pytest.approx(1.0)
@@ -0,0 +1,20 @@
+import asyncio
+
+from app.utils import http
+
+
+def test_pool_stats_survives_private_attribute_changes(monkeypatch):
+    async def scenario():
+        conn = http.shared_connector()
+        try:
+            fresh = http.pool_stats()
+            monkeypatch.setattr(conn, "_conns", {object(): []}, raising=False)  # keys without .host
+            broken = http.pool_stats()
+        finally:
+            await http.close_shared_connector()
+        return fresh, broken
+
+    fresh, broken = asyncio.run(scenario())
+    assert fresh["open"] == 0 and fresh["hosts"] == {}
+    assert broken == {**fresh, "hosts": {}}
+    assert broken["limit"] == http.HTTP_POOL_LIMIT
@@ -0,0 +1,55 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.services.http_cache import ConditionalGetMiddleware, StaticAsset
+
+
+def _request(**headers) -> Request:
+    raw = [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_if_none_match_only_matches_the_selected_variant():
+    asset = StaticAsset(b"<html>" + b"x" * 2000 + b"</html>", "text/html")
+    gzip_etag = asset.variants["gzip"][1]
+    identity = asset.response(_request(if_none_match=gzip_etag))
+    assert identity.status_code == 200 and identity.body.startswith(b"<html>")
+    cached = asset.response(_request(accept_encoding="gzip", if_none_match=gzip_etag))
+    assert cached.status_code == 304 and cached.headers["etag"] == gzip_etag
+
+
+def _price_app() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(ConditionalGetMiddleware, max_age={"/api/crypto/{symbol}": 2.0}.get)
+
+    @app.get("/api/crypto/{symbol}")
+    async def price(symbol: str):
+        return {"symbol": symbol.upper(), "price": 65000.5}
+
+    @app.get("/api/uncached")
+    async def uncached():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_conditional_get_on_price_json():
+    client = _price_app()
+    first = client.get("/api/crypto/btc")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.json()["symbol"] == "BTC"
+    assert first.headers["cache-control"] == "public, max-age=2"
+
+    cached = client.get("/api/crypto/btc", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["etag"] == etag and "content-type" not in cached.headers
+
+    # Another representation's validator (another symbol, or the gzip variant's tag) does not match
+    for other in (client.get("/api/crypto/eth").headers["etag"], etag[:-1] + '-gz"'):
+        again = client.get("/api/crypto/btc", headers={"If-None-Match": other})
+        assert again.status_code == 200 and again.json()["price"] == 65000.5
+
+    plain = client.get("/api/uncached", headers={"If-None-Match": "*"})
+    assert plain.status_code == 200 and "etag" not in plain.headers
+
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import indicators as batch
+from app.services.streaming_indicators import IndicatorState, RollingWindow, RunningEMA, RunningRSI
+
+
+def _series(seed: int, n: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    x = 100 + np.cumsum(rng.normal(0, 1, n))
+    # Flat stretch: zero losses and zero variance windows
+    start = n // 3
+    x[start:start + 25] = x[start]
+    return x
+
+
+def _assert_same(streamed, expected) -> None:
+    expected = pd.to_numeric(pd.Series(expected), errors="coerce").to_numpy(dtype=float)
+    np.testing.assert_allclose(np.asarray(streamed, dtype=float), expected, rtol=1e-9, atol=1e-5, equal_nan=True)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("window", [2, 5, 14, 30])
+def test_streaming_matches_batch(seed, window):
+    x = _series(seed, 400)
+    s = pd.Series(x)
+    state = IndicatorState(window=window)
+    rows = [state.update(v) for v in x]
+
+    _assert_same([r["sma"] for r in rows], batch.compute_sma(s, window))
+    _assert_same([r["ema"] for r in rows], batch.compute_ema(s, window))
+    _assert_same([r["rsi"] for r in rows], batch.compute_rsi(s, window))
+    macd = batch.compute_macd(s)
+    for key in ("macd", "signal", "hist"):
+        _assert_same([r["macd"][key] for r in rows], macd[key])
+    bb = batch.compute_bollinger(s)
+    for key in ("middle", "upper", "lower"):
+        _assert_same([r["bollinger"][key] for r in rows], bb[key])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_engine_matches_pandas_helpers(seed):
+    x = _series(seed, 600)
+    s = pd.Series(x)
+    res = batch.compute_indicators(x, window=14)
+    _assert_same(res["sma"], batch.compute_sma(s, 14))
+    _assert_same(res["ema"], batch.compute_ema(s, 14))
+    _assert_same(res["rsi"], batch.compute_rsi(s, 14))
+    for key, series in batch.compute_macd(s).items():
+        _assert_same(res["macd"][key], series)
+    for key, series in batch.compute_bollinger(s).items():
+        _assert_same(res["bollinger"][key], series)
+
+
+def test_engine_bollinger_from_rolling_sums_stays_accurate():
+    # Long, high-priced series: the variance comes from sums and sums of squares, not per-window passes
+    x = _series(11, 50000) * 1000 + 60000
+    s = pd.Series(x)
+    res = batch.compute_indicators(x, names=["bollinger"], bb_window=20)
+    scale = float(np.abs(x).max())
+    for key, series in batch.compute_bollinger(s, 20).items():
+        np.testing.assert_allclose(res["bollinger"][key], series.to_numpy(), rtol=0, atol=1e-9 * scale, equal_nan=True)
+    flat = slice(50000 // 3 + 19, 50000 // 3 + 25)
+    assert np.all(res["bollinger"]["upper"][flat] == res["bollinger"]["middle"][flat])
+
+
+def test_rolling_window_stays_exact_over_long_runs():
+    x = _series(7, 20000) * 1000
+    win = RollingWindow(20)
+    for v in x:
+        win.update(v)
+    tail = x[-20:]
+    assert win.sma() == pytest.approx(tail.mean(), rel=1e-12)
+    assert win.std() == pytest.approx(tail.std(ddof=1), rel=1e-6)
+
+
+def test_warmup_values_are_nan():
+    ema = RunningEMA(10)
+    assert ema.update(5.0) == 5.0
+    rsi = RunningRSI(3)
+    assert np.isnan(rsi.update(1.0))
+    assert np.isnan(rsi.update(2.0))
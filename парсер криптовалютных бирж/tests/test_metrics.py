@@ -0,0 +1,54 @@
+import re
+
+from fastapi.testclient import TestClient
+from yarl import URL
+
+from app.utils import metrics
+from app.utils.metrics import endpoint_label
+
+
+def test_endpoint_label_keeps_variant_and_folds_symbols():
+    linear = endpoint_label(URL("https://api.bybit.com/v5/market/tickers?category=linear&symbol=BTCUSDT"))
+    spot = endpoint_label("https://api.bybit.com/v5/market/tickers?category=spot&symbol=ETHUSDT")
+    assert linear == "/v5/market/tickers?category=linear"
+    assert spot == "/v5/market/tickers?category=spot"
+    assert endpoint_label(URL("https://api.exchange.coinbase.com/products/BTC-USD/ticker")) == "/products/{product}/ticker"
+    assert endpoint_label("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT") == "/api/v3/ticker/price"
+
+
+def _samples(text: str, name: str, **labels: str):
+    """{le or "": value} of the series ``name`` whose labels include ``labels``."""
+    out = {}
+    for line in text.splitlines():
+        match = re.match(rf"{name}(?:{{(.*)}})? (\S+)$", line)
+        if not match:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(1) or ""))
+        if all(found.get(k) == v for k, v in labels.items()):
+            out[found.get("le", "")] = float(match.group(2))
+    return out
+
+
+def test_request_metrics_by_route_template():
+    from app import main
+
+    client = TestClient(main.app)
+    series = dict(method="GET", route="/api/crypto/{symbol}", status="400")
+    before = _samples(client.get("/metrics").text, "crypto_http_request_duration_seconds_count", **series)
+    for symbol in ("NOTACOIN1", "NOTACOIN2", "NOTACOIN3"):
+        assert client.get(f"/api/crypto/{symbol}").status_code == 400
+    text = client.get("/metrics").text
+
+    assert "NOTACOIN" not in text
+    count = _samples(text, "crypto_http_request_duration_seconds_count", **series)[""]
+    assert count - before.get("", 0.0) == 3
+    buckets = _samples(text, "crypto_http_request_duration_seconds_bucket", **series)
+    values = [buckets[le] for le in sorted(buckets, key=float)]
+    assert values == sorted(values) and buckets["+Inf"] == count
+    total = _samples(text, "crypto_http_request_duration_seconds_sum", **series)[""]
+    assert 0 < total < count * 10
+
+    # The scrape counts itself while it renders; nothing is left in flight afterwards
+    assert _samples(text, "crypto_http_requests_in_flight") == {"": 1.0}
+    assert _samples(metrics.render(), "crypto_http_requests_in_flight") == {"": 0.0}
+
@@ -0,0 +1,112 @@
+import json
+import zlib
+
+import pytest
+
+from app.services.depth import BitgetDepthStream, BybitDepthStream, CoinbaseDepthStream, bitget_checksum
+from app.services.orderbook import BookSide, OrderBook, OrderBookStore
+
+
+def test_book_side_set_keeps_best_first():
+    bids = BookSide(bids=True, capacity=2)
+    for price, size in [(100, 1), (102, 2), (101, 3), (99, 4)]:
+        bids.set(price, size)
+    assert bids.levels(10) == [[102, 2], [101, 3], [100, 1], [99, 4]]
+    bids.set(101, 5)  # update in place
+    bids.set(102, 0)  # delete the best level
+    bids.set(98.5, 0)  # deleting a missing level is a no-op
+    assert bids.levels(10) == [[101, 5], [100, 1], [99, 4]]
+    assert bids.best() == 101
+
+    asks = BookSide(bids=False, max_levels=2)
+    for price in (103, 101, 102):
+        asks.set(price, 1)
+    assert asks.prices.tolist() == [101, 102]  # 103 fell off the end
+
+
+def test_book_side_fill_walks_levels():
+    asks = BookSide(bids=False)
+    asks.replace([("100", "1"), ("101", "2"), ("0.5", "0")])
+    assert asks.n == 2
+    assert asks.fill(50) == (0.5, 50, 1)
+    base, quote, used = asks.fill(201)
+    assert (base, quote, used) == (pytest.approx(2.0), 201, 2)
+    assert asks.fill(10_000) == (3.0, 302.0, 2)  # more than the book holds
+    assert asks.fill(0) == (0.0, 0.0, 0)
+
+
+def test_effective_price_and_slippage():
+    book = OrderBook("binance", "BTC")
+    book.load_snapshot([("99", "1"), ("98", "1")], [("100", "1"), ("102", "1")])
+    buy = book.effective_price("buy", 151)
+    assert buy["base_qty"] == pytest.approx(1.5)
+    assert buy["avg_price"] == pytest.approx(151 / 1.5)
+    assert buy["complete"] and buy["levels"] == 2 and buy["worst_price"] == 102
+    assert buy["slippage_bps"] == pytest.approx((151 / 1.5 / 100 - 1) * 10_000)
+    sell = book.effective_price("sell", 1_000)
+    assert not sell["complete"] and sell["filled_notional"] == 197
+    with pytest.raises(ValueError):
+        book.effective_price("hold", 1)
+
+
+def _frames(stream, *msgs):
+    return [stream.handle(json.dumps(m)) for m in msgs]
+
+
+def test_bybit_gap_resubscribes():
+    store = OrderBookStore()
+    stream = BybitDepthStream(store, ["BTC"])
+    topic = "orderbook.50.BTCUSDT"
+    snap = {"topic": topic, "type": "snapshot", "data": {"s": "BTCUSDT", "b": [["100", "1"]], "a": [["101", "1"]], "u": 7}}
+    delta = lambda u: {"topic": topic, "type": "delta", "data": {"s": "BTCUSDT", "b": [["100", "2"]], "a": [], "u": u}}
+    assert _frames(stream, snap, delta(8), delta(9)) == [1, 1, 1]
+    assert stream._outbox == []
+    assert _frames(stream, delta(11)) == [0]
+    book = store.get("bybit", "BTC")
+    assert not book.synced and stream.resyncs == 1
+    assert stream._outbox == [{"op": "unsubscribe", "args": [topic]}, {"op": "subscribe", "args": [topic]}]
+    assert _frames(stream, delta(12)) == [0]  # ignored until the new snapshot
+    assert _frames(stream, snap) == [1] and book.synced
+
+
+def _bitget(action, seq, bids, asks, checksum=None):
+    item = {"bids": bids, "asks": asks, "seq": seq}
+    if checksum is not None:
+        item["checksum"] = checksum
+    return {"action": action, "arg": {"instType": "SPOT", "channel": "books", "instId": "BTCUSDT"}, "data": [item]}
+
+
+def test_bitget_checksum_and_seq():
+    store = OrderBookStore()
+    stream = BitgetDepthStream(store, ["BTC"])
+    bids, asks = [["100.50", "1.0"], ["100.00", "2"]], [["101.00", "0.5"]]
+    snap = _bitget("snapshot", 10, bids, asks, bitget_checksum([tuple(b) for b in bids], [tuple(a) for a in asks]))
+    good = bitget_checksum([("100.50", "3"), ("100.00", "2")], [("101.00", "0.5")])
+    assert _frames(stream, snap, _bitget("update", 11, [["100.50", "3"]], [], good)) == [1, 1]
+    assert stream.resyncs == 0 and store.get("bitget", "BTC").bids.levels(1) == [[100.5, 3.0]]
+
+    assert _frames(stream, _bitget("update", 12, [["100.00", "0"]], [], good)) == [0]  # stale checksum
+    assert stream.resyncs == 1 and not store.get("bitget", "BTC").synced
+    assert [m["op"] for m in stream._outbox] == ["unsubscribe", "subscribe"]
+
+    stream._outbox.clear()
+    assert _frames(stream, snap, _bitget("update", 9, [], [])) == [1, 0]  # seq went backwards
+    assert stream.resyncs == 2 and stream._outbox
+
+
+def test_bitget_checksum_interleaves_sides():
+    # Bid before ask at each depth, then the longer side alone
+    expected = zlib.crc32(b"1:2:3:4:5:6")
+    assert bitget_checksum([("1", "2"), ("5", "6")], [("3", "4")]) == expected - (1 << 32 if expected >= 1 << 31 else 0)
+
+
+def test_coinbase_crossed_book_resubscribes():
+    store = OrderBookStore()
+    stream = CoinbaseDepthStream(store, ["BTC"])
+    snap = {"type": "snapshot", "product_id": "BTC-USD", "bids": [["100", "1"]], "asks": [["101", "1"]]}
+    ok = {"type": "l2update", "product_id": "BTC-USD", "changes": [["buy", "100.5", "1"]]}
+    crossed = {"type": "l2update", "product_id": "BTC-USD", "changes": [["buy", "101.5", "1"]]}
+    assert _frames(stream, snap, ok, crossed) == [1, 1, 0]
+    assert stream.resyncs == 1 and not store.get("coinbase", "BTC").synced
+    assert [m["type"] for m in stream._outbox] == ["unsubscribe", "subscribe"]
+    assert stream._outbox[1]["product_ids"] == ["BTC-USD"]
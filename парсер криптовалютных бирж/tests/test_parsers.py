@@ -0,0 +1,117 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from app.parsers import BitgetParser, BybitParser, CoinbaseParser
+
+
+async def _with_parser(http_server, parser_cls, routes, call):
+    """``call(parser)`` with ``parser_cls`` pointed at a local server answering ``routes``."""
+    async with http_server(routes) as base_url:
+        parser = parser_cls()
+        parser.base_url = base_url
+        try:
+            return await call(parser)
+        finally:
+            await parser.close()
+
+
+def _call_variants(http_server, parser_cls, status: int):
+    """Run the non-strict first price variant of ``parser_cls`` against a server answering ``status``."""
+
+    async def reply(request: web.Request) -> web.Response:
+        return web.Response(status=status, text="{}")
+
+    async def first_variant(parser):
+        return await next(iter(parser._price_variants("BTCUSDT").values()))()
+
+    return asyncio.run(_with_parser(http_server, parser_cls, {"/{tail:.*}": reply}, first_variant))
+
+
+@pytest.mark.parametrize("parser_cls", [BybitParser, BitgetParser])
+@pytest.mark.parametrize("status", [400, 404])
+def test_missing_symbol_means_try_next_variant(http_server, parser_cls, status):
+    with pytest.raises(ValueError):
+        _call_variants(http_server, parser_cls, status)
+
+
+@pytest.mark.parametrize("parser_cls", [BybitParser, BitgetParser])
+@pytest.mark.parametrize("status", [429, 503])
+def test_rate_limit_and_server_errors_raise(http_server, parser_cls, status):
+    with pytest.raises(aiohttp.ClientResponseError) as info:
+        _call_variants(http_server, parser_cls, status)
+    assert info.value.status == status
+
+
+def test_bitget_list_lookup_matches_the_symbol_exactly():
+    items = [{"symbol": "1000BTCUSDT", "lastPr": "1"}, {"symbol": "BTCUSDT_UMCBL", "lastPr": "2"},
+             {"symbol": "btcusdt", "lastPr": "3"}]
+    assert BitgetParser._find_in_list(items, "BTCUSDT", "BTCUSDT_SPBL") == 3.0
+    with pytest.raises(ValueError):
+        BitgetParser._find_in_list(items[:2], "BTCUSDT", "BTCUSDT_SPBL")
+
+
+def _json(payload):
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response(payload)
+    return handler
+
+
+def test_bybit_fills_linear_gaps_from_spot(http_server):
+    lists = {
+        "linear": [{"symbol": "BTCUSDT", "lastPrice": "65000.5"}, {"symbol": "ETHUSDT", "lastPrice": "3350"}],
+        "spot": [{"symbol": "BTCUSDT", "lastPrice": "1"}, {"symbol": "SOLUSDT", "lastPrice": "142.37"}],
+    }
+    seen = []
+
+    async def tickers(request: web.Request) -> web.Response:
+        category = request.query["category"]
+        seen.append(category)
+        return web.json_response({"retCode": 0, "result": {"category": category, "list": lists[category]}})
+
+    prices = asyncio.run(_with_parser(
+        http_server, BybitParser, {"/v5/market/tickers": tickers},
+        lambda p: p.get_all_prices(["BTC", "ETH", "SOL"]),
+    ))
+    assert seen == ["linear", "spot"]
+    # Linear wins where both list the pair
+    assert {s: v["price"] for s, v in prices.items()} == {"BTC": 65000.5, "ETH": 3350.0, "SOL": 142.37}
+    assert all(v["source"] == "bybit" and v["currency"] == "USDT" for v in prices.values())
+
+    seen.clear()
+    asyncio.run(_with_parser(
+        http_server, BybitParser, {"/v5/market/tickers": tickers}, lambda p: p.get_all_prices(["BTC", "ETH"]),
+    ))
+    assert seen == ["linear"]  # nothing missing, spot is not fetched
+
+
+def test_bitget_falls_back_to_the_v1_list(http_server):
+    async def v2_down(request: web.Request) -> web.Response:
+        return web.Response(status=404, text="{}")
+
+    v1 = _json({"code": "00000", "data": [
+        {"symbol": "BTCUSDT_SPBL", "close": "65000.5"},
+        {"symbol": "ETHUSDT_SPBL", "buyOne": "3349", "sellOne": "3351"},
+        {"symbol": "BTCUSDT_UMCBL", "close": "1"},
+    ]})
+    prices = asyncio.run(_with_parser(
+        http_server, BitgetParser,
+        {"/api/v2/spot/market/tickers": v2_down, "/api/spot/v1/market/tickers": v1},
+        lambda p: p.get_all_prices(["BTC", "ETH", "SOL"]),
+    ))
+    assert {s: v["price"] for s, v in prices.items()} == {"BTC": 65000.5, "ETH": 3349.0}
+
+
+def test_coinbase_inverts_usd_exchange_rates(http_server):
+    rates = _json({"data": {"currency": "USD", "rates": {"BTC": "0.00002", "ETH": "0.0004", "SOL": "0", "DOGE": "x"}}})
+    prices = asyncio.run(_with_parser(
+        http_server, CoinbaseParser, {"/v2/exchange-rates": rates},
+        lambda p: p.get_all_prices(["BTC", "ETH", "SOL", "DOGE", "BNB"]),
+    ))
+    assert prices == {
+        "BTC": {"symbol": "BTC", "price": pytest.approx(50000.0), "source": "coinbase", "currency": "USD"},
+        "ETH": {"symbol": "ETH", "price": pytest.approx(2500.0), "source": "coinbase", "currency": "USD"},
+    }
+
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from app.services.poller import SourcePoller
+from app.services.stream import PriceBook
+
+
+def _run(poller: SourcePoller, seconds: float, *extra):
+    async def scenario():
+        tasks = [asyncio.create_task(poller.run()), *(asyncio.create_task(c) for c in extra)]
+        await asyncio.sleep(seconds)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_overrun_skips_missed_ticks_instead_of_catching_up():
+    calls = []
+
+    async def slow_fetch():
+        calls.append(time.monotonic())
+        await asyncio.sleep(0.125)  # longer than two intervals
+        return {"BTC": {"price": 100.0, "currency": "USDT"}}
+
+    poller = SourcePoller("binance", slow_fetch, PriceBook(), interval=0.05)
+    _run(poller, 0.3)
+    stats = poller.stats()
+    assert stats["overruns"] >= 1
+    # Each 125 ms poll covers the tick it ran on plus two missed ones
+    assert stats["skipped_ticks"] == 2 * stats["overruns"]
+    assert all(b - a >= 0.11 for a, b in zip(calls, calls[1:]))
+    assert stats["last_duration_ms"] >= 110
+
+
+def test_lag_records_how_late_a_poll_starts():
+    async def fetch():
+        return {"BTC": {"price": 100.0}}
+
+    async def block_loop():
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # the poller's tick at 50 ms fires around 120 ms
+
+    book = PriceBook()
+    poller = SourcePoller("bybit", fetch, book, interval=0.05)
+    _run(poller, 0.2, block_loop())
+    assert poller.max_lag >= 0.05
+    assert poller.stats()["max_lag_ms"] >= 50
+    assert poller.errors == 0 and poller.polls >= 2
+    assert book.get("bybit", "BTC")["price"] == 100.0
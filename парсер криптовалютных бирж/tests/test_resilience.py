@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from app.utils import resilience
+from app.utils.resilience import AdaptiveRateLimiter, CircuitBreaker, CircuitOpenError
+
+
+class _Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _ok():
+    return "ok"
+
+
+async def _boom():
+    raise RuntimeError("502 from upstream")
+
+
+async def _unlisted():
+    raise ValueError("symbol not listed")
+
+
+def _call(breaker: CircuitBreaker, fn):
+    return asyncio.run(breaker.call(fn))
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = _Clock()
+    breaker = CircuitBreaker("bybit", failure_threshold=3, reset_timeout=30.0, clock=clock)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            _call(breaker, _boom)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        _call(breaker, _ok)
+    clock.now += 29.0
+    with pytest.raises(CircuitOpenError):
+        _call(breaker, _ok)
+    assert breaker.stats()["short_circuited"] == 2
+
+    clock.now += 1.0
+    assert _call(breaker, _ok) == "ok"  # the half-open probe succeeds
+    assert breaker.stats() == {"state": "closed", "failures": 0, "short_circuited": 2}
+
+
+def test_failed_probe_reopens_for_another_timeout():
+    clock = _Clock()
+    breaker = CircuitBreaker("bitget", failure_threshold=1, reset_timeout=10.0, clock=clock)
+    with pytest.raises(RuntimeError):
+        _call(breaker, _boom)
+    clock.now += 10.0
+    with pytest.raises(RuntimeError):
+        _call(breaker, _boom)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 9.0
+    with pytest.raises(CircuitOpenError):
+        _call(breaker, _ok)
+
+
+def test_half_open_lets_one_probe_through():
+    clock = _Clock()
+    breaker = CircuitBreaker("coinbase", failure_threshold=1, reset_timeout=5.0, clock=clock)
+    with pytest.raises(RuntimeError):
+        _call(breaker, _boom)
+    clock.now += 5.0
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_probe():
+            await release.wait()
+            return "probe"
+
+        probe = asyncio.ensure_future(breaker.call(slow_probe))
+        await asyncio.sleep(0)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(_ok)
+        release.set()
+        return await probe
+
+    assert asyncio.run(scenario()) == "probe"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_value_error_is_not_an_exchange_failure():
+    breaker = CircuitBreaker("binance", failure_threshold=2, clock=_Clock())
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            _call(breaker, _unlisted)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_limiter_resyncs_from_used_weight():
+    clock = _Clock()
+    limiter = AdaptiveRateLimiter(rate=100, capacity=6000, used_header="X-MBX-USED-WEIGHT-1M", clock=clock)
+    limiter.observe(200, {"X-MBX-USED-WEIGHT-1M": "5900"})
+    assert limiter.stats()["tokens"] == 100
+    limiter.observe(200, {"X-MBX-USED-WEIGHT-1M": "10"})  # our own count stays when it is lower
+    assert limiter.stats()["tokens"] == 100
+    clock.now += 2.0
+    assert limiter.stats()["tokens"] == 300
+
+
+def test_limiter_pauses_until_the_reset_when_nothing_remains():
+    clock, wall = _Clock(), _Clock(1_700_000_000.0)
+    limiter = AdaptiveRateLimiter(
+        rate=120, capacity=600, remaining_header="X-Bapi-Limit-Status",
+        reset_header="X-Bapi-Limit-Reset-Timestamp", clock=clock, wall_clock=wall,
+    )
+    limiter.observe(200, {"X-Bapi-Limit-Status": "42"})
+    assert limiter.stats()["tokens"] == 42 and limiter.stats()["paused_s"] == 0
+    limiter.observe(200, {"X-Bapi-Limit-Status": "0", "X-Bapi-Limit-Reset-Timestamp": str(1_700_000_002_500)})
+    assert limiter.stats()["paused_s"] == pytest.approx(2.5)
+
+
+@pytest.mark.parametrize("status", [429, 418])
+def test_limiter_honours_retry_after(monkeypatch, status):
+    clock = _Clock()
+    limiter = AdaptiveRateLimiter(rate=10, capacity=10, clock=clock)
+    limiter.observe(status, {"Retry-After": "3"})
+    assert limiter.throttled == 1
+    assert limiter.stats()["tokens"] == 0 and limiter.stats()["paused_s"] == 3
+
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(resilience.asyncio, "sleep", fake_sleep)
+    asyncio.run(limiter.acquire())
+    assert slept[0] == pytest.approx(3.0)
+    assert clock.now >= 1003.0
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+from app.parsers.routing import EndpointSelector
+from app.utils.hedge import HedgedCallError
+
+
+def _variants(prices, calls):
+    """Variants returning ``prices[name]`` (a float, or an exception to raise); records every call."""
+
+    def variant(name):
+        async def fetch():
+            calls.append(name)
+            outcome = prices[name]
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+        return fetch
+
+    return {name: variant(name) for name in prices}
+
+
+def test_winner_is_learned_per_symbol_and_persisted(tmp_path):
+    path = tmp_path / "routes" / "bybit.json"
+    selector = EndpointSelector(str(path), stagger=0.01)
+    calls = []
+    btc = _variants({"linear": ValueError("no linear"), "spot": 100.0}, calls)
+    eth = _variants({"linear": 2000.0, "spot": 1999.0}, calls)
+
+    assert asyncio.run(selector.call("BTCUSDT", btc, "Unsupported symbol")) == ("spot", 100.0)
+    assert asyncio.run(selector.call("ETHUSDT", eth, "Unsupported symbol")) == ("linear", 2000.0)
+    assert selector.stats() == {"routes": {"BTCUSDT": "spot", "ETHUSDT": "linear"}, "hits": 0, "misses": 2}
+    assert json.loads(path.read_text(encoding="utf-8")) == {"BTCUSDT": "spot", "ETHUSDT": "linear"}
+
+    # A new instance (restart) goes straight to the learned variant
+    calls.clear()
+    restarted = EndpointSelector(str(path), stagger=0.01)
+    assert asyncio.run(restarted.call("BTCUSDT", btc, "Unsupported symbol")) == ("spot", 100.0)
+    assert calls == ["spot"]
+    assert (restarted.hits, restarted.misses) == (1, 0)
+
+
+def test_failing_learned_variant_is_relearned(tmp_path):
+    path = tmp_path / "bitget.json"
+    path.write_text(json.dumps({"BTCUSDT": "v2_ticker"}), encoding="utf-8")
+    selector = EndpointSelector(str(path), stagger=0.01)
+    calls = []
+    variants = _variants({"v2_ticker": ValueError("gone"), "v2_list": 101.0}, calls)
+    assert asyncio.run(selector.call("BTCUSDT", variants, "Unsupported symbol")) == ("v2_list", 101.0)
+    assert calls == ["v2_ticker", "v2_list"]
+    assert (selector.hits, selector.misses) == (0, 1)
+    assert json.loads(path.read_text(encoding="utf-8")) == {"BTCUSDT": "v2_list"}
+
+
+def test_unknown_symbol_and_upstream_errors():
+    selector = EndpointSelector(None, stagger=0.01)
+    unlisted = _variants({"a": ValueError("x"), "b": ValueError("y")}, [])
+    with pytest.raises(ValueError, match="Unsupported symbol"):
+        asyncio.run(selector.call("FOO", unlisted, "Unsupported symbol"))
+    down = _variants({"a": ValueError("x"), "b": RuntimeError("503")}, [])
+    with pytest.raises(HedgedCallError):
+        asyncio.run(selector.call("BTC", down, "Unsupported symbol"))
+    assert selector.stats()["routes"] == {}
+
+
+def test_unreadable_route_file_starts_empty(tmp_path):
+    path = tmp_path / "routes.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert EndpointSelector(str(path)).stats()["routes"] == {}
@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.shared_prices import SharedPriceTable, table_keys
+
+
+@pytest.fixture
+def table():
+    table = SharedPriceTable.create(table_keys(["BTC", "ETH"]))
+    yield table
+    table.close()
+
+
+def test_publish_is_visible_to_an_attached_reader(table):
+    reader = SharedPriceTable.attach(table.name, table_keys(["BTC", "ETH"]))
+    try:
+        assert reader.get("binance", "BTC") is None
+        assert table.publish({"source": "binance", "symbol": "BTC", "price": 100.5, "currency": "USDT", "ts": 1.0})
+        assert not table.publish({"source": "kraken", "symbol": "BTC", "price": 1.0})
+        entry = reader.get("binance", "BTC")
+        assert entry == {"symbol": "BTC", "price": 100.5, "source": "binance", "currency": "USDT", "ts": 1.0}
+        assert reader.get("binance", "BTC", max_age=5.0) is None  # ts=1.0 is long past
+        cursor = reader.new_cursor()
+        assert [e["symbol"] for e in reader.changed(cursor)] == ["BTC"]
+        assert reader.changed(cursor) == []
+    finally:
+        reader.close()
+
+
+def test_reader_never_returns_an_entry_mid_write(table):
+    table.publish({"source": "bybit", "symbol": "ETH", "price": 2000.0, "ts": 1.0})
+    i = table._index[("bybit", "ETH")]
+    table._seq[i] += 1  # writer is between the two sequence bumps
+    table._price[i] = 2001.0
+    assert table.get("bybit", "ETH") is None
+    assert table.retries == 100
+    table._seq[i] += 1
+    assert table.get("bybit", "ETH")["price"] == 2001.0
+
+
+def test_attach_rejects_a_different_layout(table):
+    with pytest.raises(ValueError, match="different layout"):
+        SharedPriceTable.attach(table.name, table_keys(["BTC", "SOL"]))
+    with pytest.raises(ValueError, match="different layout"):
+        SharedPriceTable.attach(table.name, table_keys(["BTC"]))
@@ -0,0 +1,213 @@
+import asyncio
+import json
+from typing import Dict, List
+
+import pytest
+from aiohttp import WSMsgType, web
+from fastapi import WebSocketDisconnect
+
+from app.services.stream import (
+    BinanceStream,
+    BitgetStream,
+    BybitStream,
+    CoinbaseStream,
+    ExchangeStream,
+    PriceBook,
+)
+from app.utils.http import close_shared_connector
+
+# Per exchange: frames the parser must ignore, then one ticker frame for BTC
+FRAMES: Dict[type, List[object]] = {
+    BinanceStream: [
+        {"result": None, "id": 1},
+        {"stream": "btcusdt@miniTicker", "data": {"e": "24hrMiniTicker", "s": "BTCUSDT", "c": "65000.5"}},
+    ],
+    BybitStream: [
+        {"op": "subscribe", "success": True},
+        {"topic": "tickers.BTCUSDT", "type": "delta", "data": {"symbol": "BTCUSDT", "bid1Price": "64999"}},
+        {"topic": "tickers.BTCUSDT", "type": "snapshot", "data": {"symbol": "BTCUSDT", "lastPrice": "65000.5"}},
+    ],
+    BitgetStream: [
+        "pong",
+        {"event": "subscribe", "arg": {"instType": "SPOT", "channel": "ticker", "instId": "BTCUSDT"}},
+        {"action": "snapshot", "arg": {"instType": "SPOT", "channel": "ticker", "instId": "BTCUSDT"},
+         "data": [{"instId": "BTCUSDT", "lastPr": "65000.5"}]},
+    ],
+    CoinbaseStream: [
+        {"type": "subscriptions", "channels": [{"name": "ticker", "product_ids": ["BTC-USD"]}]},
+        {"type": "ticker", "product_id": "BTC-USD", "price": "65000.5"},
+    ],
+}
+
+
+class FakeWebSocketServer:
+    """Local WebSocket endpoint: records what clients send, replays ``frames`` and closes the connection."""
+
+    def __init__(self, frames: List[object]):
+        self.frames = frames
+        self.connections = 0
+        self.received: List[object] = []
+        self.runner: web.AppRunner = None  # type: ignore[assignment]
+        self.url = ""
+
+    async def handler(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        # Subscriptions arrive right after the handshake
+        try:
+            msg = await ws.receive(timeout=0.2)
+            if msg.type == WSMsgType.TEXT:
+                self.received.append(json.loads(msg.data))
+        except asyncio.TimeoutError:
+            pass
+        for frame in self.frames:
+            await ws.send_str(frame if isinstance(frame, str) else json.dumps(frame))
+        await ws.close()
+        return ws
+
+    async def __aenter__(self) -> "FakeWebSocketServer":
+        app = web.Application()
+        app.router.add_get("/ws", self.handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        self.url = f"http://127.0.0.1:{port}/ws"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.runner.cleanup()
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize("cls", list(FRAMES), ids=lambda c: c.source)
+def test_parse_against_fake_server(cls):
+    async def scenario():
+        book = PriceBook()
+        async with FakeWebSocketServer(FRAMES[cls]) as server:
+            stream = cls(book, ["BTC", "ETH"], url=server.url, min_backoff=0.01, max_backoff=0.05)
+            stream.start()
+            try:
+                await _wait_for(lambda: book.get(cls.source, "BTC") is not None)
+            finally:
+                await stream.stop()
+                await close_shared_connector()
+        item = book.get(cls.source, "BTC")
+        assert item["price"] == 65000.5
+        assert item["currency"] == ("USD" if cls is CoinbaseStream else "USDT")
+        assert book.updates == 1
+        assert book.get(cls.source, "ETH") is None
+        return server
+
+    server = asyncio.run(scenario())
+    if cls is not BinanceStream:  # Binance subscribes through the URL
+        assert server.received, "no subscribe message sent"
+
+
+def test_ignored_frames_do_not_update():
+    book = PriceBook()
+    for cls, frames in FRAMES.items():
+        stream = cls(book, ["BTC"])
+        for frame in frames[:-1]:
+            assert stream.handle(frame if isinstance(frame, str) else json.dumps(frame)) == 0
+    assert book.updates == 0
+
+
+def test_reconnects_with_backoff_and_resubscribes():
+    async def scenario():
+        book = PriceBook()
+        async with FakeWebSocketServer(FRAMES[BybitStream]) as server:
+            stream = BybitStream(book, ["BTC"], url=server.url, min_backoff=0.01, max_backoff=0.05)
+            stream.start()
+            try:
+                # The server hangs up after every replay; the client must come back each time
+                await _wait_for(lambda: server.connections >= 3)
+            finally:
+                await stream.stop()
+                await close_shared_connector()
+        assert stream.reconnects >= 2
+        assert not stream.connected
+        assert len(server.received) >= 3
+        assert all(m["op"] == "subscribe" for m in server.received)
+
+    asyncio.run(scenario())
+
+
+def test_malformed_frame_is_dropped_without_reconnecting():
+    frames = [
+        {"type": "ticker", "product_id": "BTC-USD", "price": "not-a-number"},
+        {"type": "ticker", "product_id": "BTC-USD", "price": "65000.5"},
+    ]
+
+    async def scenario():
+        book = PriceBook()
+        async with FakeWebSocketServer(frames) as server:
+            stream = CoinbaseStream(book, ["BTC"], url=server.url, min_backoff=0.01, max_backoff=0.05)
+            stream.start()
+            try:
+                await _wait_for(lambda: book.get("coinbase", "BTC") is not None)
+            finally:
+                await stream.stop()
+                await close_shared_connector()
+        return book, stream
+
+    book, stream = asyncio.run(scenario())
+    # The good frame right after the bad one arrives on the same connection
+    assert book.get("coinbase", "BTC")["price"] == 65000.5
+    assert stream.stats()["bad_frames"] >= 1
+
+
+def test_stream_classes_are_abstract():
+    with pytest.raises(TypeError):
+        ExchangeStream(PriceBook(), ["BTC"])  # type: ignore[abstract]
+
+
+class _FakeClient:
+    """Minimal WebSocket for calling an endpoint directly: ``?symbols=``, records sends, leaves after ``n`` messages."""
+
+    def __init__(self, symbols: str, n: int = 1):
+        self.query_params = {"symbols": symbols}
+        self.sent: List[dict] = []
+        self.n = n
+        self.done = asyncio.Event()
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_json(self, data: dict) -> None:
+        self.sent.append(data)
+        if len(self.sent) >= self.n:
+            self.done.set()
+
+    async def receive_json(self) -> dict:
+        await self.done.wait()
+        raise WebSocketDisconnect(1000)
+
+
+def test_ws_prices_ignores_unsupported_initial_symbols(monkeypatch):
+    from app import main
+
+    book = PriceBook()
+    book.update("binance", "NOTLISTED", 1.0, "USDT")
+    book.update("binance", "BTC", 65000.5, "USDT")
+    monkeypatch.setattr(main, "_price_book", book)
+    seen = []
+    monkeypatch.setattr(book, "unsubscribe", lambda sub: seen.append(sub.symbols))
+    client = _FakeClient("notlisted,btc")
+    asyncio.run(main.ws_prices(client))
+    assert [m["symbol"] for m in client.sent] == ["BTC"]
+    assert seen == [{"BTC"}]
+
+    nothing = _FakeClient("notlisted", n=1)
+    nothing.done.set()
+    asyncio.run(main.ws_prices(nothing))
+    assert nothing.sent == [] and seen[-1] == set()
+
@@ -0,0 +1,55 @@
+import asyncio
+
+from app.utils.symbols import Instrument, SymbolIndex, decimals
+
+
+def _binance(*bases):
+    return [Instrument("binance", base, "USDT", f"{base}USDT", 2, 5) for base in bases]
+
+
+def test_native_uses_fallback_until_the_exchange_is_discovered():
+    index = SymbolIndex()
+    fallback = {"BTC": "BTCUSDT", "DOGE": "DOGEUSDT"}
+    assert index.native("binance", "DOGE", fallback) == "DOGEUSDT"
+    index.replace("binance", _binance("BTC", "ETH"))
+    assert index.native("binance", "DOGE", fallback) is None
+    assert index.native("binance", "ETH", fallback) == "ETHUSDT"
+    assert index.native("coinbase", "BTC", {"BTC": "BTC-USD"}) == "BTC-USD"
+
+
+def test_replace_drops_delisted_pairs_of_that_exchange_only():
+    index = SymbolIndex()
+    index.replace("binance", _binance("BTC", "LUNA"))
+    index.replace("coinbase", [Instrument("coinbase", "LUNA", "USD", "LUNA-USD")])
+    index.replace("binance", _binance("BTC"))
+    assert index.instrument("binance", "LUNA") is None
+    assert index.native("coinbase", "LUNA") == "LUNA-USD"
+    assert index.symbols() == ["BTC", "LUNA"]
+    assert len(index) == 2
+
+
+def test_refresh_persists_and_a_cold_start_loads_without_network(tmp_path):
+    path = str(tmp_path / "symbols.json")
+    index = SymbolIndex(path)
+
+    async def fail():
+        raise RuntimeError("offline")
+
+    async def binance():
+        return _binance("BTC", "SOL")
+
+    summary = asyncio.run(index.refresh({"binance": binance, "bybit": fail}))
+    assert summary["binance"] == 2 and summary["bybit"].startswith("error")
+    assert index.errors == 1
+
+    cold = SymbolIndex(path)
+    assert cold.load()
+    inst = cold.instrument("binance", "SOL")
+    assert (inst.native, inst.price_decimals, inst.qty_decimals) == ("SOLUSDT", 2, 5)
+    assert cold.fetched_at == index.fetched_at
+    assert not cold.has_exchange("bybit")
+    assert not SymbolIndex(str(tmp_path / "missing.json")).load()
+
+
+def test_decimals():
+    assert (decimals("0.0100"), decimals("1"), decimals("1e-05"), decimals("bad")) == (2, 0, 5, 0)